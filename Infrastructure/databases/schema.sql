@@ -13,7 +13,7 @@ CREATE TABLE IF NOT EXISTS predictions (
   symbol TEXT,
   tf TEXT,
   open_time TIMESTAMP,
-  feature_vector JSONB,
+  feature_vector BYTEA, -- little-endian float32 in features.yaml order (4 bytes/feature)
   p_win NUMERIC,
   model_id TEXT REFERENCES models(model_id),
   created_utc TIMESTAMP DEFAULT NOW()
@@ -42,4 +42,26 @@ CREATE TABLE IF NOT EXISTS trades (
   pnl NUMERIC,
   mae NUMERIC,
   mfe NUMERIC
-);
\ No newline at end of file
+);
+-- Migration: predictions.feature_vector JSONB -> BYTEA (little-endian float32, see above).
+-- Idempotent; a no-op on databases created from this file. JSON nulls become NaN so the
+-- feature positions are kept; non-array values become NULL.
+CREATE OR REPLACE FUNCTION fx_jsonb_to_f32le(v JSONB) RETURNS BYTEA LANGUAGE SQL IMMUTABLE AS $$
+  SELECT CASE WHEN jsonb_typeof(v) = 'array' THEN COALESCE((
+    SELECT string_agg(substring(b FROM 4 FOR 1) || substring(b FROM 3 FOR 1)
+                      || substring(b FROM 2 FOR 1) || substring(b FROM 1 FOR 1), ''::BYTEA ORDER BY i)
+    FROM (SELECT i, float4send(COALESCE(x::REAL, 'NaN'::REAL)) AS b
+          FROM jsonb_array_elements_text(v) WITH ORDINALITY AS e(x, i)) f), ''::BYTEA)
+  END
+$$;
+
+DO $$
+BEGIN
+  IF EXISTS (SELECT 1 FROM information_schema.columns
+             WHERE table_schema = current_schema() AND table_name = 'predictions'
+               AND column_name = 'feature_vector' AND data_type = 'jsonb') THEN
+    ALTER TABLE predictions ALTER COLUMN feature_vector TYPE BYTEA USING fx_jsonb_to_f32le(feature_vector);
+  END IF;
+END $$;
+
+DROP FUNCTION IF EXISTS fx_jsonb_to_f32le(JSONB);
@@ -0,0 +1,288 @@
+# Append-only columnar feature store (training, replay, drift/decay monitoring).
+# - <root>/<features_version>/schema.json lists the float32 columns (features in features.yaml
+#   order + extras such as p_win); data lives in <root>/<features_version>/<SYMBOL>/<YYYY-MM-DD>/
+#   as one little-endian file per column (<col>.f4) plus open_time.i8 (bar open time, epoch s,
+#   as the EA reports it; the day partition is taken from it).
+# - Columns are written first and open_time.i8 last, so its length is the committed row count;
+#   a torn append is truncated away on the next write (same rule as RatesStore).
+# - Rows not strictly newer than a partition's last open_time are skipped (retries, replays).
+# - Readers get read-only np.memmap column slices; a single-day read is zero-copy, multi-day
+#   reads concatenate one array per requested column.
+# - FeatureStoreWriter buffers rows off the hot path (inference server) and appends in batches.
+# - pandas is imported only by the DataFrame helpers (Block.frame, append_frame) and for
+#   non-ISO open_time strings, so the inference server does not load it.
+from __future__ import annotations
+import json, os, queue, re, threading, time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+TIME_FILE = "open_time.i8"
+_DAY = 86400
+_CORR = re.compile(r"^(?P<symbol>.+)-(?P<t>\d{9,})$")   # EA correlation id: "<SYMBOL>-<bar time>"
+
+def _day_name(day: int) -> str:
+    return datetime.fromtimestamp(day * _DAY, tz=timezone.utc).strftime("%Y-%m-%d")
+
+def _day_of(name: str) -> int:
+    return int(datetime.strptime(name, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp()) // _DAY
+
+def parse_open_time(v) -> Optional[int]:
+    """Epoch seconds from an int, a digit string or an ISO timestamp (naive = UTC)."""
+    if v is None or v == "": return None
+    if isinstance(v, (int, np.integer)): return int(v)
+    s = str(v).strip()
+    if s.isdigit(): return int(s)
+    try:
+        ts = datetime.fromisoformat(s)
+    except ValueError:
+        import pandas as pd
+        ts = pd.Timestamp(s).to_pydatetime()
+    return int((ts.replace(tzinfo=timezone.utc) if ts.tzinfo is None else ts).timestamp())
+
+def parse_correlation_id(corr: str) -> Tuple[Optional[str], Optional[int]]:
+    m = _CORR.match(corr or "")
+    return (m["symbol"], int(m["t"])) if m else (None, None)
+
+@dataclass(frozen=True)
+class Partition:
+    path: Path
+    day: int        # days since epoch (UTC)
+
+    @property
+    def rows(self) -> int:
+        try: return (self.path / TIME_FILE).stat().st_size // 8
+        except FileNotFoundError: return 0
+
+    def _map(self, name: str, dtype: str, n: int) -> np.ndarray:
+        if n == 0: return np.empty(0, dtype=dtype)
+        return np.memmap(self.path / name, dtype=dtype, mode="r", shape=(n,))
+
+    def times(self, n: Optional[int] = None) -> np.ndarray:
+        return self._map(TIME_FILE, "<i8", self.rows if n is None else n)
+
+    def column(self, name: str, n: Optional[int] = None) -> np.ndarray:
+        n = self.rows if n is None else n
+        if not (self.path / f"{name}.f4").exists(): return np.full(n, np.nan, dtype=np.float32)
+        return self._map(f"{name}.f4", "<f4", n)
+
+@dataclass
+class FeatureBlock:
+    features_version: str
+    symbol: str
+    times: np.ndarray                   # int64 open_time
+    columns: Dict[str, np.ndarray]      # float32, memmaps when the read hit one partition
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.columns[name]
+
+    def matrix(self, names: Optional[Sequence[str]] = None) -> np.ndarray:
+        """(rows, F) float32 in `names` order (copies)."""
+        names = list(names or self.columns)
+        X = np.empty((len(self.times), len(names)), dtype=np.float32)
+        for j, c in enumerate(names): X[:, j] = self.columns[c]
+        return X
+
+    def frame(self) -> pd.DataFrame:
+        import pandas as pd
+        return pd.DataFrame(self.columns, index=pd.Index(self.times, name="open_time"))
+
+class FeatureStore:
+    def __init__(self, root):
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._schemas: Dict[str, Tuple[str, ...]] = {}
+
+    # ---------- schema ----------
+    def schema(self, features_version: str) -> Optional[Tuple[str, ...]]:
+        if features_version not in self._schemas:
+            p = self.root / features_version / "schema.json"
+            if not p.exists(): return None
+            self._schemas[features_version] = tuple(json.loads(p.read_text())["columns"])
+        return self._schemas[features_version]
+
+    def create(self, features_version: str, columns: Sequence[str]) -> Tuple[str, ...]:
+        """Idempotent; a features_version is bound to one column list forever."""
+        cols = tuple(columns)
+        with self._lock:
+            have = self.schema(features_version)
+            if have is not None:
+                if have != cols:
+                    raise ValueError(f"features_version {features_version} already has columns {have[:4]}..., got {cols[:4]}...")
+                return have
+            d = self.root / features_version; d.mkdir(parents=True, exist_ok=True)
+            tmp = d / ".schema.json.tmp"
+            tmp.write_text(json.dumps({"features_version": features_version, "columns": list(cols)}))
+            os.replace(tmp, d / "schema.json")
+            self._schemas[features_version] = cols
+            return cols
+
+    # ---------- write ----------
+    def append(self, features_version: str, symbol: str, times, values) -> int:
+        """
+        values: (rows, F) array in schema order, or {column: (rows,)} (missing columns = NaN).
+        Returns rows written (older-or-equal rows per partition are skipped).
+        """
+        cols = self.schema(features_version)
+        if cols is None: raise KeyError(f"unknown features_version {features_version}; call create() first")
+        t = np.asarray(times, dtype=np.int64)
+        if isinstance(values, Mapping):
+            X = np.full((len(t), len(cols)), np.nan, dtype=np.float32)
+            for j, c in enumerate(cols):
+                if c in values: X[:, j] = np.asarray(values[c], dtype=np.float32)
+        else:
+            X = np.asarray(values, dtype=np.float32).reshape(len(t), len(cols))
+        order = np.argsort(t, kind="stable"); t, X = t[order], X[order]
+        written = 0
+        with self._lock:
+            for day in np.unique(t // _DAY):
+                m = (t // _DAY) == day
+                written += self._append_partition(self.root / features_version / symbol / _day_name(int(day)),
+                                                  cols, t[m], X[m])
+        return written
+
+    def append_frame(self, features_version: str, symbol: str, df: pd.DataFrame) -> int:
+        """df indexed by open_time (e.g. ml_pipeline.feature_builder.build_features output)."""
+        cols = self.create(features_version, self.schema(features_version) or list(df.columns))
+        return self.append(features_version, symbol, df.index.to_numpy(),
+                           {c: df[c].to_numpy() for c in cols if c in df})
+
+    @staticmethod
+    def _append_partition(path: Path, cols: Sequence[str], t: np.ndarray, X: np.ndarray) -> int:
+        path.mkdir(parents=True, exist_ok=True)
+        part = Partition(path, 0)
+        n = part.rows
+        if n:
+            last = int(part.times(n)[-1])
+            keep = t > last
+            t, X = t[keep], X[keep]
+        # dedupe within the batch as well (keep the first of equal times)
+        if len(t) > 1:
+            keep = np.concatenate(([True], np.diff(t) > 0)); t, X = t[keep], X[keep]
+        if not len(t): return 0
+        for j, c in enumerate(cols):
+            p = path / f"{c}.f4"
+            size = p.stat().st_size if p.exists() else 0
+            if size > n * 4: os.truncate(p, n * 4)              # torn previous append
+            with open(p, "ab") as f:
+                if size < n * 4: f.write(np.full(n - size // 4, np.nan, dtype="<f4").tobytes())  # column added late
+                f.write(np.ascontiguousarray(X[:, j], dtype="<f4").tobytes())
+        tp = path / TIME_FILE
+        if tp.exists() and tp.stat().st_size != n * 8: os.truncate(tp, n * 8)
+        with open(tp, "ab") as f:
+            f.write(t.astype("<i8").tobytes())
+        return len(t)
+
+    # ---------- read ----------
+    def versions(self) -> List[str]:
+        return sorted(p.parent.name for p in self.root.glob("*/schema.json"))
+
+    def symbols(self, features_version: str) -> List[str]:
+        d = self.root / features_version
+        return sorted(p.name for p in d.iterdir() if p.is_dir()) if d.exists() else []
+
+    def partitions(self, features_version: str, symbol: str, start=None, end=None) -> List[Partition]:
+        """Day partitions overlapping [start, end] (epoch s / ISO / None), oldest first."""
+        d = self.root / features_version / symbol
+        if not d.exists(): return []
+        lo = parse_open_time(start); hi = parse_open_time(end)
+        parts = sorted((Partition(p, _day_of(p.name)) for p in d.iterdir() if p.is_dir()), key=lambda p: p.day)
+        return [p for p in parts if (lo is None or p.day >= lo // _DAY) and (hi is None or p.day <= hi // _DAY)]
+
+    def read(self, features_version: str, symbol: str, start=None, end=None,
+             columns: Optional[Sequence[str]] = None) -> FeatureBlock:
+        cols = list(columns or self.schema(features_version) or ())
+        lo = parse_open_time(start); hi = parse_open_time(end)
+        times, data = [], {c: [] for c in cols}
+        for part in self.partitions(features_version, symbol, start, end):
+            n = part.rows
+            if not n: continue
+            t = part.times(n)
+            a = int(np.searchsorted(t, lo, "left")) if lo is not None else 0
+            b = int(np.searchsorted(t, hi, "right")) if hi is not None else n
+            if a >= b: continue
+            times.append(t[a:b])
+            for c in cols: data[c].append(part.column(c, n)[a:b])
+        if len(times) == 1:
+            return FeatureBlock(features_version, symbol, times[0], {c: v[0] for c, v in data.items()})
+        cat = lambda xs, dt: np.concatenate(xs) if xs else np.empty(0, dtype=dt)
+        return FeatureBlock(features_version, symbol, cat(times, np.int64), {c: cat(v, np.float32) for c, v in data.items()})
+
+class FeatureStoreWriter:
+    """Non-blocking row appender: add() is a put_nowait; a thread appends per (version, symbol) batch."""
+    def __init__(self, store: FeatureStore, max_queue: int = 100_000, batch_size: int = 4096, flush_s: float = 1.0):
+        self.store = store; self.batch_size = batch_size; self.flush_s = flush_s
+        self.counters = {"enqueued": 0, "dropped": 0, "written": 0, "skipped": 0, "errors": 0}
+        self.last_error = ""
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max_queue)
+        self._t = threading.Thread(target=self._run, name="feature-store", daemon=True)
+        self._t.start()
+
+    def add(self, features_version: str, columns: Sequence[str], symbol: Optional[str], open_time,
+            vec, extras: Optional[Mapping[str, float]] = None) -> bool:
+        t = parse_open_time(open_time)
+        if symbol is None or t is None:
+            self.counters["skipped"] += 1
+            return False
+        try:
+            self._q.put_nowait((features_version, tuple(columns), symbol, t, np.asarray(vec, dtype=np.float32), extras or {}))
+        except queue.Full:
+            self.counters["dropped"] += 1
+            return False
+        self.counters["enqueued"] += 1
+        return True
+
+    def stats(self) -> Dict[str, object]:
+        return {**self.counters, "queue_depth": self._q.qsize(), "last_error": self.last_error}
+
+    def flush(self, timeout: float = 5.0) -> bool:
+        deadline = time.monotonic() + timeout
+        while self._q.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.002)
+        return self._q.unfinished_tasks == 0
+
+    def close(self, timeout: float = 5.0) -> None:
+        self.flush(timeout)
+        self._q.put(None)
+        self._t.join(timeout)
+
+    def _run(self) -> None:
+        stop = False
+        while not stop:
+            item = self._q.get()
+            if item is None: break
+            batch = [item]
+            deadline = time.monotonic() + self.flush_s
+            while len(batch) < self.batch_size:
+                try: item = self._q.get(timeout=max(0.0, min(deadline - time.monotonic(), 0.05)))
+                except queue.Empty:
+                    if time.monotonic() >= deadline: break
+                    continue
+                if item is None: stop = True; break
+                batch.append(item)
+            self._write(batch)
+            for _ in batch: self._q.task_done()
+
+    def _write(self, batch: List[tuple]) -> None:
+        groups: Dict[Tuple[str, Tuple[str, ...], str], List[tuple]] = {}
+        for fv, cols, sym, t, vec, extras in batch: groups.setdefault((fv, cols, sym), []).append((t, vec, extras))
+        for (fv, cols, sym), rows in groups.items():
+            try:
+                extra_cols = sorted({k for _, _, e in rows for k in e})
+                schema = self.store.create(fv, self.store.schema(fv) or [*cols, *extra_cols])
+                X = np.stack([v for _, v, _ in rows])
+                values = {c: X[:, j] for j, c in enumerate(cols)}
+                for k in extra_cols: values[k] = np.array([e.get(k, np.nan) for _, _, e in rows], dtype=np.float32)
+                self.counters["written"] += self.store.append(fv, sym, [t for t, _, _ in rows],
+                                                              {c: values[c] for c in schema if c in values})
+            except Exception as e:
+                self.counters["errors"] += 1; self.last_error = repr(e)
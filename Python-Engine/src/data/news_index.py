@@ -0,0 +1,177 @@
+# Time-sorted, per-currency economic-calendar index (built once per calendar change).
+# - Accepts both calendar layouts in the repo: utc_ts,impact,currency,title (EA Files/calendar.csv)
+#   and event_time_iso,currency,importance,event_name (data/news/calendar.csv, importance 1..3).
+# - Levels follow CNewsCalendar: 0=LOW, 1=MEDIUM, 2=HIGH; "ALL" events apply to every currency.
+# - next-event / blackout queries are np.searchsorted over cached per-(currency set, level) arrays,
+#   vectorized over query times (feature building uses the same index as the live EA table).
+# - minute_table() exports a precomputed next/prev-event table for the coming hours that
+#   NewsIndex.mqh reads once per change and then answers per bar in O(1).
+#   Exact for events on whole minutes (calendar times are); sub-minute times resolve at the minute.
+from __future__ import annotations
+import hashlib, struct
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+LOW, MEDIUM, HIGH = 0, 1, 2
+LEVELS = 3
+NO_NEWS_MIN = 9999.0
+TABLE_MAGIC = 0x3158494E      # "NIX1" little-endian
+TABLE_VERSION = 1
+NONE = np.iinfo(np.int32).min  # table offset for "no event"
+_HEADER = struct.Struct("<iiqiiii")   # magic, version, start_utc, n_minutes, n_ccy, n_levels, reserved
+
+def impact_level(impact) -> int:
+    u = str(impact).upper()
+    if "HIGH" in u: return HIGH
+    if "MED" in u: return MEDIUM
+    return LOW
+
+def symbol_currencies(symbol: str, quote: bool = True) -> Tuple[str, ...]:
+    """Base (and quote) currency as CNewsCalendar matches them; f21 uses the base only."""
+    return (symbol[:3], symbol[-3:]) if quote else (symbol[:3],)
+
+class NewsIndex:
+    def __init__(self, ts: np.ndarray, level: np.ndarray, ccy: np.ndarray, title: Optional[np.ndarray] = None):
+        order = np.argsort(ts, kind="stable")
+        self.ts = np.asarray(ts, dtype=np.int64)[order]
+        self.level = np.asarray(level, dtype=np.int8)[order]
+        self.ccy = np.asarray(ccy).astype(str)[order]
+        self.title = (np.asarray(title).astype(str)[order] if title is not None else np.full(len(self.ts), ""))
+        self.currencies = tuple(sorted(set(self.ccy) - {"ALL"}))
+        self._cache: Dict[Tuple[Tuple[str, ...], int], np.ndarray] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "NewsIndex":
+        if "utc_ts" in df:
+            df = df.dropna(subset=["utc_ts", "impact", "currency"])
+            ts = pd.to_numeric(df["utc_ts"]).to_numpy(dtype=np.int64)
+            lvl = df["impact"].map(impact_level).to_numpy()
+        else:
+            df = df.dropna(subset=["event_time_iso", "currency", "importance"])
+            ts = pd.to_datetime(df["event_time_iso"], utc=True).to_numpy("datetime64[s]").astype(np.int64)
+            lvl = np.clip(pd.to_numeric(df["importance"]).to_numpy(dtype=np.int64) - 1, LOW, HIGH)
+        title = df["title"] if "title" in df else df.get("event_name")
+        return cls(ts, lvl, df["currency"].astype(str).str.strip().str.upper().to_numpy(),
+                   None if title is None else title.fillna("").to_numpy())
+
+    @classmethod
+    def from_csv(cls, path) -> "NewsIndex":
+        return cls.from_frame(pd.read_csv(path))
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @property
+    def digest(self) -> str:
+        h = hashlib.sha1(self.ts.tobytes()); h.update(self.level.tobytes()); h.update("|".join(self.ccy).encode())
+        return h.hexdigest()[:16]
+
+    def to_frame(self) -> pd.DataFrame:
+        """EA calendar.csv layout (utc_ts,impact,currency,title), time-sorted."""
+        return pd.DataFrame({"utc_ts": self.ts, "impact": np.array(["LOW", "MEDIUM", "HIGH"])[self.level],
+                             "currency": self.ccy, "title": self.title})
+
+    # ---------- queries ----------
+    def events(self, currencies: Iterable[str], min_level: int = HIGH) -> np.ndarray:
+        """Sorted event times for any of `currencies` (plus ALL) at or above min_level."""
+        key = (tuple(sorted(set(currencies))), int(min_level))
+        arr = self._cache.get(key)
+        if arr is None:
+            m = (self.level >= min_level) & np.isin(self.ccy, key[0] + ("ALL",))
+            arr = self._cache[key] = self.ts[m]
+        return arr
+
+    def next_event(self, currencies: Iterable[str], now_utc, min_level: int = HIGH) -> np.ndarray:
+        """First event time >= now (-1 when none), per query time."""
+        ev = self.events(currencies, min_level); now = np.atleast_1d(np.asarray(now_utc, dtype=np.int64))
+        i = np.searchsorted(ev, now, side="left")
+        return np.where(i < len(ev), ev[np.minimum(i, len(ev) - 1)] if len(ev) else -1, -1)
+
+    def prev_event(self, currencies: Iterable[str], now_utc, min_level: int = HIGH) -> np.ndarray:
+        """Last event time <= now (-1 when none)."""
+        ev = self.events(currencies, min_level); now = np.atleast_1d(np.asarray(now_utc, dtype=np.int64))
+        i = np.searchsorted(ev, now, side="right") - 1
+        return np.where(i >= 0, ev[np.maximum(i, 0)] if len(ev) else -1, -1)
+
+    def minutes_to_next(self, symbol: str, now_utc, min_level: int = HIGH) -> np.ndarray:
+        """EA f[21]: minutes to the next event for the symbol's base currency (or ALL), capped at 9999."""
+        now = np.atleast_1d(np.asarray(now_utc, dtype=np.int64))
+        nxt = self.next_event(symbol_currencies(symbol, quote=False), now, min_level)
+        return np.where(nxt >= 0, np.minimum(NO_NEWS_MIN, (nxt - now) / 60.0), NO_NEWS_MIN)
+
+    def blackout(self, symbol: str, now_utc, min_level: int = HIGH, before_min: int = 45,
+                 after_min: int = 45) -> np.ndarray:
+        """CNewsCalendar.IsBlackout: now within [event - before, event + after] for base/quote/ALL."""
+        now = np.atleast_1d(np.asarray(now_utc, dtype=np.int64)); ccys = symbol_currencies(symbol)
+        nxt = self.next_event(ccys, now, min_level); prv = self.prev_event(ccys, now, min_level)
+        return ((nxt >= 0) & (nxt - now <= before_min * 60)) | ((prv >= 0) & (now - prv <= after_min * 60))
+
+    # ---------- EA export ----------
+    def minute_table(self, start_utc: int, minutes: int) -> Tuple[Tuple[str, ...], np.ndarray]:
+        """
+        (currencies incl. a trailing "ALL" row, int32[n_ccy, LEVELS, 2, minutes]) where [..., 0, m] /
+        [..., 1, m] are the next (>=) / previous (<=) event time at minute start start_utc + 60*m,
+        as seconds from start_utc (NONE when there is none).
+        """
+        start_utc = int(start_utc) // 60 * 60
+        grid = start_utc + 60 * np.arange(minutes, dtype=np.int64)
+        ccys = self.currencies + ("ALL",)
+        out = np.full((len(ccys), LEVELS, 2, minutes), NONE, dtype=np.int32)
+        for c, ccy in enumerate(ccys):
+            for lvl in range(LEVELS):
+                sel = (ccy,) if ccy != "ALL" else ()
+                for k, ev in enumerate((self.next_event(sel, grid, lvl), self.prev_event(sel, grid, lvl))):
+                    ok = ev >= 0
+                    out[c, lvl, k, ok] = np.clip(ev[ok] - start_utc, NONE + 1, np.iinfo(np.int32).max)
+        return ccys, out
+
+    def export_table(self, start_utc: int, hours: int = 48) -> bytes:
+        """Binary table for NewsIndex.mqh: header, n_ccy 4-byte ANSI codes, then the int32 table."""
+        start_utc = int(start_utc) // 60 * 60
+        ccys, tab = self.minute_table(start_utc, hours * 60)
+        head = _HEADER.pack(TABLE_MAGIC, TABLE_VERSION, start_utc, tab.shape[-1], len(ccys), LEVELS, 0)
+        codes = b"".join(c.encode("ascii", "replace")[:4].ljust(4, b"\0") for c in ccys)
+        return head + codes + tab.astype("<i4").tobytes()
+
+class NewsTable:
+    """Reader for export_table() bytes with the same lookups NewsIndex.mqh does (tests / tooling)."""
+    def __init__(self, data: bytes):
+        magic, version, self.start_utc, self.minutes, n_ccy, levels, _ = _HEADER.unpack_from(data)
+        if magic != TABLE_MAGIC or version != TABLE_VERSION: raise ValueError("not a news index table")
+        off = _HEADER.size
+        self.currencies = [data[off + 4 * i: off + 4 * i + 4].rstrip(b"\0").decode() for i in range(n_ccy)]
+        self.table = np.frombuffer(data, dtype="<i4", offset=off + 4 * n_ccy).reshape(n_ccy, levels, 2, self.minutes)
+
+    @classmethod
+    def read(cls, path) -> "NewsTable":
+        return cls(Path(path).read_bytes())
+
+    def covers(self, now_utc: int) -> bool:
+        return 0 <= (now_utc - self.start_utc) // 60 < self.minutes - 1
+
+    def _row(self, ccy: str) -> int:
+        return self.currencies.index(ccy) if ccy in self.currencies else len(self.currencies) - 1  # else ALL
+
+    def _next(self, ccy: str, now: int, lvl: int) -> Optional[int]:
+        m = (now - self.start_utc) // 60; row = self.table[self._row(ccy), lvl, 0]
+        e = int(row[m])
+        if e != NONE and self.start_utc + e < now: e = int(row[m + 1])
+        return None if e == NONE else self.start_utc + e
+
+    def _prev(self, ccy: str, now: int, lvl: int) -> Optional[int]:
+        e = int(self.table[self._row(ccy), lvl, 1, (now - self.start_utc) // 60])
+        return None if e == NONE else self.start_utc + e
+
+    def minutes_to_next(self, symbol: str, now_utc: int, min_level: int = HIGH) -> float:
+        e = self._next(symbol[:3], now_utc, min_level)
+        return NO_NEWS_MIN if e is None else min(NO_NEWS_MIN, (e - now_utc) / 60.0)
+
+    def blackout(self, symbol: str, now_utc: int, min_level: int = HIGH, before_min: int = 45, after_min: int = 45) -> bool:
+        for ccy in symbol_currencies(symbol):
+            n, p = self._next(ccy, now_utc, min_level), self._prev(ccy, now_utc, min_level)
+            if (n is not None and n - now_utc <= before_min * 60) or (p is not None and now_utc - p <= after_min * 60):
+                return True
+        return False
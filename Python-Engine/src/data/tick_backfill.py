@@ -0,0 +1,121 @@
+# Memory-bounded tick history cleaner for multi-year backfills.
+# - Streams ticks from CSV or Parquet in chunks; StreamingTickCleaner carries the
+#   1000-tick rolling window (and last log-mid) across chunk boundaries.
+# - Output (time, bid, ask, z float32, rollover_flag int8) is written per chunk, so
+#   peak memory is O(chunksize) instead of O(history).
+# - Decisions match TickCleaner.detect_and_fix + tag_rollover on the full frame.
+# Requires: pandas, numpy (+ pyarrow for Parquet)
+from __future__ import annotations
+import argparse, resource, sys, time, tracemalloc
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:  # allow `python src/data/tick_backfill.py ...`
+    sys.path.insert(0, str(SRC_DIR))
+from data.tick_processor import TickCleaner, tag_rollover
+
+@dataclass
+class BackfillReport:
+    rows_in: int = 0
+    rows_out: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    peak_rss_mb: float = 0.0        # process high-water mark (ru_maxrss)
+    peak_traced_mb: Optional[float] = None  # Python/NumPy allocations, only with trace_memory
+
+def _is_parquet(path: Path) -> bool:
+    return path.suffix.lower() in (".parquet", ".pq")
+
+def _to_frame(df: pd.DataFrame, time_col: str, time_unit: Optional[str], price_dtype) -> pd.DataFrame:
+    t = df[time_col]
+    idx = pd.to_datetime(t, unit=time_unit, utc=True) if time_unit else pd.to_datetime(t, utc=True, format="ISO8601")
+    return pd.DataFrame({"bid": df["bid"].to_numpy(dtype=price_dtype, copy=False),
+                         "ask": df["ask"].to_numpy(dtype=price_dtype, copy=False)},
+                        index=pd.DatetimeIndex(idx, name=time_col))
+
+def iter_tick_chunks(path, chunksize: int = 500_000, time_col: str = "time",
+                     time_unit: Optional[str] = None, price_dtype=np.float64) -> Iterator[pd.DataFrame]:
+    """bid/ask frames indexed by UTC time, `chunksize` rows at a time."""
+    path = Path(path)
+    cols = [time_col, "bid", "ask"]
+    if _is_parquet(path):
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=cols):
+            yield _to_frame(batch.to_pandas(), time_col, time_unit, price_dtype)
+    else:
+        for df in pd.read_csv(path, usecols=cols, chunksize=chunksize):
+            yield _to_frame(df, time_col, time_unit, price_dtype)
+
+def _empty_output(index: pd.DatetimeIndex, price_dtype) -> pd.DataFrame:
+    """Zero-row frame with the schema backfill_clean writes (for an empty or all-dropped source)."""
+    return pd.DataFrame({"bid": np.empty(0, price_dtype), "ask": np.empty(0, price_dtype),
+                         "z": np.empty(0, np.float32), "rollover_flag": np.empty(0, np.int8)}, index=index[:0])
+
+class _Writer:
+    def __init__(self, path: Path, empty: pd.DataFrame):
+        self.path = path; self.empty = empty; self._pq = None; self._first = True
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if _is_parquet(self.path):
+            import pyarrow as pa, pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=True)
+            if self._pq is None: self._pq = pq.ParquetWriter(self.path, table.schema)
+            self._pq.write_table(table)
+        else:
+            df.to_csv(self.path, mode="w" if self._first else "a", header=self._first)
+        self._first = False
+
+    def close(self) -> None:
+        if self._pq is not None: self._pq.close()
+        elif self._first:  # nothing written: still leave a valid empty file with the real schema
+            if _is_parquet(self.path):
+                import pyarrow as pa, pyarrow.parquet as pq
+                pq.write_table(pa.Table.from_pandas(self.empty, preserve_index=True), self.path)
+            else:
+                self.empty.to_csv(self.path)
+
+def backfill_clean(src, dst, chunksize: int = 500_000, time_col: str = "time", time_unit: Optional[str] = None,
+                   tz: str = "America/New_York", price_dtype=np.float64, trace_memory: bool = False) -> BackfillReport:
+    rep = BackfillReport()
+    t0 = time.perf_counter()
+    if trace_memory: tracemalloc.start()
+    cleaner = TickCleaner().stream()
+    no_rows = pd.DatetimeIndex([], dtype="datetime64[ns, UTC]", name=time_col)
+    writer = _Writer(Path(dst), _empty_output(no_rows, price_dtype))
+    try:
+        for chunk in iter_tick_chunks(src, chunksize, time_col, time_unit, price_dtype):
+            if not rep.chunks: writer.empty = _empty_output(chunk.index, price_dtype)  # source's time unit
+            rep.chunks += 1; rep.rows_in += len(chunk)
+            out = cleaner.process(chunk)
+            if out.empty: continue
+            out = tag_rollover(out.assign(z=out["z"].astype(np.float32)), tz)
+            writer.write(out)
+            rep.rows_out += len(out)
+    finally:
+        writer.close()
+        if trace_memory:
+            rep.peak_traced_mb = tracemalloc.get_traced_memory()[1] / 2**20
+            tracemalloc.stop()
+    rep.seconds = time.perf_counter() - t0
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rep.peak_rss_mb = maxrss / (2**20 if sys.platform == "darwin" else 2**10)
+    return rep
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Chunked tick cleaner (CSV/Parquet -> CSV/Parquet)")
+    ap.add_argument("src"); ap.add_argument("dst")
+    ap.add_argument("--chunksize", type=int, default=500_000)
+    ap.add_argument("--time-col", default="time")
+    ap.add_argument("--time-unit", default=None, help="s/ms/us/ns for epoch columns; ISO strings otherwise")
+    ap.add_argument("--float32-prices", action="store_true", help="halve price memory (changes decisions vs float64)")
+    ap.add_argument("--trace-memory", action="store_true")
+    a = ap.parse_args()
+    r = backfill_clean(a.src, a.dst, a.chunksize, a.time_col, a.time_unit,
+                       price_dtype=np.float32 if a.float32_prices else np.float64, trace_memory=a.trace_memory)
+    print(asdict(r))
@@ -1,20 +1,165 @@
 import pandas as pd, numpy as np
+from typing import Dict, Optional, Tuple
+
+# ---- precomputed UTC boundaries (no per-call tz_convert) ----
+_MIN_NS = 60 * 1_000_000_000
+_HOUR_NS = 60 * _MIN_NS
+_DAY_NS = 24 * _HOUR_NS
+_WEEK_NS = 7 * _DAY_NS
+_MONDAY0_NS = 4 * _DAY_NS                  # 1970-01-05 00:00 UTC was a Monday
+_WEEKEND_OPEN = 5 * _DAY_NS                # Sat 00:00 UTC (offset within week)
+_WEEKEND_CLOSE = 6 * _DAY_NS + 21 * _HOUR_NS  # Sun 21:00 UTC
+
+def _utc_ns(idx: pd.DatetimeIndex) -> np.ndarray:
+    # tz-aware -> UTC epoch ns; naive is taken as UTC
+    return idx.as_unit("ns").asi8
+
+def weekend_keep_mask(ts_ns: np.ndarray) -> np.ndarray:
+    """Mon-Fri plus Sunday from 21:00 UTC."""
+    pos = (np.asarray(ts_ns, dtype=np.int64) - _MONDAY0_NS) % _WEEK_NS
+    return (pos < _WEEKEND_OPEN) | (pos >= _WEEKEND_CLOSE)
+
+class RolloverWindows:
+    """
+    UTC [start, end) of the 17:00-17:30 local rollover, built once per local day (DST-aware)
+    and extended on demand; tagging is a searchsorted instead of a per-tick tz_convert.
+    """
+    def __init__(self, tz: str = "America/New_York", hour: int = 17, minutes: int = 30):
+        self.tz = tz; self.hour = hour; self.minutes = minutes
+        self.starts = np.empty(0, dtype=np.int64); self.ends = np.empty(0, dtype=np.int64)
+        self._lo = self._hi = None
+
+    def _ensure(self, lo_ns: int, hi_ns: int) -> None:
+        if self._lo is not None and self._lo <= lo_ns and hi_ns <= self._hi: return
+        lo = lo_ns if self._lo is None else min(lo_ns, self._lo)
+        hi = hi_ns if self._hi is None else max(hi_ns, self._hi)
+        # pad by a few days so streaming callers rarely rebuild
+        days = pd.date_range(pd.Timestamp(lo - 2 * _DAY_NS).normalize(), pd.Timestamp(hi + 7 * _DAY_NS).normalize(), freq="D")
+        starts = (days + pd.Timedelta(hours=self.hour)).tz_localize(self.tz).tz_convert("UTC")
+        self.starts = starts.as_unit("ns").asi8
+        self.ends = self.starts + self.minutes * _MIN_NS
+        self._lo, self._hi = int(days[0].value), int(days[-1].value)
+
+    def flags(self, ts_ns: np.ndarray) -> np.ndarray:
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        if ts_ns.size == 0: return np.zeros(0, dtype="int8")
+        self._ensure(int(ts_ns.min()), int(ts_ns.max()))
+        i = np.searchsorted(self.starts, ts_ns, side="right") - 1
+        return ((i >= 0) & (ts_ns < self.ends[np.maximum(i, 0)])).astype("int8")
+
+_ROLLOVER: Dict[str, RolloverWindows] = {}
 
 class TickCleaner:
+    window = 1000
+    min_periods = 100
+    z_max = 8.0
+
     def detect_and_fix(self, df: pd.DataFrame) -> pd.DataFrame:
         df = df[(df["ask"]>0) & (df["bid"]>0) & (df["ask"]>df["bid"])]
         mid = (df["ask"]+df["bid"])/2.0
         r = np.log(mid).diff()
-        mu = r.rolling(1000, min_periods=100).mean()
-        sd = r.rolling(1000, min_periods=100).std()
+        mu = r.rolling(self.window, min_periods=self.min_periods).mean()
+        sd = r.rolling(self.window, min_periods=self.min_periods).std()
         z = (r - mu) / (sd + 1e-12)
-        df = df[(z.abs()<8) | z.isna()]
+        df = df[(z.abs()<self.z_max) | z.isna()]
         # drop weekends except Sunday 21:00 UTC+
-        idx = df.index
-        keep = (idx.dayofweek<=4) | ((idx.dayofweek==6) & (idx.hour>=21))
-        return df[keep]
+        return df[weekend_keep_mask(_utc_ns(df.index))]
+
+    def stream(self) -> "StreamingTickCleaner":
+        return StreamingTickCleaner(self.window, self.min_periods, self.z_max)
+
+class StreamingTickCleaner:
+    """
+    Stateful form of TickCleaner.detect_and_fix for the live stream: same accept/reject
+    decisions on the same ticks, without reprocessing history.
+    - push(): one tick, O(1) via a ring buffer + sliding Welford mean/M2 of log returns.
+    - process(): a chunk, vectorized over (carried window tail + chunk).
+    Rejected ticks still advance the return series, exactly as in the batch path.
+    """
+    RESYNC_EVERY = 100_000  # re-derive Welford sums from the ring to bound drift
+
+    def __init__(self, window: int = 1000, min_periods: int = 100, z_max: float = 8.0):
+        self.window = window; self.min_periods = min_periods; self.z_max = z_max
+        self._buf = np.full(window, np.nan)  # last `window` log returns (NaN = none)
+        self._pos = 0
+        self._prev_lm: Optional[float] = None
+        self._n = 0; self._mean = 0.0; self._m2 = 0.0
+        self._welford_stale = False
+        self._since_sync = 0
+
+    # ---- state helpers ----
+    def _tail(self) -> np.ndarray:
+        # chronological last window-1 returns
+        return np.roll(self._buf, -self._pos)[1:]
+
+    def _set_tail(self, r_ext: np.ndarray) -> None:
+        last = r_ext[-self.window:]
+        self._buf[:] = np.nan
+        self._buf[self.window - last.size:] = last
+        self._pos = 0
+        self._welford_stale = True
+
+    def _resync(self) -> None:
+        v = self._buf[~np.isnan(self._buf)]
+        self._n = v.size
+        self._mean = float(v.mean()) if v.size else 0.0
+        self._m2 = float(((v - self._mean) ** 2).sum()) if v.size else 0.0
+        self._welford_stale = False; self._since_sync = 0
+
+    # ---- per tick ----
+    def push(self, ts, bid: float, ask: float) -> Optional[Tuple[int, float, float, float]]:
+        """Returns (ts_ns, bid, ask, z) for an accepted tick, None if rejected. z is NaN until warm."""
+        if not (ask > 0 and bid > 0 and ask > bid): return None
+        if self._welford_stale or self._since_sync >= self.RESYNC_EVERY: self._resync()
+        lm = float(np.log((ask + bid) / 2.0))
+        x = lm - self._prev_lm if self._prev_lm is not None else np.nan
+        self._prev_lm = lm
+
+        old = self._buf[self._pos]
+        self._buf[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        self._since_sync += 1
+        if old == old:  # not NaN: slide out
+            self._n -= 1
+            if self._n == 0: self._mean = self._m2 = 0.0
+            else:
+                d = old - self._mean; self._mean -= d / self._n; self._m2 -= d * (old - self._mean)
+        if x == x:
+            self._n += 1
+            d = x - self._mean; self._mean += d / self._n; self._m2 += d * (x - self._mean)
+
+        z = np.nan
+        if x == x and self._n >= self.min_periods:
+            sd = np.sqrt(max(self._m2 / (self._n - 1), 0.0))
+            z = (x - self._mean) / (sd + 1e-12)
+            if not abs(z) < self.z_max: return None
+        ts_ns = ts.value if isinstance(ts, pd.Timestamp) else int(ts)
+        if not weekend_keep_mask(np.int64(ts_ns)): return None
+        return ts_ns, bid, ask, float(z)
+
+    # ---- per chunk ----
+    def process(self, df: pd.DataFrame) -> pd.DataFrame:
+        """Accepted rows of the chunk (in order) with a 'z' column."""
+        df = df[(df["ask"]>0) & (df["bid"]>0) & (df["ask"]>df["bid"])]
+        if df.empty: return df.assign(z=np.empty(0))
+        lm = np.log(((df["ask"] + df["bid"]) / 2.0).to_numpy(dtype=np.float64))
+        r = np.empty_like(lm)
+        r[0] = lm[0] - self._prev_lm if self._prev_lm is not None else np.nan
+        r[1:] = np.diff(lm)
+        self._prev_lm = float(lm[-1])
+
+        tail = self._tail()
+        ext = np.concatenate([tail, r])
+        roll = pd.Series(ext).rolling(self.window, min_periods=self.min_periods)
+        mu = roll.mean().to_numpy()[tail.size:]
+        sd = roll.std().to_numpy()[tail.size:]
+        z = (r - mu) / (sd + 1e-12)
+        self._set_tail(ext)
+
+        keep = ((np.abs(z) < self.z_max) | np.isnan(z)) & weekend_keep_mask(_utc_ns(df.index))
+        return df[keep].assign(z=z[keep])
 
 def tag_rollover(df: pd.DataFrame, tz="America/New_York") -> pd.DataFrame:
-    local = df.index.tz_convert(tz)
-    df["rollover_flag"] = ((local.hour==17) & (local.minute<30)).astype("int8")
-    return df
\ No newline at end of file
+    w = _ROLLOVER.get(tz) or _ROLLOVER.setdefault(tz, RolloverWindows(tz))
+    df["rollover_flag"] = w.flags(_utc_ns(df.index))
+    return df
@@ -0,0 +1,169 @@
+# Compact binary inference transport over a persistent local TCP socket.
+# Served next to the FastAPI app; both paths share the same bundle/scaler/model code.
+#
+# Request frame (little-endian):
+#   header  <4sBBHH   magic b"FXB1", version, flags, n_features (u16), corr_len (u16)
+#   body    corr_id (utf-8, corr_len bytes) + n_features * float32 (raw, unscaled)
+# Response frame:
+#   header  <4sBBHfIBBH  magic, version, status, corr_len, p_win (f32), latency_us (u32),
+#                        model_id_len (u8), features_version_len (u8), msg_len (u16)
+#   body    corr_id + model_id + features_version + msg (utf-8; msg only set on error)
+# status: 0 ok, 1 bad request (feature count / frame), 2 inference error
+from __future__ import annotations
+import logging, socket, socketserver, struct, threading, time
+from dataclasses import dataclass
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+log = logging.getLogger("fxsuite.binary")
+
+MAGIC = b"FXB1"
+VERSION = 1
+REQ_HEADER = struct.Struct("<4sBBHH")
+RESP_HEADER = struct.Struct("<4sBBHfIBBH")
+MAX_FEATURES = 4096
+
+STATUS_OK, STATUS_BAD_REQUEST, STATUS_ERROR = 0, 1, 2
+
+class FrameError(ValueError):
+    pass
+
+@dataclass
+class BinaryReply:
+    correlation_id: str
+    status: int
+    p_win: float
+    latency_us: int
+    model_id: str
+    features_version: str
+    message: str = ""
+
+    @property
+    def ok(self) -> bool:
+        return self.status == STATUS_OK
+
+# ---------- Framing ----------
+def encode_request(correlation_id: str, features) -> bytes:
+    corr = correlation_id.encode("utf-8")
+    vec = np.ascontiguousarray(features, dtype="<f4")
+    return REQ_HEADER.pack(MAGIC, VERSION, 0, vec.shape[0], len(corr)) + corr + vec.tobytes()
+
+def encode_response(r: BinaryReply) -> bytes:
+    corr, mid = r.correlation_id.encode("utf-8"), r.model_id.encode("utf-8")[:255]
+    fv, msg = r.features_version.encode("utf-8")[:255], r.message.encode("utf-8")[:65535]
+    return RESP_HEADER.pack(MAGIC, VERSION, r.status, len(corr), r.p_win, min(r.latency_us, 0xFFFFFFFF),
+                            len(mid), len(fv), len(msg)) + corr + mid + fv + msg
+
+def _recv_exact(sock: socket.socket, n: int) -> bytes:
+    buf = bytearray(n); view = memoryview(buf); got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if k == 0:
+            raise ConnectionError("peer closed")
+        got += k
+    return bytes(buf)
+
+def read_request(sock: socket.socket) -> Tuple[str, np.ndarray]:
+    magic, ver, _flags, n, corr_len = REQ_HEADER.unpack(_recv_exact(sock, REQ_HEADER.size))
+    if magic != MAGIC or ver != VERSION:
+        raise FrameError(f"bad magic/version {magic!r}/{ver}")
+    if n > MAX_FEATURES:
+        raise FrameError(f"n_features {n} > {MAX_FEATURES}")
+    body = _recv_exact(sock, corr_len + 4 * n)
+    return body[:corr_len].decode("utf-8", "replace"), np.frombuffer(body, dtype="<f4", offset=corr_len, count=n)
+
+def read_response(sock: socket.socket) -> BinaryReply:
+    magic, _ver, status, corr_len, p, lat, mid_len, fv_len, msg_len = RESP_HEADER.unpack(
+        _recv_exact(sock, RESP_HEADER.size))
+    if magic != MAGIC:
+        raise FrameError(f"bad magic {magic!r}")
+    body = _recv_exact(sock, corr_len + mid_len + fv_len + msg_len)
+    a, b, c = corr_len, corr_len + mid_len, corr_len + mid_len + fv_len
+    return BinaryReply(body[:a].decode(), status, float(p), lat, body[a:b].decode(), body[b:c].decode(), body[c:].decode())
+
+# ---------- Server ----------
+# score_fn(correlation_id, raw float32 vector) -> (p_win, model_id, features_version);
+# raises ValueError for contract problems (-> status 1), anything else -> status 2.
+ScoreFn = Callable[[str, np.ndarray], Tuple[float, str, str]]
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self) -> None:
+        sock: socket.socket = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        score_fn: ScoreFn = self.server.score_fn  # type: ignore[attr-defined]
+        while True:
+            try:
+                corr, vec = read_request(sock)
+            except (ConnectionError, OSError):
+                return
+            except FrameError as e:
+                sock.sendall(encode_response(BinaryReply("", STATUS_BAD_REQUEST, 0.0, 0, "", "", str(e))))
+                return  # stream is out of sync; drop the connection
+            t0 = time.perf_counter_ns()
+            try:
+                p, model_id, fv = score_fn(corr, vec)
+                reply = BinaryReply(corr, STATUS_OK, p, 0, model_id, fv)
+            except ValueError as e:
+                reply = BinaryReply(corr, STATUS_BAD_REQUEST, 0.0, 0, "", "", str(e))
+            except Exception as e:
+                reply = BinaryReply(corr, STATUS_ERROR, 0.0, 0, "", "", f"Inference error: {e}")
+            reply.latency_us = (time.perf_counter_ns() - t0) // 1000
+            try:
+                sock.sendall(encode_response(reply))
+            except OSError:
+                return
+
+class BinaryInferenceServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str, port: int, score_fn: ScoreFn, reuse_port: bool = False):
+        self.allow_reuse_port = reuse_port   # several worker processes accept on one port (Linux/BSD)
+        super().__init__((host, port), _Handler)
+        self.score_fn = score_fn
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def port(self) -> int:
+        return self.server_address[1]
+
+    def start(self) -> "BinaryInferenceServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="infer-binary", daemon=True)
+        self._thread.start()
+        log.info("binary inference transport on %s:%d", *self.server_address[:2])
+        return self
+
+    def stop(self) -> None:
+        self.shutdown(); self.server_close()
+
+# ---------- Client ----------
+class BinaryInferenceClient:
+    """Persistent-connection client (tests, benchmarks, Python-side callers)."""
+    def __init__(self, host: str = "127.0.0.1", port: int = 8082, timeout: float = 5.0):
+        self.addr = (host, port); self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+
+    def _connect(self) -> socket.socket:
+        if self._sock is None:
+            s = socket.create_connection(self.addr, timeout=self.timeout)
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            self._sock = s
+        return self._sock
+
+    def predict(self, correlation_id: str, features) -> BinaryReply:
+        s = self._connect()
+        try:
+            s.sendall(encode_request(correlation_id, features))
+            return read_response(s)
+        except (OSError, ConnectionError):
+            self.close()
+            raise
+
+    def close(self) -> None:
+        if self._sock is not None:
+            try: self._sock.close()
+            finally: self._sock = None
+
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.close()
@@ -1,18 +1,173 @@
+# Broker quirks -> canonical symbols and a compiled per-symbol spec table.
+# - The mapping is compiled once into SpecTable: interned symbol ids + arrays of point, pip,
+#   digits, contract size, swap-method code (MT5 ENUM_SYMBOL_SWAP_MODE order) and profit currency.
+# - Pip size follows the EA's PipValue(): 10 points on 3/5-digit quotes, else 1 point. An explicit
+#   "pip_value" entry still wins; without digits, JPY-quoted symbols default to 3 digits, others to 5.
+# - Batch APIs take arrays (or a DataFrame) of symbols and convert points / price moves / PnL to pips
+#   and account currency with one gather per column instead of per-row dict lookups.
+# mapping keys (all optional): symbols {broker: canonical}, pip_value, contract_size, digits,
+#   swap_method, profit_currency ({canonical symbol: value}), account_currency.
+from __future__ import annotations
+import threading
+from dataclasses import dataclass
+from typing import Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+SWAP_METHODS = ("disabled", "points", "currency_symbol", "currency_margin", "currency_deposit",
+                "interest_current", "interest_open", "reopen_current", "reopen_bid")
+DEFAULT_CONTRACT = 100000.0
+
+def pip_size(digits, point=None):
+    """EA PipValue(): 10 * point on 3/5-digit symbols, else point (vectorized)."""
+    digits = np.asarray(digits)
+    point = 10.0 ** -digits.astype(np.float64) if point is None else np.asarray(point, dtype=np.float64)
+    return np.where((digits == 3) | (digits == 5), point * 10.0, point)
+
+def _default_digits(symbol: str) -> int:
+    return 3 if symbol[-3:] == "JPY" else 5
+
+@dataclass(frozen=True)
+class SpecTable:
+    symbols: Tuple[str, ...]
+    ids: Dict[str, int]
+    point: np.ndarray       # float64
+    pip: np.ndarray         # float64
+    digits: np.ndarray      # int8
+    contract: np.ndarray    # float64
+    swap: np.ndarray        # int8 code into SWAP_METHODS
+    profit_ccy: Tuple[str, ...]
+
+    @staticmethod
+    def compile(mapping: Mapping, symbols: Sequence[str] = ()) -> "SpecTable":
+        names = list(dict.fromkeys([*symbols, *(mapping.get("symbols") or {}).values(),
+                                    *(s for k in ("pip_value", "contract_size", "digits", "swap_method",
+                                                  "profit_currency") for s in (mapping.get(k) or {}))]))
+        pipv, cs, dg = mapping.get("pip_value") or {}, mapping.get("contract_size") or {}, mapping.get("digits") or {}
+        sw, pc = mapping.get("swap_method") or {}, mapping.get("profit_currency") or {}
+        digits = np.array([int(dg.get(s, _default_digits(s))) for s in names], dtype=np.int8)
+        point = 10.0 ** -digits.astype(np.float64)
+        pip = pip_size(digits, point)
+        for i, s in enumerate(names):
+            if s in pipv: pip[i] = float(pipv[s])
+        for s, m in sw.items():
+            if m not in SWAP_METHODS: raise ValueError(f"unknown swap_method {m!r} for {s}; expected one of {SWAP_METHODS}")
+        return SpecTable(tuple(names), {s: i for i, s in enumerate(names)}, point, pip, digits,
+                         np.array([float(cs.get(s, DEFAULT_CONTRACT)) for s in names]),
+                         np.array([SWAP_METHODS.index(sw.get(s, "points")) for s in names], dtype=np.int8),
+                         tuple(str(pc.get(s, s[-3:])) for s in names))
+
 class BrokerAdapter:
     """
     Maps broker-specific quirks to canonical forms (symbols, pip size, contract size, swaps).
     """
-    def __init__(self, mapping: dict):
+    def __init__(self, mapping: dict, symbols: Sequence[str] = ()):
         self.map = mapping
+        self.aliases: Dict[str, str] = dict(mapping.get("symbols") or {})
+        self.account_currency = str(mapping.get("account_currency", "USD"))
+        self.specs = SpecTable.compile(mapping, symbols)
+        self._lock = threading.Lock()
 
+    @classmethod
+    def from_mt5(cls, mt5, symbols: Sequence[str], mapping: Optional[dict] = None) -> "BrokerAdapter":
+        """Fill digits / contract size / swap mode / profit currency from mt5.symbol_info (mapping overrides)."""
+        m = {k: dict(v) if isinstance(v, dict) else v for k, v in (mapping or {}).items()}
+        for s in symbols:
+            info = mt5.symbol_info(s)
+            if info is None: continue
+            c = m.get("symbols", {}).get(s, s)
+            m.setdefault("digits", {}).setdefault(c, int(info.digits))
+            m.setdefault("contract_size", {}).setdefault(c, float(info.trade_contract_size))
+            m.setdefault("swap_method", {}).setdefault(c, SWAP_METHODS[int(info.swap_mode)])
+            m.setdefault("profit_currency", {}).setdefault(c, info.currency_profit)
+        return cls(m, [m.get("symbols", {}).get(s, s) for s in symbols])
+
+    # ---------- scalar (unchanged API) ----------
     def normalize_symbol(self, broker_symbol: str) -> str:
-        return self.map.get("symbols", {}).get(broker_symbol, broker_symbol)
+        return self.aliases.get(broker_symbol, broker_symbol)
+
+    def symbol_id(self, symbol: str) -> int:
+        s = self.normalize_symbol(symbol)
+        i = self.specs.ids.get(s)
+        if i is None:   # first sight of an unmapped symbol: append it with defaults
+            with self._lock:
+                if s not in self.specs.ids:
+                    self.specs = SpecTable.compile(self.map, (*self.specs.symbols, s))
+                i = self.specs.ids[s]
+        return i
 
+    # (id first: resolving an unmapped symbol replaces self.specs)
     def pip_value(self, symbol: str) -> float:
-        return self.map.get("pip_value", {}).get(symbol, 0.0001)
+        i = self.symbol_id(symbol); return float(self.specs.pip[i])
 
     def contract_size(self, symbol: str) -> float:
-        return self.map.get("contract_size", {}).get(symbol, 100000.0)
+        i = self.symbol_id(symbol); return float(self.specs.contract[i])
 
     def swap_method(self, symbol: str) -> str:
-        return self.map.get("swap_method", {}).get(symbol, "points")
\ No newline at end of file
+        i = self.symbol_id(symbol); return SWAP_METHODS[self.specs.swap[i]]
+
+    # ---------- batch ----------
+    def symbol_ids(self, symbols) -> np.ndarray:
+        """int32 spec ids for an array of (broker or canonical) symbols; one lookup per distinct name."""
+        codes, uniq = pd.factorize(pd.Series(symbols, dtype=object), sort=False)
+        if (codes < 0).any(): raise ValueError("missing symbol in batch")
+        return np.array([self.symbol_id(str(s)) for s in uniq], dtype=np.int32)[codes]
+
+    def _ids(self, symbols_or_ids) -> np.ndarray:
+        a = np.asarray(symbols_or_ids)
+        return a.astype(np.int32) if a.dtype.kind in "iu" else self.symbol_ids(a)
+
+    def points_to_pips(self, points, symbols) -> np.ndarray:
+        i = self._ids(symbols)
+        return np.asarray(points, dtype=np.float64) * self.specs.point[i] / self.specs.pip[i]
+
+    def price_to_pips(self, price_diff, symbols) -> np.ndarray:
+        i = self._ids(symbols)
+        return np.asarray(price_diff, dtype=np.float64) / self.specs.pip[i]
+
+    def quote_rates(self, rates: Optional[Mapping[str, float]]) -> np.ndarray:
+        """Per-spec-id factor from profit currency to account currency (NaN when unknown)."""
+        rates = {**(rates or {}), self.account_currency: 1.0}
+        return np.array([float(rates.get(c, np.nan)) for c in self.specs.profit_ccy])
+
+    def pnl_account(self, price_diff, lots, symbols, rates: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """price move * lots * contract size, converted from the profit currency to the account currency."""
+        i = self._ids(symbols)
+        return (np.asarray(price_diff, dtype=np.float64) * np.asarray(lots, dtype=np.float64)
+                * self.specs.contract[i] * self.quote_rates(rates)[i])
+
+    def pip_value_account(self, lots, symbols, rates: Optional[Mapping[str, float]] = None) -> np.ndarray:
+        """Account-currency value of one pip for `lots`."""
+        i = self._ids(symbols)
+        return self.specs.pip[i] * np.asarray(lots, dtype=np.float64) * self.specs.contract[i] * self.quote_rates(rates)[i]
+
+    def annotate(self, df: pd.DataFrame, rates: Optional[Mapping[str, float]] = None,
+                 symbol_col: str = "symbol") -> pd.DataFrame:
+        """
+        Adds what the columns allow (trades, orders or ticks):
+          spread (points)                        -> spread_pips
+          bid, ask                               -> spread_pips
+          intended_price, fill_price, order_type -> slippage_pips (> 0 = adverse)
+          price_open, price_close, volume, order_type -> pnl_pips, pnl_account
+        order_type: "BUY..."/"SELL..." or MT5 codes (even = buy side, odd = sell side).
+        """
+        out = df.copy()
+        i = self.symbol_ids(out[symbol_col].to_numpy())
+        out["sym_id"] = i
+        if "spread" in out: out["spread_pips"] = self.points_to_pips(out["spread"].to_numpy(), i)
+        elif {"bid", "ask"} <= set(out): out["spread_pips"] = self.price_to_pips((out["ask"] - out["bid"]).to_numpy(), i)
+        side = _side(out["order_type"]) if "order_type" in out else None
+        if side is not None and {"intended_price", "fill_price"} <= set(out):
+            out["slippage_pips"] = self.price_to_pips((out["fill_price"] - out["intended_price"]).to_numpy() * side, i)
+        if side is not None and {"price_open", "price_close"} <= set(out):
+            move = (out["price_close"] - out["price_open"]).to_numpy() * side
+            out["pnl_pips"] = self.price_to_pips(move, i)
+            if "volume" in out: out["pnl_account"] = self.pnl_account(move, out["volume"].to_numpy(), i, rates)
+        return out
+
+def _side(order_type: pd.Series) -> np.ndarray:
+    if pd.api.types.is_numeric_dtype(order_type):
+        return np.where(order_type.to_numpy() % 2 == 0, 1.0, -1.0)   # ORDER_TYPE_BUY*=even, SELL*=odd
+    u = order_type.astype(str).str.upper()
+    return np.where(u.str.startswith("BUY"), 1.0, np.where(u.str.startswith("SELL"), -1.0, np.nan))
@@ -0,0 +1,58 @@
+# Deadline-bounded concurrent fetches with last-good values and per-key latency.
+# - run() submits one job per key to a shared pool and waits until the deadline only;
+#   late or failing keys keep their last good value (None if never fetched).
+# - A key whose previous fetch is still running is not resubmitted (no pile-up behind
+#   a hung symbol); its latency is recorded whenever it eventually returns.
+from __future__ import annotations
+import threading, time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+@dataclass
+class FetchStats:
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+    ok: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    last_error: str = ""
+
+class ConcurrentFetcher:
+    def __init__(self, pool: ThreadPoolExecutor):
+        self.pool = pool
+        self.last_good: Dict[str, Any] = {}
+        self.stats: Dict[str, FetchStats] = {}
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def _timed(self, key: str, fn: Callable[[], Any]) -> Any:
+        t0 = time.perf_counter()
+        try:
+            return fn()
+        finally:
+            ms = (time.perf_counter() - t0) * 1000.0
+            with self._lock:
+                st = self.stats.setdefault(key, FetchStats())
+                st.last_ms = ms; st.max_ms = max(st.max_ms, ms)
+
+    def run(self, jobs: Dict[str, Callable[[], Any]], deadline: float) -> Dict[str, Optional[Any]]:
+        """deadline is a time.monotonic() instant; returns fresh or last-good value per key."""
+        futs: Dict[str, Future] = {}
+        for key, fn in jobs.items():
+            prev = self._inflight.get(key)
+            if prev is not None and not prev.done():
+                st = self.stats.setdefault(key, FetchStats())
+                st.timed_out += 1; st.last_error = "previous fetch still running"
+                continue
+            futs[key] = self._inflight[key] = self.pool.submit(self._timed, key, fn)
+        wait(list(futs.values()), timeout=max(0.0, deadline - time.monotonic()))
+        for key, f in futs.items():
+            st = self.stats.setdefault(key, FetchStats())
+            if not f.done():
+                st.timed_out += 1; st.last_error = "timeout"
+            elif f.exception() is not None:
+                st.failed += 1; st.last_error = repr(f.exception())
+            else:
+                st.ok += 1; st.last_error = ""; self.last_good[key] = f.result()
+        return {k: self.last_good.get(k) for k in jobs}
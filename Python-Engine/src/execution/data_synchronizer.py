@@ -1,10 +1,18 @@
 # Production-ready synchronizer + feature-version publisher.
+# sync_status.json is published atomically through FilePublisher (and listed in Files/manifest.json).
+# Quote and feature delays also feed latency histograms (monitoring.latency, "sync_delay_us");
+# sync_status.json carries their distributions next to the last sample.
 from __future__ import annotations
-import json, hashlib
-from dataclasses import dataclass
+import hashlib
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
+
+from execution.file_publisher import publisher_for
+from monitoring.latency import LATENCY, LatencyRegistry
+
+DELAY_METRIC = "sync_delay_us"
 
 ROOT = Path(__file__).resolve().parents[2]
 FILES_DIR = ROOT / "MT5-Platform" / "MQL5" / "Files"
@@ -18,10 +26,15 @@ class SyncStatus:
     python_calc_delay_ms: int
     features_version: str
     last_heartbeat_utc: str
+    # {"broker_quote": {count, mean_us, max_us, p50_us, p90_us, p99_us, p999_us}, "python_calc": {...}}
+    delay_distributions: Dict[str, Dict[str, float]] = field(default_factory=dict)
 
 class DataSynchronizer:
-    def __init__(self, out_path: Path = FILES_DIR / "sync_status.json"):
+    def __init__(self, out_path: Path = FILES_DIR / "sync_status.json", latency: LatencyRegistry = LATENCY):
         self.out_path = out_path
+        self.latency = latency
+        self._quote_hist = latency.hist(DELAY_METRIC, stage="broker_quote")
+        self._calc_hist = latency.hist(DELAY_METRIC, stage="python_calc")
         self.mt5_time_offset_ms: Optional[int] = None
         self.broker_quote_delay_ms: Optional[int] = None
         self.python_calc_delay_ms: Optional[int] = None
@@ -46,11 +59,13 @@ class DataSynchronizer:
     def record_quote_delay(self, tick_utc_ms: int) -> int:
         delay = max(0, self.utcnow_ms() - tick_utc_ms)
         self.broker_quote_delay_ms = delay
+        self._quote_hist.record(delay * 1000)
         return delay
 
     def record_feature_latency(self, start_utc_ms: int) -> int:
         delay = max(0, self.utcnow_ms() - start_utc_ms)
         self.python_calc_delay_ms = delay
+        self._calc_hist.record(delay * 1000)
         return delay
 
     def write_status(self) -> None:
@@ -59,8 +74,7 @@ class DataSynchronizer:
             broker_quote_delay_ms=self.broker_quote_delay_ms or 0,
             python_calc_delay_ms=self.python_calc_delay_ms or 0,
             features_version=self.features_version,
-            last_heartbeat_utc=datetime.now(timezone.utc).isoformat()
+            last_heartbeat_utc=datetime.now(timezone.utc).isoformat(),
+            delay_distributions={"broker_quote": self._quote_hist.snapshot(), "python_calc": self._calc_hist.snapshot()}
         )
-        self.out_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(self.out_path, "w") as f:
-            json.dump(status.__dict__, f, separators=(",",":"))
\ No newline at end of file
+        publisher_for(self.out_path.parent).publish_json(self.out_path.name, status.__dict__, separators=(",",":"))
\ No newline at end of file
@@ -0,0 +1,137 @@
+# Atomic, change-only publishing of the MT5 Files/* artifacts.
+# - Content is written to a hidden temp file in the same directory and os.replace()d over
+#   the target, so the EA's FileOpen never sees a torn file.
+# - Identical content (sha256) is not rewritten; the manifest still records the check.
+# - Files/manifest.json: {"seq", "updated_utc", "files": {name: {seq, sha256, bytes,
+#   mtime_ns, published_utc, checked_utc, checked_epoch}}} -- health checks read freshness from here.
+# - Several processes publish into the same directory (snapshot agent, DataSynchronizer): each
+#   manifest update re-reads manifest.json under an exclusive lock on manifest.json.lock and
+#   merges its entry into it, so writers never drop each other's entries.
+from __future__ import annotations
+import contextlib, hashlib, json, os, tempfile, threading, time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:   # publish_df only calls df.to_csv(); importers such as the inference server skip pandas
+    import pandas as pd
+
+MANIFEST_NAME = "manifest.json"
+
+def _write_atomic(path: Path, data: bytes, retries: int = 5) -> None:
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        for i in range(retries):
+            try:
+                os.replace(tmp, path)  # atomic on POSIX; MoveFileEx(REPLACE_EXISTING) on Windows
+                return
+            except PermissionError:
+                # Windows: the EA may hold the target open for a moment
+                if i == retries - 1: raise
+                time.sleep(0.05 * (i + 1))
+    finally:
+        if os.path.exists(tmp): os.unlink(tmp)
+
+@contextlib.contextmanager
+def _locked(path: Path):
+    """Exclusive inter-process lock held on `path` (created if missing) for the with-block."""
+    with open(path, "a+b") as f:
+        if os.name == "nt":
+            import msvcrt
+            f.seek(0)
+            while True:
+                try: msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1); break   # LK_LOCK gives up after ~10 s
+                except OSError: pass
+            try: yield
+            finally: f.seek(0); msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try: yield
+            finally: fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+class FilePublisher:
+    def __init__(self, files_dir: Path, manifest_name: str = MANIFEST_NAME):
+        self.dir = Path(files_dir)
+        self.manifest_path = self.dir / manifest_name
+        self.lock_path = self.dir / f"{manifest_name}.lock"
+        self._lock = threading.Lock()
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self._manifest_key: Optional[tuple] = None   # (size, mtime_ns) of the manifest we last read/wrote
+        self._manifest: Dict[str, Any] = self._load_manifest()
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            st = self.manifest_path.stat()
+            m = json.loads(self.manifest_path.read_bytes())
+            self._manifest_key = (st.st_size, st.st_mtime_ns)
+            if isinstance(m.get("files"), dict): return m
+        except (FileNotFoundError, ValueError):
+            pass
+        return {"seq": 0, "updated_utc": None, "files": {}}
+
+    def _refresh_manifest(self) -> None:
+        # under the file lock: pick up entries other publishers wrote since our last write
+        try: st = self.manifest_path.stat()
+        except FileNotFoundError: st = None
+        if st is None or (st.st_size, st.st_mtime_ns) != self._manifest_key:
+            self._manifest = self._load_manifest()
+
+    def _current_hash(self, name: str) -> Optional[str]:
+        entry = self._manifest["files"].get(name)
+        p = self.dir / name
+        st = p.stat() if p.exists() else None
+        if entry is not None and st is not None and (st.st_size, st.st_mtime_ns) == (entry.get("bytes"), entry.get("mtime_ns")):
+            return entry.get("sha256")
+        if st is not None:  # not ours yet (or edited by hand): hash what is on disk
+            return hashlib.sha256(p.read_bytes()).hexdigest()
+        return None
+
+    def publish_bytes(self, name: str, data: bytes) -> bool:
+        """Returns True when the file content changed and was (atomically) rewritten."""
+        digest = hashlib.sha256(data).hexdigest()
+        now = datetime.now(timezone.utc)
+        with self._lock, _locked(self.lock_path):
+            self._refresh_manifest()
+            changed = digest != self._current_hash(name)
+            if changed:
+                _write_atomic(self.dir / name, data)
+            entry = self._manifest["files"].setdefault(name, {"seq": 0})
+            if changed or "sha256" not in entry:
+                entry.update(seq=entry["seq"] + 1, sha256=digest, bytes=len(data), published_utc=now.isoformat())
+            entry["mtime_ns"] = (self.dir / name).stat().st_mtime_ns
+            entry.update(checked_utc=now.isoformat(), checked_epoch=now.timestamp())
+            self._manifest["seq"] += 1
+            self._manifest["updated_utc"] = now.isoformat()
+            _write_atomic(self.manifest_path, json.dumps(self._manifest, separators=(",", ":"), sort_keys=True).encode())
+            st = self.manifest_path.stat(); self._manifest_key = (st.st_size, st.st_mtime_ns)
+        return changed
+
+    def publish_text(self, name: str, text: str) -> bool:
+        return self.publish_bytes(name, text.encode("utf-8"))
+
+    def publish_df(self, name: str, df: pd.DataFrame, **to_csv_kwargs) -> bool:
+        to_csv_kwargs.setdefault("index", False)
+        return self.publish_text(name, df.to_csv(**to_csv_kwargs))
+
+    def publish_json(self, name: str, obj: Any, **dumps_kwargs) -> bool:
+        return self.publish_text(name, json.dumps(obj, **dumps_kwargs))
+
+_PUBLISHERS: Dict[Path, FilePublisher] = {}
+_PUBLISHERS_LOCK = threading.Lock()
+
+def publisher_for(files_dir: Path) -> FilePublisher:
+    """One shared publisher (and manifest state) per directory within a process."""
+    key = Path(files_dir).resolve()
+    with _PUBLISHERS_LOCK:
+        if key not in _PUBLISHERS:
+            _PUBLISHERS[key] = FilePublisher(key)
+        return _PUBLISHERS[key]
+
+def read_manifest(files_dir: Path, manifest_name: str = MANIFEST_NAME) -> Dict[str, Any]:
+    try:
+        return json.loads((Path(files_dir) / manifest_name).read_text())
+    except (FileNotFoundError, ValueError):
+        return {"seq": 0, "updated_utc": None, "files": {}}
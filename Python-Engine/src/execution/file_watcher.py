@@ -0,0 +1,224 @@
+# Event-driven file watching with an in-memory freshness table.
+# - Linux: inotify via ctypes on each watched file's parent directory, so atomic temp+rename
+#   publishes (IN_MOVED_TO) are seen as well as in-place writes. No extra dependency.
+# - Elsewhere (the MT5 host is Windows), or when inotify is unavailable / out of watches:
+#   stat() polling every poll_s. Both back ends feed the same table and callbacks.
+# - Callbacks are registered per group of paths and fire once per burst, debounce_s after the
+#   last change in the group (a deploy touches several files). They run on the watcher thread.
+# - FileWatcher.state()/age() answer from the table: no syscalls on the health-check path.
+#   A full stat rescan still runs every rescan_s (inotify) to heal missed events / new dirs.
+from __future__ import annotations
+import ctypes, ctypes.util, logging, os, select, struct, sys, threading, time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+log = logging.getLogger("fxsuite.watch")
+
+# <sys/inotify.h>
+IN_MODIFY, IN_ATTRIB, IN_CLOSE_WRITE = 0x2, 0x4, 0x8
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW, IN_IGNORED = 0x400, 0x800, 0x4000, 0x8000
+IN_NONBLOCK, IN_CLOEXEC = 0o4000, 0o2000000
+DIR_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+            | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")   # wd, mask, cookie, len (+ name[len])
+
+@dataclass(frozen=True)
+class FileState:
+    exists: bool
+    size: int
+    mtime_ns: int
+    changed_epoch: float    # when the watcher saw this version (wall clock)
+
+    @property
+    def key(self) -> Tuple[int, int]:
+        return (self.size, self.mtime_ns)
+
+def _stat(p: str) -> FileState:
+    try:
+        st = os.stat(p)
+        return FileState(True, st.st_size, st.st_mtime_ns, time.time())
+    except OSError:
+        return FileState(False, 0, 0, time.time())
+
+class _Inotify:
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._add = libc.inotify_add_watch
+        self._add.argtypes, self._add.restype = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32], ctypes.c_int
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0: raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add(self, directory: str) -> int:
+        wd = self._add(self.fd, os.fsencode(directory), DIR_MASK)
+        if wd < 0: raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        return wd
+
+    def read(self) -> List[Tuple[int, int, str]]:
+        try: buf = os.read(self.fd, 64 * 1024)
+        except BlockingIOError: return []
+        out, i = [], 0
+        while i + _EVENT.size <= len(buf):
+            wd, mask, _, n = _EVENT.unpack_from(buf, i)
+            i += _EVENT.size
+            out.append((wd, mask, os.fsdecode(buf[i:i + n].rstrip(b"\0"))))
+            i += n
+        return out
+
+    def close(self) -> None:
+        os.close(self.fd)
+
+class FileWatcher:
+    def __init__(self, poll_s: float = 1.0, rescan_s: float = 30.0, backend: str = "auto"):
+        """backend: "auto" (inotify when available), "inotify" or "poll"."""
+        self.poll_s, self.rescan_s = poll_s, rescan_s
+        self._lock = threading.Lock()
+        self._table: Dict[str, FileState] = {}
+        self._groups: List[Tuple[Tuple[str, ...], Callable[[], None], float]] = []
+        self._due: Dict[int, float] = {}          # group index -> monotonic fire time
+        self._dirs: Dict[str, int] = {}           # watched dir -> wd
+        self._by_wd: Dict[int, str] = {}
+        self._dir_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._wake_r, self._wake_w = os.pipe()
+        self.events = 0
+        self._ino: Optional[_Inotify] = None
+        if backend != "poll" and sys.platform.startswith("linux"):
+            try: self._ino = _Inotify()
+            except (OSError, AttributeError) as e:
+                if backend == "inotify": raise
+                log.warning("inotify unavailable (%s); polling every %.1fs", e, poll_s)
+        elif backend == "inotify":
+            raise OSError("inotify is Linux-only")
+
+    @property
+    def backend(self) -> str:
+        return "inotify" if self._ino is not None else "poll"
+
+    # ---------- registration ----------
+    def watch(self, paths: Iterable, callback: Optional[Callable[[], None]] = None, debounce_s: float = 0.0) -> None:
+        """Track `paths` in the freshness table; call `callback()` debounce_s after a burst of changes."""
+        ps = tuple(os.path.abspath(os.fspath(p)) for p in paths)
+        with self._lock:
+            for p in ps:
+                self._table.setdefault(p, _stat(p))
+            if callback is not None: self._groups.append((ps, callback, debounce_s))
+        for p in ps: self._watch_dir(os.path.dirname(p))
+
+    def notify(self, paths: Iterable) -> None:
+        """Schedule the callbacks watching `paths` as if they had changed (e.g. drift before start())."""
+        self._mark({os.path.abspath(os.fspath(p)) for p in paths})
+
+    def _watch_dir(self, d: str) -> None:
+        # called from watch() (any thread) and the watcher thread's rescan: _dirs/_by_wd under _dir_lock
+        with self._dir_lock:
+            ino = self._ino
+            if ino is None or d in self._dirs or not os.path.isdir(d): return
+            try: wd = ino.add(d)
+            except OSError as e:   # ENOSPC (max_user_watches) etc.: the rescan still covers the file
+                log.warning("cannot watch %s: %s", d, e); return
+            self._dirs[d], self._by_wd[wd] = wd, d
+
+    def _unwatch_dir(self, wd: int, d: str) -> None:
+        with self._dir_lock:
+            self._by_wd.pop(wd, None)
+            if self._dirs.get(d) == wd: del self._dirs[d]   # not if watch() already re-added it
+
+    # ---------- freshness table ----------
+    def state(self, path) -> Optional[FileState]:
+        return self._table.get(os.path.abspath(os.fspath(path)))
+
+    def age(self, path, now: Optional[float] = None) -> float:
+        """Seconds since the file's mtime, from the table (inf if missing or not watched)."""
+        s = self.state(path)
+        if s is None or not s.exists: return float("inf")
+        return (time.time() if now is None else now) - s.mtime_ns / 1e9
+
+    def snapshot(self) -> Dict[str, FileState]:
+        return dict(self._table)
+
+    # ---------- change handling ----------
+    def _refresh(self, paths: Iterable[str]) -> Set[str]:
+        changed = set()
+        for p in paths:
+            new, old = _stat(p), self._table.get(p)
+            if old is None or (new.exists, new.key) != (old.exists, old.key):
+                self._table[p] = new; changed.add(p)
+        return changed
+
+    def _mark(self, changed: Set[str]) -> None:
+        if not changed: return
+        now = time.monotonic()
+        with self._lock:
+            for gi, (ps, _, deb) in enumerate(self._groups):
+                if changed.intersection(ps): self._due[gi] = now + deb
+
+    def _fire_due(self) -> Optional[float]:
+        now = time.monotonic()
+        with self._lock:
+            ready = [gi for gi, t in self._due.items() if t <= now]
+            for gi in ready: del self._due[gi]
+            nxt = min(self._due.values(), default=None)
+            cbs = [self._groups[gi][1] for gi in ready]
+        for cb in cbs:
+            try: cb()
+            except Exception:
+                log.exception("watch callback %s failed", getattr(cb, "__name__", cb))
+        return None if nxt is None else max(0.0, nxt - time.monotonic())
+
+    def rescan(self) -> Set[str]:
+        """stat() every watched path (polling tick / inotify safety net); returns the changed ones."""
+        with self._lock: paths = list(self._table)
+        for p in paths: self._watch_dir(os.path.dirname(p))
+        changed = self._refresh(paths)
+        self._mark(changed)
+        return changed
+
+    def _on_events(self, evs: List[Tuple[int, int, str]]) -> None:
+        self.events += len(evs)
+        with self._lock: paths = list(self._table)
+        hit: Set[str] = set()
+        for wd, mask, name in evs:
+            if mask & IN_Q_OVERFLOW:
+                hit.update(paths); continue
+            with self._dir_lock: d = self._by_wd.get(wd)
+            if d is None: continue
+            if mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):   # dir gone: re-added on the next rescan
+                self._unwatch_dir(wd, d)
+                hit.update(p for p in paths if os.path.dirname(p) == d); continue
+            hit.add(os.path.join(d, name))
+        self._mark(self._refresh(p for p in hit if p in self._table))
+
+    # ---------- thread ----------
+    def start(self) -> "FileWatcher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"file-watcher-{self.backend}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self._stop.is_set(): return
+        self._stop.set(); os.write(self._wake_w, b"x")
+        if self._thread is not None: self._thread.join(timeout)
+        self._thread = None
+        with self._dir_lock:
+            if self._ino is not None: self._ino.close(); self._ino = None
+        for fd in (self._wake_r, self._wake_w): os.close(fd)
+
+    def _run(self) -> None:
+        next_scan = time.monotonic() + (self.rescan_s if self._ino is not None else self.poll_s)
+        while not self._stop.is_set():
+            wait = self._fire_due()
+            timeout = max(0.0, next_scan - time.monotonic())
+            if wait is not None: timeout = min(timeout, wait)
+            if self._ino is None:       # select() on pipes is POSIX-only
+                if self._stop.wait(timeout): break
+            else:
+                try: ready, _, _ = select.select([self._wake_r, self._ino.fd], [], [], timeout)
+                except (OSError, ValueError): break     # closed under us on stop()
+                if self._stop.is_set(): break
+                if self._ino.fd in ready: self._on_events(self._ino.read())
+            if time.monotonic() >= next_scan:
+                self.rescan()
+                next_scan = time.monotonic() + (self.rescan_s if self._ino is not None else self.poll_s)
@@ -1,35 +1,71 @@
 # Production-ready REST inference microservice (FastAPI) for MT5 WebRequest.
-# - Loads ONNX (onnxruntime) model, features.yaml, scaler.json.
+# - Loads ONNX (onnxruntime) model, features.yaml, scaler.json as one immutable ModelBundle.
 # - Validates feature contract & versions.
 # - Accepts either ordered vector or feature_map; returns calibrated p_win.
-# - Health & version endpoints for monitoring.
+# - /infer/batch scores up to INFER_BATCH_REQUEST_MAX requests in one ORT run (413 above); concurrent
+#   single /infer calls are coalesced by MicroBatcher when INFER_BATCH_WINDOW_MS is set (e.g. 2.0; default 0 = off,
+#   INFER_BATCH_MAX caps a coalesced batch).
+# - Hot reload without restart: file watcher (INFER_WATCH_SEC, 0 = off) or POST /admin/reload;
+#   POST /admin/rollback restores the previous scaler.json/model_id.txt/meta_labeler.onnx and reloads
+#   (409 when the model on disk is not the one the last ScalerVersionManager update deployed).
+# - Binary float32 transport on a persistent TCP socket when INFER_BIN_PORT is set (e.g. 8082; default 0 = off),
+#   see binary_transport.py.
+# - Predictions are logged off the hot path to the schema.sql tables when PRED_LOG_URL is set
+#   (sqlite:///... or postgresql://...), see prediction_logger.py, and appended (raw features +
+#   p_win) to the columnar feature store when FEATURE_STORE_DIR is set, see data/feature_store.py.
+#   symbol/open_time come from the request or from the EA correlation id "<SYMBOL>-<bar time>".
+# - create_app() builds the FastAPI app; importing this module only reads env config (`app` is
+#   built on first access, e.g. by uvicorn). The micro-batcher thread, prediction logger and
+#   feature store writer are started in the lifespan and closed with it. The bundle
+#   loads on the startup event (or first use), the compiled feature contract is cached per
+#   features_version (INFER_CACHE_DIR/contracts) and ORT session options come from
+#   INFER_ORT_INTRA_THREADS / INFER_ORT_INTER_THREADS / INFER_ORT_OPT_LEVEL, with the optimized
+#   graph serialized to INFER_ORT_CACHE_DIR (default INFER_CACHE_DIR/ort, "" = off).
+# - Multi-worker mode: run worker_pool.py instead. Each worker imports this module with INFER_SHARED_DIR
+#   set and serves the runner's shared model version (SharedBundleClient) instead of loading its own;
+#   INFER_WORKER_INDEX splits the feature store / prediction spill per worker and shows in /version.
+# - Health & version endpoints for monitoring; GET /metrics exports per-stage latency histograms
+#   (parse, build, scale, ort, serialize, total; microseconds) in Prometheus text format.
 # Requirements: fastapi, uvicorn, onnxruntime, pydantic, numpy, pyyaml
 
 from __future__ import annotations
-import os, time, json, hashlib
+import os, sys, time
+from contextlib import asynccontextmanager
 from typing import List, Optional, Dict, Any
 from pathlib import Path
 
 import numpy as np
-import onnxruntime as ort
-import yaml
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
 from pydantic import BaseModel, Field
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 
-# ---------- Config ----------
-ROOT = Path(__file__).resolve().parents[2]
-FILES_DIR = ROOT / "MT5-Platform" / "MQL5" / "Files"
-MODELS_DIR = FILES_DIR / "ML_Models"
-CONFIGS_DIR = ROOT / "configs"
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:  # allow `python src/execution/inference_server.py`
+    sys.path.insert(0, str(SRC_DIR))
+from data.feature_store import FeatureStore, FeatureStoreWriter, parse_correlation_id
+from execution.binary_transport import BinaryInferenceServer
+from execution.micro_batcher import MicroBatcher
+from execution.model_bundle import BundleManager, ModelBundle
+from execution.prediction_logger import PredictionLogger, open_logger
+from execution.server_config import ServerConfig
+from execution.worker_pool import SharedBundleClient
+from ml_pipeline.scaler_plan import ScalerPlan
+from ml_pipeline.scaler_versioning import ScalerVersionManager
+from monitoring.latency import LATENCY
 
-FEATURES_YAML = CONFIGS_DIR / "features.yaml"
-SCALER_JSON = CONFIGS_DIR / "scaler.json"
-MODEL_ONNX = MODELS_DIR / "meta_labeler.onnx"
-MODEL_ID_FILE = MODELS_DIR / "model_id.txt"
+# ---------- Config ----------
+CFG = ServerConfig.from_env()   # variables: see server_config.py
+MODELS_DIR, CONFIGS_DIR = CFG.models_dir, CFG.configs_dir
+BUNDLE_PATHS = CFG.paths
+FEATURES_YAML, SCALER_JSON = BUNDLE_PATHS.features_yaml, BUNDLE_PATHS.scaler_json
+MODEL_ONNX, MODEL_ID_FILE = BUNDLE_PATHS.model_onnx, BUNDLE_PATHS.model_id_file
 
-API_PORT = int(os.getenv("INFER_PORT", "8081"))
-API_HOST = os.getenv("INFER_HOST", "127.0.0.1")
+API_PORT, API_HOST, BIN_PORT = CFG.api_port, CFG.api_host, CFG.bin_port
+BATCH_WINDOW_MS, BATCH_MAX, WATCH_SEC = CFG.batch_window_ms, CFG.batch_max, CFG.watch_sec
+BATCH_REQUEST_MAX = CFG.batch_request_max
+PRED_LOG_URL, PRED_LOG_SPILL, FEATURE_STORE_DIR = CFG.pred_log_url, CFG.pred_log_spill, CFG.feature_store_dir
+CACHE_DIR, SESSION_CFG = CFG.cache_dir, CFG.session
+SHARED_DIR, WORKER_INDEX = CFG.shared_dir, CFG.worker_index   # WORKER_INDEX -1 = single-process server
 
 # ---------- IO Schemas ----------
 class InferRequest(BaseModel):
@@ -37,6 +73,10 @@ class InferRequest(BaseModel):
     # Either provide ordered features (list) OR feature_map (dict)
     features: Optional[List[float]] = None
     feature_map: Optional[Dict[str, float]] = None
+    # optional context, only used for the predictions log / feature store
+    symbol: Optional[str] = None
+    tf: Optional[str] = None
+    open_time: Optional[str] = None
 
 class InferResponse(BaseModel):
     correlation_id: str
@@ -46,111 +86,262 @@ class InferResponse(BaseModel):
     features_version: str
     latency_ms: int
 
-# ---------- Utilities ----------
-def _hash_files(*paths: Path) -> str:
-    h = hashlib.sha256()
-    for p in paths:
-        h.update(p.read_bytes())
-    return h.hexdigest()[:16]
-
-def _load_features_spec() -> Dict[str, Any]:
-    with open(FEATURES_YAML, "r") as f:
-        spec = yaml.safe_load(f)
-    if "meta_features" not in spec:
-        raise RuntimeError("features.yaml missing 'meta_features'")
-    return spec
-
-def _load_scaler() -> Dict[str, Any]:
-    with open(SCALER_JSON, "r") as f:
-        return json.load(f)
-
-def _build_order(spec: Dict[str, Any]) -> List[str]:
-    return [x["name"] for x in spec["meta_features"]]
-
-def _is_categorical(feat: str, scaler_cfg: Dict[str, Any]) -> bool:
-    meta = scaler_cfg["features"].get(feat, {})
-    return str(meta.get("type", "")).lower() == "category"
+class InferBatchRequest(BaseModel):
+    requests: List[InferRequest]
+
+class InferBatchResponse(BaseModel):
+    ok: bool
+    results: List[InferResponse]
+    latency_ms: int
 
+# ---------- Latency ----------
+STAGE_METRIC = "infer_stage_latency_us"
+_T0 = "fx.t0_ns"  # ASGI scope key stamped by _RequestTimer on arrival
+_STAGES = {(path, st): LATENCY.hist(STAGE_METRIC, path=path, stage=st)
+           for path, stages in (("/infer", ("parse", "build", "scale", "ort", "serialize", "total")),
+                                ("/infer/batch", ("parse", "build", "scale", "ort", "serialize", "total")),
+                                ("bin", ("scale", "ort", "total")))
+           for st in stages}
+
+def _rec(path: str, stage: str, t0_ns: int) -> int:
+    """Record now - t0 under (path, stage); returns now for chaining."""
+    now = time.perf_counter_ns()
+    _STAGES[(path, stage)].record((now - t0_ns) // 1000)
+    return now
+
+class _RequestTimer:
+    """
+    Plain ASGI middleware: stamps arrival time in the scope (parse = arrival -> handler entry,
+    covering body read, validation and threadpool dispatch) and records total time once the
+    last response body chunk has been handed to the server.
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path") if scope["type"] == "http" else None
+        if path not in ("/infer", "/infer/batch"):
+            return await self.app(scope, receive, send)
+        t0 = scope[_T0] = time.perf_counter_ns()
+
+        async def timed_send(message):
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                _rec(path, "total", t0)
+        await self.app(scope, receive, timed_send)
+
+# ---------- Utilities ----------
 def _scale_vector(vec: np.ndarray, order: List[str], scaler_cfg: Dict[str, Any]) -> np.ndarray:
-    out = vec.astype(np.float32).copy()
-    for i, feat in enumerate(order):
-        meta = scaler_cfg["features"].get(feat, None)
-        if not meta:  # unseen: leave as is
-            continue
-        if _is_categorical(feat, scaler_cfg):
-            continue
-        mean = float(meta.get("mean", 0.0))
-        std = float(meta.get("std", 1.0)) or 1.0
-        out[i] = (out[i] - mean) / std
-    return out
+    # one-off helper for tools; the hot path reuses the bundle's compiled ScalerPlan
+    return ScalerPlan.compile(order, scaler_cfg).scale(vec)
 
-# ---------- Bootstrap ----------
-FEATURES_SPEC = _load_features_spec()
-SCALER_CFG = _load_scaler()
-FEATURE_ORDER = _build_order(FEATURES_SPEC)
-FEATURES_VERSION = _hash_files(FEATURES_YAML, SCALER_JSON)
+def _build_vector(req: InferRequest, b: ModelBundle) -> np.ndarray:
+    if req.features is not None:
+        vec = np.asarray(req.features, dtype=np.float32)
+        if vec.shape[0] != b.n_features:
+            raise HTTPException(400, f"Feature length {vec.shape[0]} != expected {b.n_features}")
+    elif req.feature_map is not None:
+        try:
+            vec = b.plan.vector_from_map(req.feature_map)
+        except KeyError as e:
+            raise HTTPException(400, f"Missing feature '{e.args[0]}' in feature_map")
+    else:
+        raise HTTPException(400, "Provide either 'features' (ordered list) or 'feature_map' (dict).")
+    return vec
 
-MODEL_ID = MODEL_ONNX.stem
-if MODEL_ID_FILE.exists():
-    MODEL_ID = MODEL_ID_FILE.read_text().strip() or MODEL_ID
+def _score(b: ModelBundle, vec: np.ndarray, path: str = "/infer") -> float:
+    # shared by /infer and the binary transport: scale + (coalesced) model run
+    t = time.perf_counter_ns()
+    vec_scaled = b.plan.scale(vec)
+    t = _rec(path, "scale", t)
+    # ort includes the coalescing wait when the batcher is on
+    if BATCHER is not None:
+        p = BATCHER.score(vec_scaled, key=b)
+    else:
+        p = float(b.predict(vec_scaled.reshape(1, -1))[0])
+    _rec(path, "ort", t)
+    return p
+
+def _log_prediction(b: ModelBundle, correlation_id: str, vec: np.ndarray, p_win: float,
+                    req: Optional[InferRequest] = None) -> None:
+    if PRED_LOG is not None:
+        PRED_LOG.log_prediction(correlation_id, p_win, b.model_id, features=vec, features_hash=b.features_version,
+                                symbol=req.symbol if req else None, tf=req.tf if req else None,
+                                open_time=req.open_time if req else None)
+    if FEATURE_LOG is not None:
+        symbol, open_time = (req.symbol, req.open_time) if req else (None, None)
+        if symbol is None or open_time is None:
+            c_sym, c_time = parse_correlation_id(correlation_id)
+            symbol = symbol or c_sym; open_time = open_time or c_time
+        FEATURE_LOG.add(b.features_version, b.feature_order, symbol, open_time, vec, {"p_win": p_win})
 
-ORT_SESS = ort.InferenceSession(MODEL_ONNX.as_posix(), providers=["CPUExecutionProvider"])
-ORT_INPUT = ORT_SESS.get_inputs()[0].name
-ORT_OUTPUT = ORT_SESS.get_outputs()[0].name
+def _score_binary(correlation_id: str, vec: np.ndarray):
+    t0 = time.perf_counter_ns()
+    b = BUNDLES.current
+    if vec.shape[0] != b.n_features:
+        raise ValueError(f"Feature length {vec.shape[0]} != expected {b.n_features}")
+    p_win = _score(b, vec, "bin")
+    _log_prediction(b, correlation_id, vec, p_win)
+    _rec("bin", "total", t0)
+    return p_win, b.model_id, b.features_version
+
+# ---------- Bootstrap ----------
+# lazy: nothing is read until the startup event or the first BUNDLES.current
+if SHARED_DIR:
+    BUNDLES = SharedBundleClient(Path(SHARED_DIR), max_batch=BATCH_MAX, session=SESSION_CFG)
+else:
+    BUNDLES = BundleManager(BUNDLE_PATHS, max_batch=BATCH_MAX, lazy=True, session=SESSION_CFG,
+                            contract_cache_dir=CACHE_DIR / "contracts")
 
-app = FastAPI(title="FXSuite Inference Service", version="1.0.0")
+# started by the lifespan (None outside it: unbatched scoring, no logging)
+BATCHER: Optional[MicroBatcher] = None
+PRED_LOG: Optional[PredictionLogger] = None
+FEATURE_LOG: Optional[FeatureStoreWriter] = None
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    global BATCHER, PRED_LOG, FEATURE_LOG
+    BUNDLES.ensure_loaded()  # warm before accepting traffic
+    if BATCH_WINDOW_MS > 0:
+        BATCHER = MicroBatcher(lambda X, b: b.predict(X), window_s=BATCH_WINDOW_MS / 1000.0, max_batch=BATCH_MAX)
+    if PRED_LOG_URL: PRED_LOG = open_logger(PRED_LOG_URL, PRED_LOG_SPILL)
+    if FEATURE_STORE_DIR: FEATURE_LOG = FeatureStoreWriter(FeatureStore(FEATURE_STORE_DIR))
+    BUNDLES.start_watcher(WATCH_SEC)
+    srv = None
+    if BIN_PORT > 0: srv = BinaryInferenceServer(API_HOST, BIN_PORT, _score_binary, reuse_port=WORKER_INDEX >= 0).start()
+    try:
+        yield
+    finally:
+        if srv is not None: srv.stop()
+        BUNDLES.stop_watcher()
+        batcher, pred_log, feature_log = BATCHER, PRED_LOG, FEATURE_LOG
+        BATCHER = PRED_LOG = FEATURE_LOG = None
+        if batcher is not None: batcher.close()
+        if pred_log is not None: pred_log.close()
+        if feature_log is not None: feature_log.close()
 
 # ---------- Endpoints ----------
-@app.get("/health")
 def health() -> Dict[str, Any]:
-    return {"status": "ok", "model_id": MODEL_ID, "features_version": FEATURES_VERSION}
+    b = BUNDLES.current
+    return {"status": "ok", "model_id": b.model_id, "features_version": b.features_version}
 
-@app.get("/version")
 def version() -> Dict[str, Any]:
-    return {"model_id": MODEL_ID, "features_version": FEATURES_VERSION, "n_features": len(FEATURE_ORDER)}
+    b = BUNDLES.current
+    return {"model_id": b.model_id, "features_version": b.features_version, "n_features": b.n_features,
+            "loaded_utc": b.loaded_utc, "last_reload_error": BUNDLES.last_error,
+            "prediction_log": PRED_LOG.stats() if PRED_LOG is not None else None,
+            "feature_store": FEATURE_LOG.stats() if FEATURE_LOG is not None else None,
+            "worker": {"index": WORKER_INDEX, "pid": os.getpid(), "seq": BUNDLES.version.seq} if SHARED_DIR else None}
+
+def metrics() -> PlainTextResponse:
+    lines = [LATENCY.render_prometheus()]
+    if BATCHER is not None:
+        lines.append(f"# TYPE infer_batches_total counter\ninfer_batches_total {BATCHER.batches_run}\n"
+                     f"# TYPE infer_batched_rows_total counter\ninfer_batched_rows_total {BATCHER.rows_run}\n")
+    if PRED_LOG is not None:
+        st = PRED_LOG.stats()
+        for k in ("enqueued", "dropped", "written", "spilled"):
+            lines.append(f"# TYPE prediction_log_{k}_total counter\nprediction_log_{k}_total {st[k]}\n")
+    if FEATURE_LOG is not None:
+        st = FEATURE_LOG.stats()
+        for k in ("enqueued", "dropped", "written", "skipped", "errors"):
+            lines.append(f"# TYPE feature_store_{k}_total counter\nfeature_store_{k}_total {st[k]}\n")
+    return PlainTextResponse("".join(lines), media_type="text/plain; version=0.0.4")
 
-@app.post("/infer", response_model=InferResponse)
-def infer(req: InferRequest) -> JSONResponse:
+def infer(req: InferRequest, request: Request) -> JSONResponse:
     t0 = time.perf_counter_ns()
+    _rec("/infer", "parse", request.scope.get(_T0, t0))
+    b = BUNDLES.current  # pinned for the whole request
 
-    # build feature vector
-    if req.features is not None:
-        vec = np.asarray(req.features, dtype=np.float32)
-        if vec.shape[0] != len(FEATURE_ORDER):
-            raise HTTPException(400, f"Feature length {vec.shape[0]} != expected {len(FEATURE_ORDER)}")
-    elif req.feature_map is not None:
-        vec = np.zeros(len(FEATURE_ORDER), dtype=np.float32)
-        for i, name in enumerate(FEATURE_ORDER):
-            if name not in req.feature_map:
-                raise HTTPException(400, f"Missing feature '{name}' in feature_map")
-            vec[i] = float(req.feature_map[name])
-    else:
-        raise HTTPException(400, "Provide either 'features' (ordered list) or 'feature_map' (dict).")
+    vec = _build_vector(req, b)
+    _rec("/infer", "build", t0)
+
+    # scale + run model (coalesced with concurrent callers when the batcher is on)
+    try:
+        p_win = _score(b, vec)
+    except Exception as e:
+        raise HTTPException(500, f"Inference error: {e}")
+    _log_prediction(b, req.correlation_id, vec, p_win, req)
+
+    t = time.perf_counter_ns()
+    dt_ms = int((t - t0) / 1_000_000)
+    # InferResponse fields as a plain dict: no model instance per response
+    payload = {"correlation_id": req.correlation_id, "ok": True, "p_win": p_win, "model_id": b.model_id,
+               "features_version": b.features_version, "latency_ms": dt_ms}
+    resp = JSONResponse(payload, status_code=200)  # renders the body here
+    _rec("/infer", "serialize", t)
+    return resp
+
+def infer_batch(req: InferBatchRequest, request: Request) -> JSONResponse:
+    t0 = time.perf_counter_ns()
+    _rec("/infer/batch", "parse", request.scope.get(_T0, t0))
+    b = BUNDLES.current
+    if not req.requests:
+        raise HTTPException(400, "Empty batch")
+    if len(req.requests) > BATCH_REQUEST_MAX:
+        raise HTTPException(413, f"Batch of {len(req.requests)} requests exceeds INFER_BATCH_REQUEST_MAX={BATCH_REQUEST_MAX}")
 
-    # scale numeric features
-    vec_scaled = _scale_vector(vec, FEATURE_ORDER, SCALER_CFG)
+    X = np.stack([_build_vector(r, b) for r in req.requests])
+    t = _rec("/infer/batch", "build", t0)
+    X_scaled = b.plan.scale(X)
+    t = _rec("/infer/batch", "scale", t)
 
-    # run model
     try:
-        probs = ORT_SESS.run([ORT_OUTPUT], {ORT_INPUT: vec_scaled.reshape(1, -1)})[0]
-        # LightGBM ONNX exports often return raw prob for class 1
-        p_win = float(probs.ravel()[-1])
-        p_win = max(0.0, min(1.0, p_win))
+        p = b.predict(X_scaled)
     except Exception as e:
         raise HTTPException(500, f"Inference error: {e}")
+    t = _rec("/infer/batch", "ort", t)
+    p = p.tolist()
+    for i, r in enumerate(req.requests):
+        _log_prediction(b, r.correlation_id, X[i], p[i], r)
+
+    t = time.perf_counter_ns()
+    dt_ms = int((t - t0) / 1_000_000)
+    results = [{"correlation_id": r.correlation_id, "ok": True, "p_win": pi, "model_id": b.model_id,
+                "features_version": b.features_version, "latency_ms": dt_ms} for r, pi in zip(req.requests, p)]
+    resp = JSONResponse({"ok": True, "results": results, "latency_ms": dt_ms}, status_code=200)
+    _rec("/infer/batch", "serialize", t)
+    return resp
+
+def admin_reload() -> Dict[str, Any]:
+    old = BUNDLES.current
+    try:
+        new = BUNDLES.reload()
+    except Exception as e:
+        raise HTTPException(409, f"Reload rejected, still serving {old.model_id}/{old.features_version}: {e}")
+    return {"ok": True, "previous": {"model_id": old.model_id, "features_version": old.features_version},
+            "model_id": new.model_id, "features_version": new.features_version}
+
+def admin_rollback() -> Dict[str, Any]:
+    try:
+        ScalerVersionManager(path=SCALER_JSON.as_posix(), registry=(MODELS_DIR / "registry").as_posix(),
+                             model_id_file=MODEL_ID_FILE.as_posix(), model_file=MODEL_ONNX.as_posix()).rollback()
+    except RuntimeError as e:
+        raise HTTPException(409, f"Rollback refused: {e}")
+    return admin_reload()
+
+def create_app() -> FastAPI:
+    app = FastAPI(title="FXSuite Inference Service", version="1.0.0", lifespan=_lifespan)
+    app.add_middleware(_RequestTimer)
+    app.add_api_route("/health", health, methods=["GET"])
+    app.add_api_route("/version", version, methods=["GET"])
+    app.add_api_route("/metrics", metrics, methods=["GET"])
+    app.add_api_route("/infer", infer, methods=["POST"], response_model=InferResponse)
+    app.add_api_route("/infer/batch", infer_batch, methods=["POST"], response_model=InferBatchResponse)
+    app.add_api_route("/admin/reload", admin_reload, methods=["POST"])
+    app.add_api_route("/admin/rollback", admin_rollback, methods=["POST"])
+    return app
 
-    dt_ms = int((time.perf_counter_ns() - t0) / 1_000_000)
-    payload = InferResponse(
-        correlation_id=req.correlation_id,
-        ok=True,
-        p_win=p_win,
-        model_id=MODEL_ID,
-        features_version=FEATURES_VERSION,
-        latency_ms=dt_ms
-    ).dict()
-    return JSONResponse(payload, status_code=200)
+_APP: Optional[FastAPI] = None
 
+def __getattr__(name: str):
+    # `app` for uvicorn ("execution.inference_server:app") and tests, built on first access
+    global _APP
+    if name == "app":
+        if _APP is None: _APP = create_app()
+        return _APP
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=API_HOST, port=API_PORT, log_level="info")
\ No newline at end of file
+    uvicorn.run(create_app(), host=API_HOST, port=API_PORT, log_level="info")
\ No newline at end of file
@@ -0,0 +1,244 @@
+# Repeatable load / latency benchmark for the inference service.
+# - Builds an offline toy bundle (ml_pipeline.toy_model) unless --bundle-dir points at a real one.
+# - Drivers: "inproc" (ASGI app through starlette's TestClient, no sockets) and "loopback"
+#   (uvicorn on 127.0.0.1 + keep-alive HTTP sessions, and the binary socket transport).
+# - Request mix over ordered `features`, `feature_map` and /infer/batch, issued by N concurrent
+#   workers with jittered arrivals (uniform 0..jitter_ms sleep before each request).
+# - Client latencies go into monitoring.latency histograms; the JSON report has throughput,
+#   p50/p90/p99/p999 per (driver, transport, kind) plus the server's own stage histograms.
+# - --compare BASELINE.json fails (exit 1) when a p99 regresses by more than --max-regression.
+# Clients and server share one process (and GIL), so compare runs with each other rather than
+# reading the absolute loopback numbers under high concurrency as production latency.
+# Requires: fastapi, uvicorn, httpx (TestClient), requests, onnxruntime, onnx
+from __future__ import annotations
+import argparse, importlib, json, os, platform, socket, sys, tempfile, threading, time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:  # allow `python src/execution/load_test.py ...`
+    sys.path.insert(0, str(SRC_DIR))
+from monitoring.latency import LatencyHistogram
+
+KINDS = ("features", "feature_map", "batch")
+
+@dataclass
+class BenchConfig:
+    drivers: Tuple[str, ...] = ("inproc",)
+    transports: Tuple[str, ...] = ("json",)       # binary only runs on the loopback driver
+    mix: Dict[str, float] = field(default_factory=lambda: {"features": 0.6, "feature_map": 0.3, "batch": 0.1})
+    requests: int = 1000                           # per (driver, transport), split across workers
+    concurrency: int = 10
+    batch_size: int = 16
+    jitter_ms: float = 5.0
+    warmup: int = 50
+    n_features: int = 32
+    batch_window_ms: float = 2.0                   # server INFER_BATCH_WINDOW_MS (its default is 0 = off)
+    seed: int = 0
+    bundle_dir: Optional[str] = None               # <dir>/configs + <dir>/ML_Models; toy bundle if None
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0)); return s.getsockname()[1]
+
+@contextmanager
+def _server_module(cfg: BenchConfig, bundle_dir: Path, bin_port: int, cache_dir: Path) -> Iterator[Any]:
+    """Fresh import of execution.inference_server configured for this run (it reads env at import)."""
+    env = {"INFER_CONFIGS_DIR": str(bundle_dir / "configs"), "INFER_MODELS_DIR": str(bundle_dir / "ML_Models"),
+           "INFER_BIN_PORT": str(bin_port), "INFER_WATCH_SEC": "0", "INFER_BATCH_WINDOW_MS": str(cfg.batch_window_ms),
+           "INFER_BATCH_MAX": str(max(64, cfg.batch_size)), "INFER_CACHE_DIR": str(cache_dir),
+           "INFER_BATCH_REQUEST_MAX": str(max(1024, cfg.batch_size)), "PRED_LOG_URL": "", "FEATURE_STORE_DIR": ""}
+    saved = {k: os.environ.get(k) for k in env}
+    os.environ.update(env)
+    sys.modules.pop("execution.inference_server", None)
+    try:
+        yield importlib.import_module("execution.inference_server")
+    finally:
+        sys.modules.pop("execution.inference_server", None)
+        for k, v in saved.items():
+            if v is None: os.environ.pop(k, None)
+            else: os.environ[k] = v
+
+class _Uvicorn:
+    def __init__(self, app, port: int):
+        import uvicorn
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning",
+                                                   access_log=False, lifespan="off"))  # lifespan runs under TestClient
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        deadline = time.monotonic() + 10
+        while not self.server.started:
+            if time.monotonic() > deadline or not self.thread.is_alive(): raise RuntimeError("uvicorn did not start")
+            time.sleep(0.01)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True; self.thread.join(10)
+
+def _payload(kind: str, names: List[str], rng: np.random.Generator, batch_size: int, corr: str) -> Dict[str, Any]:
+    if kind == "features":
+        return {"correlation_id": corr, "features": rng.normal(size=len(names)).tolist()}
+    if kind == "feature_map":
+        return {"correlation_id": corr, "feature_map": dict(zip(names, rng.normal(size=len(names)).tolist()))}
+    return {"requests": [{"correlation_id": f"{corr}-{j}", "features": rng.normal(size=len(names)).tolist()}
+                         for j in range(batch_size)]}
+
+def _drive(cfg: BenchConfig, call, kinds: Dict[str, float], names: List[str], make_session) -> Dict[str, Any]:
+    """Runs cfg.requests calls over cfg.concurrency workers; call(session, kind, payload) -> ok."""
+    hists = {k: LatencyHistogram() for k in kinds}
+    errors = {k: 0 for k in kinds}; rows = {k: 0 for k in kinds}
+    lock = threading.Lock()
+    kind_names = list(kinds); weights = np.array([kinds[k] for k in kind_names], dtype=float)
+    weights /= weights.sum()
+
+    def worker(wid: int, n: int, record: bool):
+        rng = np.random.default_rng(cfg.seed * 1000 + wid + (0 if record else 500))
+        sess = make_session()
+        try:
+            for i in range(n):
+                kind = kind_names[int(rng.choice(len(kind_names), p=weights))]
+                payload = _payload(kind, names, rng, cfg.batch_size, f"w{wid}-{i}")
+                if cfg.jitter_ms > 0: time.sleep(rng.uniform(0, cfg.jitter_ms) / 1000.0)
+                t0 = time.perf_counter_ns()
+                try:
+                    ok = call(sess, kind, payload)
+                except Exception:
+                    ok = False
+                dt = (time.perf_counter_ns() - t0) // 1000
+                if not record: continue
+                hists[kind].record(dt)
+                with lock:
+                    if ok: rows[kind] += cfg.batch_size if kind == "batch" else 1
+                    else: errors[kind] += 1
+        finally:
+            close = getattr(sess, "close", None)
+            if close: close()
+
+    def run_all(total: int, record: bool) -> float:
+        per = [total // cfg.concurrency + (1 if w < total % cfg.concurrency else 0) for w in range(cfg.concurrency)]
+        threads = [threading.Thread(target=worker, args=(w, per[w], record)) for w in range(cfg.concurrency)]
+        t0 = time.perf_counter()
+        for t in threads: t.start()
+        for t in threads: t.join()
+        return time.perf_counter() - t0
+
+    if cfg.warmup: run_all(cfg.warmup, record=False)
+    wall = run_all(cfg.requests, record=True)
+    out = {}
+    for k in kinds:
+        snap = hists[k].snapshot()
+        out[k] = {"requests": snap["count"], "errors": errors[k], "rows": rows[k],
+                  "throughput_rps": round(snap["count"] / wall, 1), "rows_per_s": round(rows[k] / wall, 1),
+                  "latency_us": {kk: v for kk, v in snap.items() if kk != "count"}}
+    all_n = sum(v["requests"] for v in out.values())
+    return {"wall_s": round(wall, 3), "throughput_rps": round(all_n / wall, 1), "kinds": out}
+
+def _json_call(post):
+    def call(sess, kind, payload):
+        path = "/infer/batch" if kind == "batch" else "/infer"
+        r = post(sess, path, payload)
+        return r.status_code == 200
+    return call
+
+def run_benchmark(cfg: BenchConfig) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="infer_bench_") as tmp:
+        bundle_dir = Path(cfg.bundle_dir) if cfg.bundle_dir else Path(tmp)
+        if not cfg.bundle_dir:
+            from ml_pipeline.toy_model import write_toy_bundle
+            write_toy_bundle(bundle_dir, cfg.n_features, model_id="bench-toy")
+        need_bin = "loopback" in cfg.drivers and "binary" in cfg.transports
+        bin_port = _free_port() if need_bin else 0
+        results: List[Dict[str, Any]] = []
+        with _server_module(cfg, bundle_dir, bin_port, Path(tmp) / "cache") as srv:
+            names = list(srv.BUNDLES.current.feature_order)
+            from fastapi.testclient import TestClient
+            with TestClient(srv.app) as client:  # runs the lifespan (binary server) for both drivers
+                if "inproc" in cfg.drivers and "json" in cfg.transports:
+                    r = _drive(cfg, _json_call(lambda s, p, j: client.post(p, json=j)), cfg.mix, names, lambda: None)
+                    results.append({"driver": "inproc", "transport": "json", **r})
+                if "loopback" in cfg.drivers:
+                    if "json" in cfg.transports:
+                        import requests
+                        port = _free_port()
+                        with _Uvicorn(srv.app, port):
+                            base = f"http://127.0.0.1:{port}"
+                            r = _drive(cfg, _json_call(lambda s, p, j: s.post(base + p, json=j, timeout=5)),
+                                       cfg.mix, names, requests.Session)
+                        results.append({"driver": "loopback", "transport": "json", **r})
+                    if "binary" in cfg.transports:
+                        from execution.binary_transport import BinaryInferenceClient
+                        def bin_call(sess, kind, payload):
+                            return sess.predict(payload["correlation_id"], payload["features"]).ok
+                        r = _drive(cfg, bin_call, {"features": 1.0}, names,
+                                   lambda: BinaryInferenceClient(port=bin_port, timeout=5.0))
+                        results.append({"driver": "loopback", "transport": "binary", **r})
+                server_stages = srv.LATENCY.snapshot(srv.STAGE_METRIC)
+    return {"config": asdict(cfg), "created_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "env": _env_info(), "results": results, "server_stages_us": server_stages}
+
+def _env_info() -> Dict[str, Any]:
+    info = {"python": platform.python_version(), "platform": platform.platform(), "cpus": os.cpu_count()}
+    try:
+        import onnxruntime as ort; info["onnxruntime"] = ort.__version__
+    except ImportError:
+        pass
+    return info
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], max_regression: float = 0.2) -> List[str]:
+    """p99 regressions beyond max_regression (fraction) per (driver, transport, kind)."""
+    def p99s(rep):
+        return {(r["driver"], r["transport"], k): v["latency_us"]["p99_us"]
+                for r in rep["results"] for k, v in r["kinds"].items() if v["requests"]}
+    cur, base = p99s(report), p99s(baseline)
+    out = []
+    for key, b in sorted(base.items()):
+        c = cur.get(key)
+        if c is not None and b > 0 and c > b * (1 + max_regression):
+            out.append(f"{'/'.join(key)}: p99 {b}us -> {c}us (+{100 * (c / b - 1):.0f}%)")
+    return out
+
+def _parse_mix(s: str) -> Dict[str, float]:
+    mix = {}
+    for part in s.split(","):
+        k, _, w = part.partition(":")
+        if k not in KINDS: raise argparse.ArgumentTypeError(f"unknown kind {k!r}, expected one of {KINDS}")
+        mix[k] = float(w or 1.0)
+    return mix
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Inference service load/latency benchmark")
+    ap.add_argument("--drivers", default="inproc,loopback")
+    ap.add_argument("--transports", default="json,binary")
+    ap.add_argument("--mix", type=_parse_mix, default="features:0.6,feature_map:0.3,batch:0.1")
+    ap.add_argument("--requests", type=int, default=2000)
+    ap.add_argument("--concurrency", type=int, default=10)
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--jitter-ms", type=float, default=5.0)
+    ap.add_argument("--warmup", type=int, default=100)
+    ap.add_argument("--n-features", type=int, default=32)
+    ap.add_argument("--batch-window-ms", type=float, default=2.0)
+    ap.add_argument("--bundle-dir", default=None)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--out", default="infer_bench.json")
+    ap.add_argument("--compare", default=None, help="baseline report to check p99 regressions against")
+    ap.add_argument("--max-regression", type=float, default=0.2)
+    a = ap.parse_args()
+    cfg = BenchConfig(tuple(a.drivers.split(",")), tuple(a.transports.split(",")), a.mix, a.requests, a.concurrency,
+                      a.batch_size, a.jitter_ms, a.warmup, a.n_features, a.batch_window_ms, a.seed, a.bundle_dir)
+    rep = run_benchmark(cfg)
+    Path(a.out).write_text(json.dumps(rep, indent=2))
+    for r in rep["results"]:
+        for k, v in r["kinds"].items():
+            lat = v["latency_us"]
+            print(f"{r['driver']:8s} {r['transport']:6s} {k:11s} n={v['requests']:6d} err={v['errors']:4d} "
+                  f"{v['throughput_rps']:9.1f} req/s  p50={lat['p50_us']}us p99={lat['p99_us']}us p999={lat['p999_us']}us")
+    if a.compare:
+        bad = compare(rep, json.loads(Path(a.compare).read_text()), a.max_regression)
+        for line in bad: print("REGRESSION", line)
+        sys.exit(1 if bad else 0)
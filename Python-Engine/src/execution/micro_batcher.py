@@ -0,0 +1,91 @@
+# Server-side coalescer for concurrent single-row inference calls.
+# - Rows submitted from many request threads are gathered for up to `window_s`
+#   (or until `max_batch` rows are pending) and scored with ONE (B, n) model run.
+# - Each caller gets a Future; results fan back out in submission order.
+# - A lone row is dispatched at once unless the previous batch showed concurrency, so
+#   sequential callers never pay the window; bursts (bar close) get coalesced.
+# - Rows carry a key (e.g. the model bundle they were built for); one batch window
+#   runs run_fn(X, key) once per distinct key, so a hot swap never mixes models.
+from __future__ import annotations
+import threading, time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Tuple
+
+import numpy as np
+
+class MicroBatcher:
+    def __init__(self, run_fn: Callable[[np.ndarray, Any], np.ndarray], window_s: float = 0.002, max_batch: int = 64):
+        self.run_fn = run_fn
+        self.window_s = max(0.0, float(window_s))
+        self.max_batch = max(1, int(max_batch))
+        self.batches_run = 0
+        self.rows_run = 0
+        self._pending: List[Tuple[np.ndarray, Any, Future]] = []
+        self._cv = threading.Condition()
+        self._closed = False
+        self._last_batch_size = 0
+        self._thread = threading.Thread(target=self._loop, name="infer-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, row: np.ndarray, key: Any = None) -> Future:
+        fut: Future = Future()
+        with self._cv:
+            if self._closed:
+                raise RuntimeError("MicroBatcher is closed")
+            self._pending.append((row, key, fut))
+            self._cv.notify()
+        return fut
+
+    def score(self, row: np.ndarray, key: Any = None, timeout: float = 5.0) -> float:
+        return float(self.submit(row, key).result(timeout))
+
+    def close(self) -> None:
+        with self._cv:
+            self._closed = True
+            self._cv.notify()
+        self._thread.join(timeout=1.0)
+
+    def _take_batch(self) -> List[Tuple[np.ndarray, Any, Future]]:
+        with self._cv:
+            while not self._pending and not self._closed:
+                self._cv.wait()
+            # first row arrived: keep the window open for stragglers unless the batch is full
+            # or it is alone and the last batch was too
+            if len(self._pending) == 1 and self._last_batch_size <= 1:
+                self._last_batch_size = 1
+                return [self._pending.pop()]
+            deadline = time.monotonic() + self.window_s
+            while len(self._pending) < self.max_batch and not self._closed:
+                left = deadline - time.monotonic()
+                if left <= 0: break
+                self._cv.wait(left)
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            self._last_batch_size = len(batch)
+            return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if not batch:
+                if self._closed: return
+                continue
+            groups: Dict[int, List[Tuple[np.ndarray, Any, Future]]] = {}
+            for item in batch:
+                groups.setdefault(id(item[1]), []).append(item)
+            for items in groups.values():
+                self._run(items)
+
+    def _run(self, items: List[Tuple[np.ndarray, Any, Future]]) -> None:
+        try:
+            X = np.stack([row for row, _, _ in items])
+            p = np.asarray(self.run_fn(X, items[0][1])).reshape(-1)
+            if p.shape[0] != len(items):
+                raise RuntimeError(f"model returned {p.shape[0]} scores for batch of {len(items)}")
+        except Exception as e:
+            for _, _, fut in items: fut.set_exception(e)
+            return
+        self.batches_run += 1
+        self.rows_run += len(items)
+        for i, (_, _, fut) in enumerate(items):
+            fut.set_result(float(p[i]))
@@ -0,0 +1,268 @@
+# Versioned, immutable model bundle (features.yaml + scaler.json + ONNX session + model_id)
+# and the manager that hot-swaps it.
+# - A reload builds and warms the new session off the request path, checks the
+#   features.yaml <-> scaler.json <-> model input contract, then flips ONE reference.
+# - Requests grab `manager.current` once, so in-flight calls finish on the old bundle.
+# - Deploys are picked up by a FileWatcher (inotify, polling fallback) once the files settle.
+# - Cold start: onnxruntime/yaml are imported on first load; BundleManager(lazy=True) defers
+#   the load to first use (or the server's startup event). The compiled feature contract is
+#   cached as <contract_cache_dir>/contract_<features_version>.npz, so warm starts skip YAML;
+#   SessionConfig sets ORT threads / optimization level and can reuse a serialized optimized model.
+from __future__ import annotations
+import json, hashlib, logging, os, platform, threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from execution.file_watcher import FileWatcher
+from ml_pipeline.scaler_plan import ScalerPlan
+
+if TYPE_CHECKING:
+    import onnxruntime as ort
+
+log = logging.getLogger("fxsuite.bundle")
+
+class ContractError(RuntimeError):
+    pass
+
+@dataclass(frozen=True)
+class BundlePaths:
+    features_yaml: Path
+    scaler_json: Path
+    model_onnx: Path
+    model_id_file: Path
+
+    def fingerprint(self) -> Tuple[Tuple[int, int], ...]:
+        out = []
+        for p in (self.features_yaml, self.scaler_json, self.model_onnx, self.model_id_file):
+            try:
+                st = p.stat(); out.append((st.st_mtime_ns, st.st_size))
+            except FileNotFoundError:
+                out.append((0, 0))
+        return tuple(out)
+
+@dataclass(frozen=True)
+class ModelBundle:
+    model_id: str
+    features_version: str
+    feature_order: Tuple[str, ...]
+    plan: ScalerPlan
+    session: "ort.InferenceSession"
+    input_name: str
+    output_name: str
+    max_batch: int          # 1 when the model was exported with a fixed batch dim
+    loaded_utc: str
+
+    @property
+    def n_features(self) -> int:
+        return len(self.feature_order)
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Scaled (B, n) float32 -> clipped p_win (B,)."""
+        if X.shape[0] > self.max_batch:
+            return np.concatenate([self.predict(X[i:i+self.max_batch]) for i in range(0, X.shape[0], self.max_batch)])
+        probs = self.session.run([self.output_name], {self.input_name: X})[0]
+        # LightGBM ONNX exports often return raw prob for class 1 (last column)
+        p = np.asarray(probs, dtype=np.float64).reshape(X.shape[0], -1)[:, -1]
+        return np.clip(p, 0.0, 1.0)
+
+@dataclass(frozen=True)
+class SessionConfig:
+    intra_op_threads: int = 0          # 0 = ORT default (one per physical core)
+    inter_op_threads: int = 0
+    opt_level: str = "all"             # disable | basic | extended | all
+    optimized_cache_dir: Optional[Path] = None  # serialized optimized models, keyed by model hash
+
+_OPT_LEVELS = {"disable": "ORT_DISABLE_ALL", "basic": "ORT_ENABLE_BASIC",
+               "extended": "ORT_ENABLE_EXTENDED", "all": "ORT_ENABLE_ALL"}
+
+def session_options(cfg: SessionConfig) -> "ort.SessionOptions":
+    import onnxruntime as ort
+    so = ort.SessionOptions()
+    if cfg.intra_op_threads: so.intra_op_num_threads = cfg.intra_op_threads
+    if cfg.inter_op_threads: so.inter_op_num_threads = cfg.inter_op_threads
+    so.graph_optimization_level = getattr(ort.GraphOptimizationLevel, _OPT_LEVELS.get(cfg.opt_level, "ORT_ENABLE_ALL"))
+    return so
+
+def _create_session(model_path: Path, cfg: SessionConfig) -> "ort.InferenceSession":
+    import onnxruntime as ort
+    so = session_options(cfg)
+    if cfg.optimized_cache_dir is not None and cfg.opt_level != "disable":
+        # optimized graphs are ORT-version / machine specific, so both are part of the key
+        key = hashlib.sha256(model_path.read_bytes()).hexdigest()[:16]
+        cached = Path(cfg.optimized_cache_dir) / f"{model_path.stem}.{key}.{cfg.opt_level}.ort{ort.__version__}.{platform.machine()}.onnx"
+        if cached.exists():
+            so.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+            try:
+                return ort.InferenceSession(cached.as_posix(), sess_options=so, providers=["CPUExecutionProvider"])
+            except Exception as e:  # stale/corrupt cache entry: rebuild from the source model
+                log.warning("discarding optimized model cache %s: %s", cached, e)
+                cached.unlink(missing_ok=True)
+                return _create_session(model_path, cfg)
+        else:
+            cached.parent.mkdir(parents=True, exist_ok=True)
+            so.optimized_model_filepath = cached.as_posix()
+    return ort.InferenceSession(model_path.as_posix(), sess_options=so, providers=["CPUExecutionProvider"])
+
+# ---------- Loading ----------
+def _hash_files(*paths: Path) -> str:
+    h = hashlib.sha256()
+    for p in paths:
+        h.update(p.read_bytes())
+    return h.hexdigest()[:16]
+
+def _load_features_spec(path: Path) -> Dict[str, Any]:
+    import yaml
+    with open(path, "r") as f:
+        spec = yaml.safe_load(f)
+    if "meta_features" not in spec:
+        raise RuntimeError("features.yaml missing 'meta_features'")
+    return spec
+
+def _load_scaler(path: Path) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _build_order(spec: Dict[str, Any]) -> List[str]:
+    return [x["name"] for x in spec["meta_features"]]
+
+def load_contract(paths: BundlePaths, cache_dir: Optional[Path] = None) -> Tuple[str, ScalerPlan]:
+    """(features_version, compiled plan); parsed from YAML/JSON only when not cached for this version."""
+    fv = _hash_files(paths.features_yaml, paths.scaler_json)
+    cached = Path(cache_dir) / f"contract_{fv}.npz" if cache_dir is not None else None
+    if cached is not None and cached.exists():
+        try:
+            return fv, ScalerPlan.load_npz(cached)
+        except Exception as e:  # corrupt/foreign file: rebuild below
+            log.warning("ignoring contract cache %s: %s", cached, e)
+    plan = ScalerPlan.compile(_build_order(_load_features_spec(paths.features_yaml)), _load_scaler(paths.scaler_json))
+    if cached is not None:
+        cached.parent.mkdir(parents=True, exist_ok=True)
+        tmp = cached.with_name(f".{cached.stem}.{os.getpid()}.npz")
+        plan.save_npz(tmp); os.replace(tmp, cached)
+    return fv, plan
+
+def read_model_id(paths: BundlePaths) -> str:
+    model_id = paths.model_onnx.stem
+    if paths.model_id_file.exists():
+        model_id = paths.model_id_file.read_text().strip() or model_id
+    return model_id
+
+def make_bundle(model_id: str, fv: str, plan: ScalerPlan, sess: "ort.InferenceSession", max_batch: int = 64) -> ModelBundle:
+    """Check the model input against the contract, then warm the session."""
+    order = plan.order
+    inp = sess.get_inputs()[0]
+    width = inp.shape[1] if len(inp.shape) > 1 else None
+    if isinstance(width, int) and width != len(order):
+        raise ContractError(f"model expects {width} features, features.yaml defines {len(order)}")
+    bundle = ModelBundle(
+        model_id=model_id,
+        features_version=fv,
+        feature_order=tuple(order),
+        plan=plan,
+        session=sess,
+        input_name=inp.name,
+        output_name=sess.get_outputs()[0].name,
+        max_batch=1 if inp.shape[0] == 1 else max(1, max_batch),
+        loaded_utc=datetime.now(timezone.utc).isoformat(),
+    )
+    # warm: first run allocates arenas / resolves kernels
+    p = bundle.predict(np.zeros((min(2, bundle.max_batch), len(order)), dtype=np.float32))
+    if not np.all(np.isfinite(p)):
+        raise ContractError("model produced non-finite output on warm-up")
+    return bundle
+
+def load_bundle(paths: BundlePaths, strict: bool = False, max_batch: int = 64,
+                session: Optional[SessionConfig] = None, contract_cache_dir: Optional[Path] = None) -> ModelBundle:
+    """strict: reject scaler.json that misses any features.yaml entry (used for hot reloads)."""
+    fv, plan = load_contract(paths, contract_cache_dir)
+    if strict and plan.missing:
+        raise ContractError(f"scaler.json missing features: {list(plan.missing)}")
+    sess = _create_session(paths.model_onnx, session or SessionConfig())
+    return make_bundle(read_model_id(paths), fv, plan, sess, max_batch)
+
+# ---------- Hot swap ----------
+class BundleManager:
+    def __init__(self, paths: BundlePaths, max_batch: int = 64, lazy: bool = False,
+                 session: Optional[SessionConfig] = None, contract_cache_dir: Optional[Path] = None):
+        self.paths = paths
+        self.max_batch = max_batch
+        self.session = session
+        self.contract_cache_dir = contract_cache_dir
+        self._reload_lock = threading.Lock()
+        self._fingerprint = None
+        self._current: Optional[ModelBundle] = None
+        self.last_error: Optional[str] = None
+        self._watcher: Optional[FileWatcher] = None
+        if not lazy: self.ensure_loaded()
+
+    def _load(self, strict: bool) -> ModelBundle:
+        return load_bundle(self.paths, strict=strict, max_batch=self.max_batch,
+                           session=self.session, contract_cache_dir=self.contract_cache_dir)
+
+    def ensure_loaded(self) -> ModelBundle:
+        """First load (non-strict); later calls return the current bundle."""
+        if self._current is None:
+            with self._reload_lock:
+                if self._current is None:
+                    fp = self.paths.fingerprint()
+                    self._current = self._load(strict=False)
+                    self._fingerprint = fp
+        return self._current
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    @property
+    def current(self) -> ModelBundle:
+        b = self._current
+        return b if b is not None else self.ensure_loaded()
+
+    def reload(self) -> ModelBundle:
+        """Build, verify and warm a new bundle, then swap it in. On failure the current bundle stays."""
+        with self._reload_lock:
+            fp = self.paths.fingerprint()
+            try:
+                new = self._load(strict=True)
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                cur = self._current
+                log.error("bundle reload rejected, keeping %s/%s: %s", getattr(cur, "model_id", None),
+                          getattr(cur, "features_version", None), self.last_error)
+                raise
+            old = self._current
+            self._current = new
+            self._fingerprint = fp
+            self.last_error = None
+            if old is not None:
+                log.info("bundle swapped %s/%s -> %s/%s", old.model_id, old.features_version,
+                         new.model_id, new.features_version)
+            return new
+
+    def start_watcher(self, interval_s: float = 2.0) -> None:
+        """Reload interval_s after the bundle files stop changing (inotify; stat polling where unavailable)."""
+        if self._watcher is not None or interval_s <= 0: return
+        p = self.paths
+        files = (p.features_yaml, p.scaler_json, p.model_onnx, p.model_id_file)
+        self._watcher = FileWatcher(poll_s=interval_s)
+        self._watcher.watch(files, self._on_change, debounce_s=interval_s)
+        if self._current is not None and p.fingerprint() != self._fingerprint:
+            self._watcher.notify(files)  # changed since the last load
+        self._watcher.start()
+
+    def stop_watcher(self, timeout: float = 5.0) -> None:
+        if self._watcher is not None: self._watcher.stop(timeout)
+        self._watcher = None
+
+    def _on_change(self) -> None:
+        if self._current is None: return  # nothing loaded yet: first use does the load
+        fp = self.paths.fingerprint()
+        if fp == self._fingerprint: return
+        try:
+            self.reload()
+        except Exception:
+            self._fingerprint = fp  # don't retry the same broken files on every event
@@ -1,24 +1,62 @@
 # Writes the CSVs that MT5 FeatureExtractor reads:
 #  - Files/cross_snapshot.csv            (updated every minute)
-#  - Files/spread_percentiles.csv        (updated every 30 minutes)
-#  - Files/slow_factors.csv              (copied from data/slow/slow_factors_latest.csv daily)
-#  - Files/calendar.csv                  (copied from data/news/calendar.csv whenever it changes)
+#  - Files/spread_percentiles.csv        (updated every 30 minutes, from the incremental bar cache)
+#  - Files/slow_factors.csv              (data/slow/slow_factors_latest.csv, whenever it changes)
+#  - Files/calendar.csv                  (data/news/calendar.csv in the EA layout, whenever it changes)
+#  - Files/news_index.bin                (per-currency next/prev event table for the next NEWS_TABLE_HOURS,
+#                                         re-anchored hourly; read by NewsIndex.mqh)
+#
+# Symbols are fetched concurrently with per-symbol timeouts (MT5_FETCH_WORKERS, MT5_FETCH_TIMEOUT_S);
+# the cross snapshot is published by MT5_PUBLISH_DEADLINE_S after each minute boundary, with
+# last-good values for symbols that failed or were late. Per-symbol fetch latency: fetch_stats().
+# The spread job runs on its own thread and fetch pool (submit_spread_percentiles), so a slow
+# 60-day history sync never holds up the per-minute cross snapshot.
+# Source changes are pushed by a FileWatcher (inotify; stat polling every MT5_WATCH_POLL_S where
+# unavailable) and synced after MT5_WATCH_DEBOUNCE_S, instead of being checked once a minute.
+# All files go through FilePublisher: atomic temp+rename, skipped when unchanged, Files/manifest.json.
 #
 # Requires: MetaTrader5 (pip install MetaTrader5), pandas, pytz
 # Ensure your MT5 terminal is running & logged in on this machine.
 from __future__ import annotations
-import os, time
+import os, sys, time, logging, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
+from typing import Optional
 import pandas as pd
 import numpy as np
 import MetaTrader5 as mt5
 
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:  # allow `python src/execution/mt5_snapshot_agent.py`
+    sys.path.insert(0, str(SRC_DIR))
+from data.news_index import NewsIndex
+from execution.concurrent_fetch import ConcurrentFetcher
+from execution.file_publisher import publisher_for
+from execution.file_watcher import FileWatcher
+from execution.rates_cache import IncrementalRates, RatesStore
+
+log = logging.getLogger("fxsuite.snapshot")
+
 ROOT = Path(__file__).resolve().parents[2]
 FILES_DIR = ROOT / "MT5-Platform" / "MQL5" / "Files"
 DATA_DIR  = ROOT / "src" / "data"
-
-FILES_DIR.mkdir(parents=True, exist_ok=True)
+RATES_CACHE_DIR = DATA_DIR / "rates_cache"   # FILES_DIR is created by its publisher on first write
+
+FETCH_WORKERS = int(os.getenv("MT5_FETCH_WORKERS", "8"))
+FETCH_TIMEOUT_S = float(os.getenv("MT5_FETCH_TIMEOUT_S", "5"))
+PUBLISH_DEADLINE_S = float(os.getenv("MT5_PUBLISH_DEADLINE_S", "10"))
+SPREAD_TIMEOUT_S = float(os.getenv("MT5_SPREAD_TIMEOUT_S", "60"))
+NEWS_TABLE_HOURS = int(os.getenv("NEWS_TABLE_HOURS", "48"))
+WATCH_POLL_S = float(os.getenv("MT5_WATCH_POLL_S", "5"))
+WATCH_DEBOUNCE_S = float(os.getenv("MT5_WATCH_DEBOUNCE_S", "0.2"))
+
+FETCH_POOL = ThreadPoolExecutor(max_workers=FETCH_WORKERS, thread_name_prefix="mt5-fetch")
+CROSS_FETCHER = ConcurrentFetcher(FETCH_POOL)
+SPREAD_POOL = ThreadPoolExecutor(max_workers=max(1, FETCH_WORKERS // 2), thread_name_prefix="mt5-spread-fetch")
+SPREAD_FETCHER = ConcurrentFetcher(SPREAD_POOL)
+SPREAD_JOB = ThreadPoolExecutor(max_workers=1, thread_name_prefix="mt5-spread")
 
 # ---- broker symbol mapping (edit to fit your broker) ----
 MAPPING = {
@@ -44,97 +82,151 @@ def rates(symbol: str, timeframe=mt5.TIMEFRAME_M1, n=90):
     df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
     return df.set_index("time")
 
-def write_cross_snapshot():
-    # 60m returns / changes
-    out = {
-        "dxy_ret_60m": 0.0,
-        "spx_ret_60m": 0.0,
-        "gold_ret_60m": 0.0,
-        "oil_ret_60m": 0.0,
-        "ust2y_change_bps_60m": 0.0
-    }
-    def logret_60m(sym):
-        df = rates(sym, mt5.TIMEFRAME_M5, 12)  # 12x5m = 60m
-        c0, c12 = df["close"].iloc[-1], df["close"].iloc[0]
-        return float(np.log(c0 / c12))
-    try:
-        if (s:=MAPPING["DXY"]["symbol"]):   out["dxy_ret_60m"]  = logret_60m(s)
-        if (s:=MAPPING["SPX"]["symbol"]):   out["spx_ret_60m"]  = logret_60m(s)
-        if (s:=MAPPING["GOLD"]["symbol"]):  out["gold_ret_60m"] = logret_60m(s)
-        if (s:=MAPPING["OIL"]["symbol"]):   out["oil_ret_60m"]  = logret_60m(s)
-        if (s:=MAPPING["UST2Y"]["symbol"]):
-            df = rates(s, mt5.TIMEFRAME_M5, 12)
-            out["ust2y_change_bps_60m"] = float((df["close"].iloc[-1] - df["close"].iloc[0]) * 100.0)
-    except Exception as e:
-        # Keep previous values if any; otherwise zeros
-        pass
-
-    p = FILES_DIR / "cross_snapshot.csv"
-    tmp = pd.DataFrame([out])
-    tmp.to_csv(p, index=False)
+CROSS_FIELDS = [  # (output column, MAPPING key, 60m measure)
+    ("dxy_ret_60m", "DXY", "logret"),
+    ("spx_ret_60m", "SPX", "logret"),
+    ("gold_ret_60m", "GOLD", "logret"),
+    ("oil_ret_60m", "OIL", "logret"),
+    ("ust2y_change_bps_60m", "UST2Y", "bps"),
+]
+
+def logret_60m(sym):
+    df = rates(sym, mt5.TIMEFRAME_M5, 12)  # 12x5m = 60m
+    c0, c12 = df["close"].iloc[-1], df["close"].iloc[0]
+    return float(np.log(c0 / c12))
+
+def change_bps_60m(sym):
+    df = rates(sym, mt5.TIMEFRAME_M5, 12)
+    return float((df["close"].iloc[-1] - df["close"].iloc[0]) * 100.0)
+
+def write_cross_snapshot(deadline=None):
+    # 60m returns / changes, all symbols in parallel; late/failed ones keep their last good value
+    deadline = deadline if deadline is not None else time.monotonic() + FETCH_TIMEOUT_S
+    jobs, field_of = {}, {}
+    for field, key, kind in CROSS_FIELDS:
+        if (s:=MAPPING[key]["symbol"]):
+            jobs[s] = partial(logret_60m if kind == "logret" else change_bps_60m, s)
+            field_of[s] = field
+    vals = CROSS_FETCHER.run(jobs, min(deadline, time.monotonic() + FETCH_TIMEOUT_S))
+    out = {field: 0.0 for field, _, _ in CROSS_FIELDS}
+    for s, v in vals.items():
+        if v is not None: out[field_of[s]] = v
+
+    publisher_for(FILES_DIR).publish_df("cross_snapshot.csv", pd.DataFrame([out]))
     return out
 
-def write_spread_percentiles(lookback_days=60):
-    rows = []
-    for sym in MAPPING["FX"]:
-        try:
-            n = 24*60*lookback_days
-            df = rates(sym, mt5.TIMEFRAME_M1, n)
-            # 'spread' is in points; convert to pips
-            pt = mt5.symbol_info(sym).point
-            digits = mt5.symbol_info(sym).digits
-            pip = pt*10.0 if digits in (3,5) else pt
-            spr_pips = df["spread"] * pt / pip
-            # current spread from last bar
-            cur = float(spr_pips.iloc[-1])
-            # percentile of current vs history
-            pctl = float((spr_pips <= cur).mean() * 100.0)
-            rows.append({"symbol": sym, "pctl": round(pctl, 2)})
-        except Exception:
-            continue
-    pd.DataFrame(rows).to_csv(FILES_DIR/"spread_percentiles.csv", index=False)
+_SPREAD_CACHE: dict = {}
 
-def sync_slow_factors():
-    src = DATA_DIR / "slow" / "slow_factors_latest.csv"
-    if src.exists():
-        df = pd.read_csv(src)
-        df.to_csv(FILES_DIR/"slow_factors.csv", index=False)
+def spread_cache(lookback_days=60) -> IncrementalRates:
+    # one per lookback; bars persist on disk, the histogram lives for the process
+    if lookback_days not in _SPREAD_CACHE:
+        _SPREAD_CACHE[lookback_days] = IncrementalRates(mt5, RatesStore(RATES_CACHE_DIR), mt5.TIMEFRAME_M1, 24*60*lookback_days)
+    return _SPREAD_CACHE[lookback_days]
+
+def _spread_pctl(cache: IncrementalRates, sym: str) -> float:
+    # only bars since the last stored one are fetched
+    cache.sync(sym)
+    # percentile of current vs history; 'spread' is in points and the
+    # points->pips factor is a constant per symbol, so ranks are unchanged
+    cur = float(mt5.symbol_info(sym).spread)
+    return round(cache.spread_percentile(sym, cur), 2)
+
+def write_spread_percentiles(lookback_days=60, deadline=None):
+    cache = spread_cache(lookback_days)
+    deadline = deadline if deadline is not None else time.monotonic() + SPREAD_TIMEOUT_S
+    vals = SPREAD_FETCHER.run({sym: partial(_spread_pctl, cache, sym) for sym in MAPPING["FX"]}, deadline)
+    rows = [{"symbol": sym, "pctl": v} for sym, v in vals.items() if v is not None]
+    publisher_for(FILES_DIR).publish_df("spread_percentiles.csv", pd.DataFrame(rows))
 
-def sync_calendar():
-    src = DATA_DIR / "news" / "calendar.csv"
+_SPREAD_RUN: dict = {"future": None}
+
+def submit_spread_percentiles(lookback_days=60) -> Optional[Future]:
+    """write_spread_percentiles() in the background; None (not resubmitted) while the last run is going."""
+    prev = _SPREAD_RUN["future"]
+    if prev is not None and not prev.done(): return None
+    f = _SPREAD_RUN["future"] = SPREAD_JOB.submit(write_spread_percentiles, lookback_days)
+    f.add_done_callback(_log_spread_failure)
+    return f
+
+def _log_spread_failure(f: Future) -> None:
+    if f.exception() is not None: log.error("spread percentiles failed: %r", f.exception())
+
+def fetch_stats():
+    """Per-symbol fetch latency / outcome counters for both snapshot jobs."""
+    return {"cross": dict(CROSS_FETCHER.stats), "spread": dict(SPREAD_FETCHER.stats)}
+
+def slow_factors_src() -> Path:
+    return DATA_DIR / "slow" / "slow_factors_latest.csv"
+
+def calendar_src() -> Path:
+    return DATA_DIR / "news" / "calendar.csv"
+
+def sync_slow_factors():
+    src = slow_factors_src()
     if src.exists():
         df = pd.read_csv(src)
-        # enforce required columns & ISO times
-        df["event_time_iso"] = pd.to_datetime(df["event_time_iso"], utc=True).dt.strftime("%Y-%m-%dT%H:%M:%SZ")
-        df[["event_time_iso","currency","importance"]].to_csv(FILES_DIR/"calendar.csv", index=False)
+        publisher_for(FILES_DIR).publish_df("slow_factors.csv", df)
+
+_NEWS: dict = {"key": None, "index": None, "csv": None, "table": None}
+_NEWS_LOCK = threading.Lock()   # the watcher thread and the main loop both sync
+
+def news_index():
+    """NewsIndex of data/news/calendar.csv, rebuilt only when the file changes (size, mtime)."""
+    src = calendar_src()
+    try: st = src.stat()
+    except FileNotFoundError: return None
+    key = (st.st_size, st.st_mtime_ns)
+    if _NEWS["key"] != key:
+        _NEWS["index"], _NEWS["key"] = NewsIndex.from_csv(src), key
+    return _NEWS["index"]
+
+def sync_calendar(now_utc=None):
+    # cheap when nothing changed: the CSV is rewritten per calendar change, the table per hour
+    with _NEWS_LOCK:
+        idx = news_index()
+        if idx is None: return
+        pub = publisher_for(FILES_DIR)
+        if _NEWS["csv"] != idx.digest:
+            pub.publish_df("calendar.csv", idx.to_frame())
+            _NEWS["csv"] = idx.digest
+        start = int(now_utc if now_utc is not None else time.time()) // 3600 * 3600
+        if _NEWS["table"] != (idx.digest, start):
+            pub.publish_bytes("news_index.bin", idx.export_table(start, NEWS_TABLE_HOURS))
+            _NEWS["table"] = (idx.digest, start)
+
+def start_source_watcher(watcher: Optional[FileWatcher] = None) -> FileWatcher:
+    """Sync slow factors / calendar as soon as their sources change; pass `watcher` to share one."""
+    w = watcher if watcher is not None else FileWatcher(poll_s=WATCH_POLL_S)
+    w.watch([slow_factors_src()], sync_slow_factors, debounce_s=WATCH_DEBOUNCE_S)
+    w.watch([calendar_src()], sync_calendar, debounce_s=WATCH_DEBOUNCE_S)
+    return w.start()
 
 def main_loop():
     init_mt5()
     last_spread_update = datetime.min.replace(tzinfo=timezone.utc)
-    last_slow = datetime.min.replace(tzinfo=timezone.utc)
-    last_cal  = datetime.min.replace(tzinfo=timezone.utc)
+    sync_slow_factors(); sync_calendar()
+    watcher = start_source_watcher()
+    log.info("watching sources via %s", watcher.backend)
+    last_hour = int(time.time()) // 3600
 
     while True:
         now = datetime.now(timezone.utc)
-        write_cross_snapshot()
-
-        if now - last_spread_update > timedelta(minutes=30):
-            write_spread_percentiles()
+        # publish deadline is anchored to the minute boundary, not to when we woke up
+        boundary = (time.time() // 60) * 60
+        deadline = time.monotonic() + max(0.0, boundary + PUBLISH_DEADLINE_S - time.time())
+        write_cross_snapshot(deadline)
+        slow = {s: st.last_error for s, st in CROSS_FETCHER.stats.items() if st.last_error}
+        if slow: log.warning("cross snapshot published with last-good values for %s", slow)
+
+        if now - last_spread_update > timedelta(minutes=30) and submit_spread_percentiles() is not None:
             last_spread_update = now
 
-        # daily syncs (or whenever file changed)
-        if (DATA_DIR / "slow" / "slow_factors_latest.csv").exists():
-            mtime = datetime.fromtimestamp(os.path.getmtime(DATA_DIR/"slow"/"slow_factors_latest.csv"), tz=timezone.utc)
-            if mtime > last_slow:
-                sync_slow_factors(); last_slow = mtime
-
-        if (DATA_DIR / "news" / "calendar.csv").exists():
-            mtime = datetime.fromtimestamp(os.path.getmtime(DATA_DIR/"news"/"calendar.csv"), tz=timezone.utc)
-            if mtime > last_cal:
-                sync_calendar(); last_cal = mtime
+        # source changes are synced by the watcher; the news table only needs re-anchoring hourly
+        if int(boundary) // 3600 != last_hour:
+            sync_calendar(); last_hour = int(boundary) // 3600
 
         # sleep to next minute boundary
-        time.sleep(max(1, 60 - datetime.utcnow().second))
+        time.sleep(max(1, boundary + 60 - time.time()))
 
 if __name__ == "__main__":
     main_loop()
\ No newline at end of file
@@ -0,0 +1,150 @@
+# Persistent per-symbol, per-timeframe MT5 bar store + incremental spread histogram.
+# - <root>/<SYMBOL>/tf<timeframe>.bin holds closed bars as fixed-size little-endian records
+#   (MT5 rates layout), append-only and memory-mappable; restarts resume from the last bar.
+# - sync() asks MT5 only for bars after the last stored timestamp.
+# - SpreadHistogram keeps counts of spread points over the last N bars, so the
+#   "current spread percentile" is a cumulative-count lookup instead of a 60-day scan.
+# The MetaTrader5 module is passed in, so a local fake works for offline tests.
+from __future__ import annotations
+import os, time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+RATES_DTYPE = np.dtype([
+    ("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+    ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8"),
+])
+
+def tf_seconds(timeframe: int) -> int:
+    # MT5 encodes minutes directly, hours as 0x4000|h, W1 = 0x8001, MN1 = 0xC001
+    if timeframe < 0x4000: return timeframe * 60
+    if timeframe == 0x8001: return 7 * 86400
+    if timeframe == 0xC001: return 31 * 86400
+    return (timeframe & 0xFF) * 3600
+
+def as_rates(r) -> np.ndarray:
+    """Copy MT5 rates (any field order / extra fields) into RATES_DTYPE by field name."""
+    r = np.asarray(r)
+    out = np.empty(r.shape[0], dtype=RATES_DTYPE)
+    for name in RATES_DTYPE.names:
+        out[name] = r[name]
+    return out
+
+class RatesStore:
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def path(self, symbol: str, timeframe: int) -> Path:
+        return self.root / symbol / f"tf{timeframe}.bin"
+
+    def load(self, symbol: str, timeframe: int) -> np.ndarray:
+        """Read-only memory map of every stored bar (empty array if none)."""
+        p = self.path(symbol, timeframe)
+        if not p.exists() or p.stat().st_size < RATES_DTYPE.itemsize:
+            return np.empty(0, dtype=RATES_DTYPE)
+        n = p.stat().st_size // RATES_DTYPE.itemsize  # ignore a torn trailing record
+        return np.memmap(p, dtype=RATES_DTYPE, mode="r", shape=(n,))
+
+    def last_time(self, symbol: str, timeframe: int) -> Optional[int]:
+        m = self.load(symbol, timeframe)
+        return int(m["time"][-1]) if m.size else None
+
+    def append(self, symbol: str, timeframe: int, bars: np.ndarray) -> np.ndarray:
+        """Append bars strictly newer than the last stored one; returns what was written."""
+        bars = as_rates(bars)
+        last = self.last_time(symbol, timeframe)
+        if last is not None:
+            bars = bars[bars["time"] > last]
+        if bars.size == 0: return bars
+        p = self.path(symbol, timeframe)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        if p.exists() and p.stat().st_size % RATES_DTYPE.itemsize:
+            os.truncate(p, p.stat().st_size - p.stat().st_size % RATES_DTYPE.itemsize)
+        with open(p, "ab") as f:
+            f.write(bars.tobytes())
+        return bars
+
+    def frame(self, symbol: str, timeframe: int, n: Optional[int] = None) -> pd.DataFrame:
+        m = self.load(symbol, timeframe)
+        m = m[-n:] if n else m
+        df = pd.DataFrame(np.array(m))
+        df["time"] = pd.to_datetime(df["time"], unit="s", utc=True)
+        return df.set_index("time")
+
+class SpreadHistogram:
+    """Counts of integer spread points over a sliding window of bars."""
+    def __init__(self):
+        self.counts = np.zeros(64, dtype=np.int64)
+        self.total = 0
+        self._cum: Optional[np.ndarray] = None
+
+    def _grow(self, max_pts: int) -> None:
+        if max_pts >= self.counts.size:
+            self.counts = np.concatenate([self.counts, np.zeros(max(max_pts + 1, 2 * self.counts.size) - self.counts.size, np.int64)])
+
+    def add(self, spreads: np.ndarray) -> None:
+        s = np.clip(np.asarray(spreads, dtype=np.int64), 0, None)
+        if s.size == 0: return
+        self._grow(int(s.max()))
+        self.counts += np.bincount(s, minlength=self.counts.size)
+        self.total += s.size; self._cum = None
+
+    def remove(self, spreads: np.ndarray) -> None:
+        s = np.clip(np.asarray(spreads, dtype=np.int64), 0, None)
+        if s.size == 0: return
+        self.counts -= np.bincount(s, minlength=self.counts.size)
+        self.total -= s.size; self._cum = None
+
+    def percentile(self, current_pts: float) -> float:
+        """Share (%) of window bars with spread <= current."""
+        if self.total == 0: return 0.0
+        if self._cum is None: self._cum = np.cumsum(self.counts)
+        k = int(np.floor(current_pts))
+        if k < 0: return 0.0
+        return float(self._cum[min(k, self._cum.size - 1)] * 100.0 / self.total)
+
+class IncrementalRates:
+    """Keeps RatesStore current for a timeframe and a per-symbol spread histogram over the last `window_bars`."""
+    def __init__(self, mt5, store: RatesStore, timeframe: int, window_bars: int, max_fetch: int = 200_000):
+        self.mt5 = mt5; self.store = store; self.timeframe = timeframe
+        self.window_bars = window_bars; self.max_fetch = max_fetch
+        self.hist: Dict[str, SpreadHistogram] = {}
+        self._stored: Dict[str, int] = {}   # bars on disk when the histogram was last advanced
+
+    def sync(self, symbol: str, now_s: Optional[float] = None) -> int:
+        """Fetch closed bars newer than the last stored one; returns the number appended."""
+        last = self.store.last_time(symbol, self.timeframe)
+        if last is None:
+            n = self.window_bars
+        else:
+            elapsed = (now_s if now_s is not None else time.time()) - last
+            n = int(elapsed // tf_seconds(self.timeframe)) + 2
+        n = max(1, min(n, self.max_fetch))
+        # pos 1 = last closed bar; the forming bar is never stored
+        r = self.mt5.copy_rates_from_pos(symbol, self.timeframe, 1, n)
+        if r is None:
+            raise RuntimeError(f"copy_rates_from_pos failed for {symbol}: {self.mt5.last_error()}")
+        added = self.store.append(symbol, self.timeframe, r)
+        self._advance_histogram(symbol)
+        return int(added.size)
+
+    def _advance_histogram(self, symbol: str) -> None:
+        bars = self.store.load(symbol, self.timeframe)
+        h = self.hist.get(symbol)
+        prev = self._stored.get(symbol, 0)
+        if h is None or prev > bars.size:  # first use in this process: one vectorized rebuild
+            h = self.hist[symbol] = SpreadHistogram()
+            h.add(bars["spread"][-self.window_bars:])
+        elif bars.size > prev:
+            h.add(bars["spread"][prev:])
+            # bars that slid out of the window
+            lo, hi = max(0, prev - self.window_bars), max(0, bars.size - self.window_bars)
+            if hi > lo: h.remove(bars["spread"][lo:hi])
+        self._stored[symbol] = bars.size
+
+    def spread_percentile(self, symbol: str, current_pts: float) -> float:
+        h = self.hist.get(symbol)
+        return h.percentile(current_pts) if h is not None else 0.0
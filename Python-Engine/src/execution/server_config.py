@@ -0,0 +1,69 @@
+# Inference server settings read from the environment. No side effects: no threads, files or
+# app; shared by inference_server (which reads it once at import) and the worker_pool runner.
+#   INFER_MODELS_DIR / INFER_CONFIGS_DIR    meta_labeler.onnx + model_id.txt / features.yaml + scaler.json
+#   INFER_HOST / INFER_PORT; INFER_BIN_PORT opts in to the binary transport (default 0 = off, e.g. 8082)
+#   INFER_BATCH_WINDOW_MS opts in to micro-batching (default 0 = off, e.g. 2.0) / INFER_BATCH_MAX
+#   INFER_WATCH_SEC (0 = no watcher)
+#   INFER_BATCH_REQUEST_MAX: most requests accepted in one /infer/batch call
+#   INFER_CACHE_DIR, INFER_ORT_CACHE_DIR ("" = off), INFER_ORT_INTRA_THREADS / _INTER_THREADS / _OPT_LEVEL
+#   PRED_LOG_URL / PRED_LOG_SPILL, FEATURE_STORE_DIR
+#   INFER_SHARED_DIR / INFER_WORKER_INDEX (set by worker_pool for its workers; -1 = single process)
+from __future__ import annotations
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional
+
+from execution.model_bundle import BundlePaths, SessionConfig
+
+ROOT = Path(__file__).resolve().parents[2]
+FILES_DIR = ROOT / "MT5-Platform" / "MQL5" / "Files"
+
+@dataclass(frozen=True)
+class ServerConfig:
+    models_dir: Path
+    configs_dir: Path
+    api_host: str
+    api_port: int
+    bin_port: int
+    batch_window_ms: float
+    batch_max: int
+    batch_request_max: int
+    watch_sec: float
+    pred_log_url: str
+    pred_log_spill: Path
+    cache_dir: Path
+    session: SessionConfig
+    feature_store_dir: str
+    shared_dir: str
+    worker_index: int
+
+    @property
+    def paths(self) -> BundlePaths:
+        return BundlePaths(self.configs_dir / "features.yaml", self.configs_dir / "scaler.json",
+                           self.models_dir / "meta_labeler.onnx", self.models_dir / "model_id.txt")
+
+    @classmethod
+    def from_env(cls, env: Optional[Mapping[str, str]] = None) -> "ServerConfig":
+        env = os.environ if env is None else env
+        cache_dir = Path(env.get("INFER_CACHE_DIR", ROOT / ".cache"))
+        ort_cache = env.get("INFER_ORT_CACHE_DIR", str(cache_dir / "ort"))
+        session = SessionConfig(int(env.get("INFER_ORT_INTRA_THREADS", "0")), int(env.get("INFER_ORT_INTER_THREADS", "0")),
+                                env.get("INFER_ORT_OPT_LEVEL", "all").lower(), Path(ort_cache) if ort_cache else None)
+        spill = Path(env.get("PRED_LOG_SPILL", ROOT / "logs" / "prediction_spill.jsonl"))
+        store = env.get("FEATURE_STORE_DIR", "")
+        worker = int(env.get("INFER_WORKER_INDEX", "-1"))
+        if worker >= 0:   # appends from several processes must not interleave in one file
+            spill = spill.with_name(f"{spill.stem}.w{worker}{spill.suffix}")
+            if store: store = str(Path(store) / f"worker-{worker}")
+        return cls(models_dir=Path(env.get("INFER_MODELS_DIR", FILES_DIR / "ML_Models")),
+                   configs_dir=Path(env.get("INFER_CONFIGS_DIR", ROOT / "configs")),
+                   api_host=env.get("INFER_HOST", "127.0.0.1"), api_port=int(env.get("INFER_PORT", "8081")),
+                   bin_port=int(env.get("INFER_BIN_PORT", "0")),
+                   batch_window_ms=float(env.get("INFER_BATCH_WINDOW_MS", "0")),
+                   batch_max=int(env.get("INFER_BATCH_MAX", "64")),
+                   batch_request_max=int(env.get("INFER_BATCH_REQUEST_MAX", "1024")),
+                   watch_sec=float(env.get("INFER_WATCH_SEC", "2.0")),
+                   pred_log_url=env.get("PRED_LOG_URL", ""), pred_log_spill=spill, cache_dir=cache_dir,
+                   session=session, feature_store_dir=store, shared_dir=env.get("INFER_SHARED_DIR", ""),
+                   worker_index=worker)
@@ -0,0 +1,488 @@
+# Multi-process inference serving: one runner, N uvicorn worker processes serving one shared model version.
+# - The runner builds each version once in the shared dir (INFER_SHARED_DIR, default INFER_CACHE_DIR/shared):
+#     model_<hash>.onnx     the graph, its large initializers turned into external references
+#     weights_<hash>.bin    those initializers (64-byte aligned); workers mmap the file read-only and hand
+#                           the arrays to ORT as external initializers, so the weights live once in the
+#                           page cache instead of once per worker (prepacking is off for the same reason)
+#     fx<pid>_<seq>         multiprocessing.shared_memory block: mean | inv_std | categorical of the ScalerPlan
+#     current.json          the version every worker must serve (atomic rename; workers watch it)
+#     runner.json           {"seq"} of the last published version, kept across stop() so seqs keep increasing
+#   Tree ensembles (LightGBM/XGBoost exports) keep their trees in node attributes that ORT parses per
+#   process; only initializer-heavy graphs share their weights. The optimized-model cache is not used here:
+#   a serialized optimized model inlines its weights again.
+# - Versions: publish() builds, verifies (contract + warm-up) and only then flips current.json. Workers
+#   swap on the change and ack the seq in a shared array. rollback() re-activates the previous version,
+#   kept for that purpose; older ones are released. The source files are watched as in single-process
+#   mode, and /admin/reload in a worker asks the runner and waits for its verdict: it writes
+#   reload.<nonce>.request, rings reload.request, and polls reload.<nonce>.status.json. The runner
+#   answers every pending request with one publish, so concurrent reloads never overwrite each other.
+# - Per worker: ORT intra/inter-op thread budget, optional CPU affinity (Linux), BLAS/OpenMP pools at one
+#   thread, its own feature-store / prediction-spill subdirectory. The binary transport is shared through
+#   SO_REUSEPORT where the platform has it, else served by worker 0 only.
+# Usage: python src/execution/worker_pool.py --workers 4 --intra-threads 1 --pin-cpus
+# Requirements: as inference_server, plus onnx for weight sharing (without it the model is shared as is)
+from __future__ import annotations
+import argparse, hashlib, json, logging, mmap, os, signal, socket, sys, threading, time, uuid
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from multiprocessing import shared_memory
+import multiprocessing as mp
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:  # allow `python src/execution/worker_pool.py`
+    sys.path.insert(0, str(SRC_DIR))
+from execution.file_publisher import _write_atomic
+from execution.file_watcher import FileWatcher
+from execution.model_bundle import (BundlePaths, ContractError, ModelBundle, SessionConfig, load_contract,
+                                    make_bundle, read_model_id, session_options)
+from ml_pipeline.scaler_plan import ScalerPlan
+
+log = logging.getLogger("fxsuite.workers")
+
+CURRENT = "current.json"
+STATE = "runner.json"
+REQUEST = "reload.request"          # doorbell; the requests themselves are reload.<nonce>.request
+
+def request_file(nonce: str) -> str:
+    return f"reload.{nonce}.request"
+
+def status_file(nonce: str) -> str:
+    return f"reload.{nonce}.status.json"
+ALIGN = 64
+SHARE_MIN_BYTES = 1024      # smaller initializers stay inline in the graph
+
+@dataclass(frozen=True)
+class SharedVersion:
+    seq: int
+    model_id: str
+    features_version: str
+    model_file: str                 # relative to the shared dir
+    weights_file: str
+    initializers: Tuple[Tuple[str, str, Tuple[int, ...], int], ...]   # name, dtype, shape, offset
+    scaler_shm: str
+    order: Tuple[str, ...]
+    missing: Tuple[str, ...]
+    published_utc: str
+
+    def to_json(self) -> bytes:
+        return json.dumps(asdict(self), separators=(",", ":")).encode()
+
+    @classmethod
+    def from_json(cls, data) -> "SharedVersion":
+        d = json.loads(data)
+        d["initializers"] = tuple((n, t, tuple(s), int(o)) for n, t, s, o in d["initializers"])
+        d["order"], d["missing"] = tuple(d["order"]), tuple(d["missing"])
+        return cls(**d)
+
+# ---------- runner side: build ----------
+def split_model(model_onnx: Path, out_dir: Path, min_bytes: int = SHARE_MIN_BYTES) -> Tuple[str, str, tuple]:
+    """Content-addressed (model_file, weights_file, initializers); reuses files built for the same model."""
+    raw = Path(model_onnx).read_bytes()
+    key = hashlib.sha256(raw).hexdigest()[:16]
+    mfile, wfile, meta = f"model_{key}.onnx", f"weights_{key}.bin", Path(out_dir) / f"model_{key}.json"
+    if (Path(out_dir) / mfile).exists() and meta.exists():
+        return mfile, wfile, tuple((n, t, tuple(s), o) for n, t, s, o in json.loads(meta.read_text()))
+    try:
+        import onnx
+        from onnx import TensorProto, numpy_helper
+    except ImportError:
+        log.warning("onnx not installed: workers load private copies of the model weights")
+        _write_atomic(Path(out_dir) / mfile, raw); _write_atomic(meta, b"[]")
+        return mfile, wfile, ()
+    model = onnx.load_from_string(raw)
+    blob, inits = bytearray(), []
+    for t in model.graph.initializer:
+        if t.data_location == TensorProto.EXTERNAL: continue
+        a = numpy_helper.to_array(t)
+        if a.nbytes < max(1, min_bytes) or a.dtype == object: continue
+        off = -(-len(blob) // ALIGN) * ALIGN
+        blob.extend(b"\0" * (off - len(blob))); blob.extend(np.ascontiguousarray(a).tobytes())
+        inits.append((t.name, a.dtype.str, tuple(int(d) for d in a.shape), off))
+        for f in ("raw_data", "float_data", "int32_data", "int64_data", "double_data", "uint64_data"): t.ClearField(f)
+        t.data_location = TensorProto.EXTERNAL
+        for k, v in (("location", wfile), ("offset", str(off)), ("length", str(a.nbytes))):
+            e = t.external_data.add(); e.key, e.value = k, v
+    if inits: _write_atomic(Path(out_dir) / wfile, bytes(blob))
+    _write_atomic(Path(out_dir) / mfile, model.SerializeToString())
+    _write_atomic(meta, json.dumps(inits).encode())   # written last: marks the pair complete
+    return mfile, wfile, tuple(inits)
+
+def _scaler_to_shm(plan: ScalerPlan, name: str) -> shared_memory.SharedMemory:
+    n = plan.n_features
+    shm = shared_memory.SharedMemory(name=name, create=True, size=max(1, 9 * n))
+    shm.buf[:4 * n] = plan.mean.tobytes(); shm.buf[4 * n:8 * n] = plan.inv_std.tobytes()
+    shm.buf[8 * n:9 * n] = plan.categorical.tobytes()
+    return shm
+
+# ---------- worker side: attach ----------
+_TRACK_LOCK = threading.Lock()
+
+def _attach_shm(name: str) -> shared_memory.SharedMemory:
+    # attaching must not make this process an owner: its resource tracker would unlink the block on exit
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    from multiprocessing import resource_tracker
+    with _TRACK_LOCK:
+        reg = resource_tracker.register
+        resource_tracker.register = lambda *a, **k: None
+        try: return shared_memory.SharedMemory(name=name)
+        finally: resource_tracker.register = reg
+
+class _Attached:
+    """Keeps the mmap / shared-memory buffers of one version alive while its bundle may be serving."""
+    def __init__(self, shm, mm, arrays):
+        self.shm, self.mm, self.arrays = shm, mm, arrays
+
+    def release(self) -> bool:
+        self.arrays = None
+        try:
+            self.shm.close()
+            if self.mm is not None: self.mm.close()
+            return True
+        except BufferError:   # an in-flight request still holds the old bundle; retry on the next swap
+            return False
+
+def attach_version(shared_dir: Path, v: SharedVersion, cfg: Optional[SessionConfig] = None,
+                   max_batch: int = 64) -> Tuple[ModelBundle, _Attached]:
+    import onnxruntime as ort
+    shared_dir = Path(shared_dir)
+    so = session_options(cfg or SessionConfig())
+    so.add_session_config_entry("session.disable_prepacking", "1")   # prepacked weights are private copies
+    mm, arrays = None, []
+    if v.initializers:
+        with open(shared_dir / v.weights_file, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        arrays = [np.frombuffer(mm, dtype=t, count=int(np.prod(s, dtype=np.int64)), offset=o).reshape(s)
+                  for _, t, s, o in v.initializers]
+        so.add_external_initializers([n for n, *_ in v.initializers], [ort.OrtValue.ortvalue_from_numpy(a) for a in arrays])
+    sess = ort.InferenceSession((shared_dir / v.model_file).read_bytes(), sess_options=so, providers=["CPUExecutionProvider"])
+    shm, n = _attach_shm(v.scaler_shm), len(v.order)
+    plan = ScalerPlan.from_arrays(v.order, np.ndarray((n,), np.float32, shm.buf, 0),
+                                  np.ndarray((n,), np.float32, shm.buf, 4 * n),
+                                  np.ndarray((n,), np.bool_, shm.buf, 8 * n), v.missing)
+    return make_bundle(v.model_id, v.features_version, plan, sess, max_batch), _Attached(shm, mm, arrays)
+
+def read_current(shared_dir: Path) -> Optional[SharedVersion]:
+    try: return SharedVersion.from_json((Path(shared_dir) / CURRENT).read_bytes())
+    except FileNotFoundError: return None
+
+class SharedBundleClient:
+    """
+    BundleManager stand-in for a worker: serves the version named in <shared_dir>/current.json.
+    on_swap(seq) is called after every swap (the runner's ack array).
+    """
+    def __init__(self, shared_dir: Path, max_batch: int = 64, session: Optional[SessionConfig] = None,
+                 request_timeout_s: float = 60.0):
+        self.dir = Path(shared_dir)
+        self.max_batch, self.session, self.request_timeout_s = max_batch, session, request_timeout_s
+        self.version: Optional[SharedVersion] = None
+        self.last_error: Optional[str] = None
+        self.on_swap = None
+        self._current: Optional[ModelBundle] = None
+        self._attached: Dict[int, _Attached] = {}
+        self._retired: List[_Attached] = []
+        self._lock = threading.Lock()
+        self._watcher: Optional[FileWatcher] = None
+
+    def sync(self) -> ModelBundle:
+        """Attach the runner's current version unless already serving it."""
+        with self._lock:
+            v = read_current(self.dir)
+            if v is None: raise RuntimeError(f"no model version published in {self.dir}")
+            if self.version is not None and v.seq == self.version.seq: return self._current
+            bundle, att = attach_version(self.dir, v, self.session, self.max_batch)
+            prev = self.version
+            self._current, self.version = bundle, v
+            self._attached[v.seq] = att
+            for seq in [s for s in self._attached if s not in (v.seq, getattr(prev, "seq", None))]:
+                self._retired.append(self._attached.pop(seq))
+            self._retired = [a for a in self._retired if not a.release()]
+            if prev is not None:
+                log.info("worker swapped %s/%s -> %s/%s", prev.model_id, prev.features_version, v.model_id, v.features_version)
+        if self.on_swap is not None: self.on_swap(v.seq)
+        return bundle
+
+    def ensure_loaded(self) -> ModelBundle:
+        return self._current if self._current is not None else self.sync()
+
+    @property
+    def loaded(self) -> bool:
+        return self._current is not None
+
+    @property
+    def current(self) -> ModelBundle:
+        b = self._current
+        return b if b is not None else self.ensure_loaded()
+
+    def reload(self) -> ModelBundle:
+        """Ask the runner to rebuild from the source files; raises ContractError if it rejects them."""
+        nonce = uuid.uuid4().hex
+        req, status = self.dir / request_file(nonce), self.dir / status_file(nonce)
+        _write_atomic(req, b"")
+        _write_atomic(self.dir / REQUEST, nonce.encode())
+        deadline = time.monotonic() + self.request_timeout_s
+        try:
+            while time.monotonic() < deadline:
+                try: st = json.loads(status.read_text())
+                except (FileNotFoundError, ValueError):
+                    time.sleep(0.01); continue
+                if not st.get("ok"):
+                    self.last_error = st.get("error"); raise ContractError(self.last_error)
+                self.last_error = None
+                return self.sync()
+        finally:
+            req.unlink(missing_ok=True); status.unlink(missing_ok=True)
+        raise TimeoutError(f"runner did not answer the reload request within {self.request_timeout_s}s")
+
+    def start_watcher(self, interval_s: float = 2.0) -> None:
+        # always on: the runner decides what every worker serves (interval_s is the polling fallback)
+        if self._watcher is not None: return
+        self._watcher = FileWatcher(poll_s=interval_s if interval_s > 0 else 1.0)
+        self._watcher.watch([self.dir / CURRENT], self._on_change)
+        self._watcher.start()
+
+    def stop_watcher(self, timeout: float = 5.0) -> None:
+        if self._watcher is not None: self._watcher.stop(timeout)
+        self._watcher = None
+
+    def _on_change(self) -> None:
+        try: self.sync()
+        except Exception as e:
+            self.last_error = f"{type(e).__name__}: {e}"
+            log.error("worker could not attach the published version: %s", self.last_error)
+
+# ---------- runner ----------
+def cpu_sets(workers: int, threads: int, cpus: Optional[Sequence[int]] = None) -> List[List[int]]:
+    """Contiguous blocks of `threads` CPUs per worker, wrapping around when oversubscribed."""
+    if cpus is None:
+        cpus = os.sched_getaffinity(0) if hasattr(os, "sched_getaffinity") else range(os.cpu_count() or 1)
+    cpus = sorted(cpus)
+    return [sorted({cpus[(i * threads + j) % len(cpus)] for j in range(max(1, threads))}) for i in range(workers)]
+
+def _worker_main(index: int, sock: Optional[socket.socket], env: Dict[str, str], acks, cpus: Optional[List[int]],
+                 log_level: str) -> None:
+    os.environ.update(env)
+    if cpus and hasattr(os, "sched_setaffinity"): os.sched_setaffinity(0, cpus)
+    import uvicorn
+    from execution import inference_server as srv
+    srv.BUNDLES.on_swap = lambda seq: acks.__setitem__(index, seq)
+    server = uvicorn.Server(uvicorn.Config(srv.app, log_level=log_level))
+    server.run(sockets=[sock] if sock is not None else None)
+
+class WorkerPool:
+    def __init__(self, paths: BundlePaths, shared_dir: Path, workers: int = 2, intra_threads: int = 1,
+                 inter_threads: int = 1, pin_cpus: bool = False, opt_level: str = "all", max_batch: int = 64,
+                 contract_cache_dir: Optional[Path] = None, share_min_bytes: int = SHARE_MIN_BYTES,
+                 env: Optional[Dict[str, str]] = None, log_level: str = "warning"):
+        self.paths, self.dir = paths, Path(shared_dir)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.workers, self.intra_threads, self.inter_threads = workers, intra_threads, inter_threads
+        self.opt_level, self.max_batch, self.share_min_bytes = opt_level, max_batch, share_min_bytes
+        self.contract_cache_dir, self.env, self.log_level = contract_cache_dir, dict(env or {}), log_level
+        self.cpus = cpu_sets(workers, intra_threads) if pin_cpus else [None] * workers
+        self.ctx = mp.get_context("spawn")
+        self.acks = self.ctx.Array("q", max(1, workers), lock=False)
+        self.procs: List[Optional[mp.process.BaseProcess]] = [None] * workers
+        self.versions: Dict[int, Tuple[SharedVersion, shared_memory.SharedMemory]] = {}
+        self.current: Optional[SharedVersion] = None
+        self.previous: Optional[int] = None
+        self.last_error: Optional[str] = None
+        self._seq = self._last_seq()   # keep seqs increasing across runner restarts
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._watcher: Optional[FileWatcher] = None
+        self._sock: Optional[socket.socket] = None
+        self._stopping = False
+
+    def _last_seq(self) -> int:
+        cur = read_current(self.dir)
+        try: seq = int(json.loads((self.dir / STATE).read_text())["seq"])
+        except (FileNotFoundError, ValueError, KeyError, TypeError): seq = 0
+        return max(seq, cur.seq if cur is not None else 0)
+
+    @property
+    def session_config(self) -> SessionConfig:
+        return SessionConfig(self.intra_threads, self.inter_threads, self.opt_level, None)
+
+    # ---------- versions ----------
+    def publish(self, strict: bool = True) -> SharedVersion:
+        """Build a version from the source files, verify it in this process, then make every worker serve it."""
+        with self._lock:
+            fp = self.paths.fingerprint()
+            fv, plan = load_contract(self.paths, self.contract_cache_dir)
+            if strict and plan.missing:
+                raise ContractError(f"scaler.json missing features: {list(plan.missing)}")
+            mfile, wfile, inits = split_model(self.paths.model_onnx, self.dir, self.share_min_bytes)
+            seq = self._seq + 1
+            shm = _scaler_to_shm(plan, f"fx{os.getpid()}_{seq}")
+            v = SharedVersion(seq, read_model_id(self.paths), fv, mfile, wfile, inits, shm.name, plan.order,
+                              plan.missing, datetime.now(timezone.utc).isoformat())
+            try:
+                _, att = attach_version(self.dir, v, self.session_config, self.max_batch)   # the worker path
+                att.release()
+            except Exception:
+                shm.close(); shm.unlink(); raise
+            self._seq = seq
+            _write_atomic(self.dir / STATE, json.dumps({"seq": seq}).encode())
+            self.versions[seq] = (v, shm)
+            self._activate(v)
+            self._fingerprint = fp
+            return v
+
+    def _activate(self, v: SharedVersion) -> None:
+        if self.current is not None and self.current.seq != v.seq: self.previous = self.current.seq
+        self.current = v
+        _write_atomic(self.dir / CURRENT, v.to_json())
+        keep = {v.seq, self.previous}
+        for seq in [s for s in self.versions if s not in keep]:
+            _, shm = self.versions.pop(seq)
+            shm.close(); shm.unlink()   # workers still mapping it keep their pages until they swap
+        self._gc_files({self.versions[s][0].model_file for s in self.versions}
+                       | {self.versions[s][0].weights_file for s in self.versions})
+        log.info("serving %s/%s (seq %d)", v.model_id, v.features_version, v.seq)
+
+    def _gc_files(self, live: set) -> None:
+        for p in self.dir.glob("model_*.onnx"):
+            if p.name not in live:
+                key = p.stem[len("model_"):]
+                for q in (p, self.dir / f"weights_{key}.bin", self.dir / f"model_{key}.json"): q.unlink(missing_ok=True)
+
+    def rollback(self) -> SharedVersion:
+        """Serve the previously published version again (it is kept for this)."""
+        with self._lock:
+            if self.previous is None or self.previous not in self.versions:
+                raise RuntimeError("no previous version to roll back to")
+            self._activate(self.versions[self.previous][0])
+            return self.current
+
+    def wait_acks(self, seq: Optional[int] = None, timeout: float = 30.0) -> bool:
+        """True once every live worker serves `seq` (default: the current version)."""
+        seq = self.current.seq if seq is None else seq
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if all(self.acks[i] == seq for i, p in enumerate(self.procs) if p is not None and p.is_alive()): return True
+            time.sleep(0.01)
+        return False
+
+    def status(self) -> Dict[str, Any]:
+        return {"current": asdict(self.current) if self.current else None, "previous": self.previous,
+                "last_error": self.last_error,
+                "workers": [{"index": i, "pid": p.pid if p else None, "alive": bool(p and p.is_alive()),
+                             "seq": self.acks[i], "cpus": self.cpus[i]} for i, p in enumerate(self.procs)]}
+
+    # ---------- change handling ----------
+    def watch(self, interval_s: float = 2.0) -> None:
+        """Republish when the source files settle; answer workers' reload requests."""
+        if self._watcher is not None: return
+        p = self.paths
+        self._watcher = FileWatcher(poll_s=interval_s if interval_s > 0 else 1.0)
+        if interval_s > 0:
+            self._watcher.watch((p.features_yaml, p.scaler_json, p.model_onnx, p.model_id_file), self._on_sources,
+                                debounce_s=interval_s)
+        self._watcher.watch([self.dir / REQUEST], self._on_request)
+        self._watcher.start()
+
+    def _on_sources(self) -> None:
+        fp = self.paths.fingerprint()
+        if fp == self._fingerprint: return
+        try: self.publish()
+        except Exception as e:
+            self._fingerprint = fp   # don't retry the same broken files on every event
+            self.last_error = f"{type(e).__name__}: {e}"
+            log.error("publish rejected, still serving seq %s: %s", getattr(self.current, "seq", None), self.last_error)
+
+    def _on_request(self) -> None:
+        # one publish answers every request pending when it starts (all made before it read the sources);
+        # requests that arrive meanwhile get the next round
+        while True:
+            pending = sorted(self.dir.glob(request_file("*")))
+            if not pending: return
+            try:
+                v = self.publish(); st = {"ok": True, "seq": v.seq}
+            except Exception as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                st = {"ok": False, "error": self.last_error}
+            for req in pending:
+                nonce = req.name[len("reload."):-len(".request")]
+                if req.exists(): _write_atomic(self.dir / status_file(nonce), json.dumps({"nonce": nonce, **st}).encode())
+                req.unlink(missing_ok=True)
+
+    # ---------- processes ----------
+    def _worker_env(self, i: int) -> Dict[str, str]:
+        env = {**self.env, "INFER_SHARED_DIR": str(self.dir), "INFER_WORKER_INDEX": str(i),
+               "INFER_ORT_INTRA_THREADS": str(self.intra_threads), "INFER_ORT_INTER_THREADS": str(self.inter_threads),
+               "INFER_ORT_OPT_LEVEL": self.opt_level, "INFER_BATCH_MAX": str(self.max_batch),
+               "OMP_NUM_THREADS": "1", "OPENBLAS_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}
+        if not hasattr(socket, "SO_REUSEPORT") and i > 0: env["INFER_BIN_PORT"] = "0"
+        return env
+
+    def _spawn(self, i: int) -> None:
+        self.acks[i] = 0
+        p = self.ctx.Process(target=_worker_main, name=f"infer-worker-{i}", daemon=True,
+                             args=(i, self._sock, self._worker_env(i), self.acks, self.cpus[i], self.log_level))
+        p.start()
+        self.procs[i] = p
+
+    def start(self, host: str = "127.0.0.1", port: int = 8081, watch_s: float = 2.0) -> "WorkerPool":
+        if self.current is None: self.publish(strict=False)
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind((host, port)); self._sock.listen(2048); self._sock.set_inheritable(True)
+        for i in range(self.workers): self._spawn(i)
+        self.watch(watch_s)
+        return self
+
+    @property
+    def port(self) -> Optional[int]:
+        return self._sock.getsockname()[1] if self._sock is not None else None
+
+    def supervise(self, interval_s: float = 1.0) -> None:
+        """Restart workers that died, until stop()."""
+        while not self._stopping:
+            for i, p in enumerate(self.procs):
+                if p is not None and not p.is_alive() and not self._stopping:
+                    log.warning("worker %d (pid %s) exited with %s; restarting", i, p.pid, p.exitcode)
+                    self._spawn(i)
+            time.sleep(interval_s)
+
+    def stop(self, timeout: float = 10.0) -> None:
+        self._stopping = True
+        if self._watcher is not None: self._watcher.stop(); self._watcher = None
+        for p in self.procs:
+            if p is not None and p.is_alive(): p.terminate()   # SIGTERM: uvicorn drains and runs the lifespan exit
+        for p in self.procs:
+            if p is not None: p.join(timeout)
+        if self._sock is not None: self._sock.close(); self._sock = None
+        for _, shm in self.versions.values():
+            shm.close(); shm.unlink()
+        self.versions.clear()
+        (self.dir / CURRENT).unlink(missing_ok=True)
+
+def main():
+    from execution.server_config import ServerConfig
+    cfg = ServerConfig.from_env()   # same env config as the single-process server, without importing it
+    ap = argparse.ArgumentParser(description="Multi-worker inference runner")
+    ap.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    ap.add_argument("--intra-threads", type=int, default=1)
+    ap.add_argument("--inter-threads", type=int, default=1)
+    ap.add_argument("--pin-cpus", action="store_true")
+    ap.add_argument("--host", default=cfg.api_host)
+    ap.add_argument("--port", type=int, default=cfg.api_port)
+    ap.add_argument("--shared-dir", default=cfg.shared_dir or str(cfg.cache_dir / "shared"))
+    args = ap.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    pool = WorkerPool(cfg.paths, Path(args.shared_dir), args.workers, args.intra_threads, args.inter_threads,
+                      args.pin_cpus, cfg.session.opt_level, cfg.batch_max, cfg.cache_dir / "contracts")
+    pool.start(args.host, args.port, cfg.watch_sec)
+    signal.signal(signal.SIGTERM, lambda *_: setattr(pool, "_stopping", True))
+    log.info("%d workers on %s:%d, seq %d", args.workers, args.host, pool.port, pool.current.seq)
+    try: pool.supervise()
+    except KeyboardInterrupt: pass
+    finally: pool.stop()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,205 @@
+# Vectorized Python twin of FXSuite/ML/FeatureExtractor.mqh (+ the EA's minutes-to-news slot).
+# - build_features(bars) returns one 64-wide row per bar, computed as the EA does when that bar
+#   opens: indicators from the last CLOSED bar (shift 1), c0 = the new bar's open price,
+#   hour/dow from the bar's server time, f21 from the calendar at the bar's UTC open.
+# - Indicators follow MT5's built-in implementations: EMA seeded with the first price, ATR =
+#   SMA of true range, population-std Bollinger bands, Wilder RSI, EMA-smoothed ADX (ADX.mq5),
+#   mean-deviation CCI, MACD signal = SMA of main (iMACD has no buffer 2, so f11 stays 0),
+#   Stochastic with SMA slowing. Values before an indicator's warm-up are 0, like the buffers.
+# - EMAs depend on where history starts: compare against MT5 only after a few hundred bars.
+# - cross_snapshot / slow_factors / spread_percentiles are NOT part of the EA vector (slots
+#   25..63 are zero there); pass them to get extra columns next to f0..f63 for training.
+from __future__ import annotations
+from typing import Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from data.news_index import HIGH, NO_NEWS_MIN, NewsIndex
+from ml_pipeline.feature_engineering import handle_missing_cross_asset
+
+N_FEATURES = 64
+COLUMNS = [f"f{i}" for i in range(N_FEATURES)]
+SLOT_NAMES = ("ret_1", "ret_5", "atr", "bbw_over_atr", "bbw", "ema50_vs_200", "adx", "rsi", "cci",
+              "macd_main", "macd_signal", "macd_hist", "stoch_k", "stoch_d", "spread", "hour", "dow",
+              "session", "bb_z", "ret_vs_ema20", "intent_breakout", "minutes_to_high_news",
+              "intent_trend", "intent_squeeze", "atr_rel_60")   # f0..f24; f25..f63 reserved (0)
+
+# ---------- MT5 indicator buffers (index = bar, oldest first) ----------
+def ema(x: np.ndarray, n: int) -> np.ndarray:
+    return pd.Series(x).ewm(span=n, adjust=False).mean().to_numpy()
+
+def _sma(x: np.ndarray, n: int, start: int = 0) -> np.ndarray:
+    """SMA over x[start:]; 0 until n values are available."""
+    out = np.zeros(len(x))
+    if len(x) - start >= n:
+        c = np.cumsum(np.concatenate(([0.0], x[start:])))
+        out[start + n - 1:] = (c[n:] - c[:-n]) / n
+    return out
+
+def atr(high, low, close, n: int = 14) -> np.ndarray:
+    tr = np.zeros(len(close))
+    tr[1:] = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+    return _sma(tr, n, start=1)
+
+def bands(close, n: int = 20, dev: float = 2.0):
+    mid = _sma(close, n)
+    sd = np.zeros(len(close))
+    if len(close) >= n:
+        w = np.lib.stride_tricks.sliding_window_view(close, n)
+        sd[n - 1:] = np.sqrt(((w - mid[n - 1:, None]) ** 2).mean(axis=1))
+    up, lo = mid + dev * sd, mid - dev * sd
+    up[:n - 1] = lo[:n - 1] = 0.0
+    return up, mid, lo
+
+def _wilder(x: np.ndarray, n: int) -> np.ndarray:
+    """RSI.mq5 smoothing of x[1..]: SMA seed at index n, then (prev*(n-1) + x)/n."""
+    out = np.zeros(len(x))
+    if len(x) > n:
+        seeded = x[n:].copy(); seeded[0] = x[1:n + 1].mean()
+        out[n:] = pd.Series(seeded).ewm(alpha=1.0 / n, adjust=False).mean().to_numpy()
+    return out
+
+def rsi(close, n: int = 14) -> np.ndarray:
+    d = np.zeros(len(close)); d[1:] = np.diff(close)
+    pos, neg = _wilder(np.maximum(d, 0.0), n), _wilder(np.maximum(-d, 0.0), n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = np.where(neg != 0.0, 100.0 - 100.0 / (1.0 + pos / neg), np.where(pos != 0.0, 100.0, 50.0))
+    out[:n] = 0.0
+    return out
+
+def adx(high, low, close, n: int = 14) -> np.ndarray:
+    up = np.zeros(len(close)); dn = np.zeros(len(close)); tr = np.zeros(len(close))
+    up[1:] = np.maximum(high[1:] - high[:-1], 0.0)
+    dn[1:] = np.maximum(low[:-1] - low[1:], 0.0)
+    up, dn = np.where(up > dn, up, 0.0), np.where(dn > up, dn, 0.0)
+    tr[1:] = np.maximum.reduce([np.abs(high[1:] - low[1:]), np.abs(high[1:] - close[:-1]), np.abs(low[1:] - close[:-1])])
+    safe = np.where(tr != 0.0, tr, 1.0)
+    pdi = ema(np.where(tr != 0.0, 100.0 * up / safe, 0.0), n)   # buffers start at 0 on bar 0
+    ndi = ema(np.where(tr != 0.0, 100.0 * dn / safe, 0.0), n)
+    s = pdi + ndi
+    dx = np.where(s != 0.0, 100.0 * np.abs(pdi - ndi) / np.where(s != 0.0, s, 1.0), 0.0)
+    dx[0] = 0.0
+    return ema(dx, n)
+
+def cci(high, low, close, n: int = 14) -> np.ndarray:
+    tp = (high + low + close) / 3.0
+    sp = _sma(tp, n); out = np.zeros(len(tp))
+    if len(tp) >= n:
+        w = np.lib.stride_tricks.sliding_window_view(tp, n)
+        d = np.abs(w - sp[n - 1:, None]).sum(axis=1) * 0.015 / n
+        out[n - 1:] = np.where(d != 0.0, (tp[n - 1:] - sp[n - 1:]) / np.where(d != 0.0, d, 1.0), 0.0)
+    return out
+
+def macd(close, fast: int = 12, slow: int = 26, signal: int = 9):
+    main = ema(close, fast) - ema(close, slow)
+    return main, _sma(main, signal)
+
+def stochastic(high, low, close, k: int = 5, d: int = 3, slowing: int = 3):
+    main = np.zeros(len(close)); start = k - 1 + slowing - 1
+    if len(close) > start:
+        ll = np.lib.stride_tricks.sliding_window_view(low, k).min(axis=1)     # bars k-1..
+        hh = np.lib.stride_tricks.sliding_window_view(high, k).max(axis=1)
+        num = _sma(close[k - 1:] - ll, slowing); den = _sma(hh - ll, slowing)   # means; ratio == sums
+        main[k - 1:] = np.where(den != 0.0, num / np.where(den != 0.0, den, 1.0) * 100.0, 100.0)
+        main[:start] = 0.0
+    return main, _sma(main, d, start=start)
+
+# ---------- builder ----------
+def _epoch_s(t) -> np.ndarray:
+    s = pd.Series(t)
+    if pd.api.types.is_datetime64_any_dtype(s):
+        return (s.dt.tz_localize(None) if s.dt.tz is not None else s).to_numpy("datetime64[s]").astype(np.int64)
+    return s.to_numpy(dtype=np.int64)
+
+def build_features(bars: pd.DataFrame, symbol: str, point: float = 0.0,
+                   calendar: Union[pd.DataFrame, NewsIndex, None] = None, server_utc_offset_s: int = 0,
+                   intents: Sequence[int] = (0, 1, 0),
+                   cross: Optional[pd.DataFrame] = None, slow: Optional[pd.DataFrame] = None,
+                   spread_pct: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    bars: oldest-first rows with time (server time; epoch s or datetime), open, high, low, close
+    and optionally spread (points, as in MT5 rates). calendar: a NewsIndex or a calendar frame in
+    either layout. Returns a DataFrame indexed by open_time
+    (epoch s, the EA's correlation-id time) with columns f0..f63 (+ extra input columns).
+    """
+    t = _epoch_s(bars["time"])
+    o, h, l, c = (bars[k].to_numpy(dtype=np.float64) for k in ("open", "high", "low", "close"))
+    n = len(c)
+    F = np.zeros((n, N_FEATURES))
+    prev = lambda a: np.concatenate(([0.0], a[:-1]))    # value at shift 1 (0 before any closed bar)
+    def lag(a, k):
+        out = np.zeros(n); out[k:] = a[:max(0, n - k)]; return out
+
+    c0 = o
+    c1 = np.where(np.arange(n) >= 1, lag(c, 1), c0)
+    c5 = np.where(np.arange(n) >= 5, lag(c, 5), c1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        F[:, 0] = np.where((c0 > 0) & (c1 > 0), c0 / c1 - 1.0, 0.0)
+        F[:, 1] = np.where((c0 > 0) & (c5 > 0), c0 / c5 - 1.0, 0.0)
+
+    a_full = atr(h, l, c); a = prev(a_full)
+    up, md, lo = (prev(x) for x in bands(c))
+    bbw = np.maximum(0.0, up - lo)
+    F[:, 2] = a
+    F[:, 3] = np.where(a > 0, bbw / np.where(a > 0, a, 1.0), 0.0)
+    F[:, 4] = bbw
+    e20, e50, e200 = prev(ema(c, 20)), prev(ema(c, 50)), prev(ema(c, 200))
+    F[:, 5] = np.sign(e50 - e200)
+    F[:, 6] = prev(adx(h, l, c))
+    F[:, 7] = prev(rsi(c))
+    F[:, 8] = prev(cci(h, l, c))
+    mm, ms = macd(c)
+    F[:, 9], F[:, 10] = prev(mm), prev(ms)
+    sk, sd = stochastic(h, l, c)
+    F[:, 12], F[:, 13] = prev(sk), prev(sd)
+    if "spread" in bars:
+        sp = bars["spread"].to_numpy(dtype=np.float64)
+        F[:, 14] = np.where(sp > 0, sp * point, 0.0)
+
+    hour = (t % 86400) // 3600
+    F[:, 15] = hour
+    F[:, 16] = (t // 86400 + 4) % 7                       # 1970-01-01 was a Thursday; Sunday = 0
+    F[:, 17] = np.where(hour < 7, 0, np.where(hour < 13, 1, 2))
+    half = np.maximum(1e-8, (up - lo) * 0.5)
+    F[:, 18] = np.where((up > lo) & (c0 > 0), (c0 - md) / half, 0.0)
+    F[:, 19] = np.where(e20 > 0, c0 / np.where(e20 > 0, e20, 1.0) - 1.0, 0.0)
+    F[:, 20], F[:, 22], F[:, 23] = intents
+    if calendar is None: F[:, 21] = NO_NEWS_MIN
+    else:
+        news = calendar if isinstance(calendar, NewsIndex) else NewsIndex.from_frame(calendar)
+        F[:, 21] = news.minutes_to_next(symbol, t - server_utc_offset_s, HIGH)
+
+    # ATR / mean of the positive ATRs among the last 60 closed bars (fewer early on)
+    pos = np.where(a_full > 0, a_full, 0.0); cs = np.concatenate(([0.0], np.cumsum(pos)))
+    cnt = np.concatenate(([0], np.cumsum(a_full > 0)))
+    idx = np.arange(n); lo60 = np.maximum(0, idx - 60)
+    s60, n60 = cs[idx] - cs[lo60], cnt[idx] - cnt[lo60]
+    mean = np.where(n60 > 0, s60 / np.maximum(n60, 1), a)
+    F[:, 24] = np.where(idx == 0, 1.0, np.where(mean > 0, a / np.where(mean > 0, mean, 1.0), 1.0))
+
+    out = pd.DataFrame(F, columns=COLUMNS, index=pd.Index(t, name="open_time"))
+    return _with_extras(out, symbol, server_utc_offset_s, cross, slow, spread_pct)
+
+def _asof(out: pd.DataFrame, src: pd.DataFrame, at_utc: np.ndarray) -> pd.DataFrame:
+    """Broadcast a one-row snapshot, or as-of join (backward) a history with a utc 'time' column."""
+    cols = [k for k in src.columns if k not in ("time", "symbol")]
+    if "time" not in src or src.empty:
+        row = src[cols].iloc[0] if len(src) else pd.Series(np.nan, index=cols)
+        return pd.DataFrame({k: np.full(len(out), row[k], dtype=np.float64) for k in cols}, index=out.index)
+    hist = src.assign(time=_epoch_s(src["time"])).sort_values("time")
+    j = pd.merge_asof(pd.DataFrame({"time": at_utc}), hist[["time"] + cols], on="time", direction="backward")
+    return j[cols].set_axis(out.index)
+
+def _with_extras(out, symbol, offset, cross, slow, spread_pct) -> pd.DataFrame:
+    at_utc = out.index.to_numpy() - offset
+    parts = [out]
+    if cross is not None:
+        x = _asof(out, cross, at_utc)
+        parts.append(handle_missing_cross_asset(x, list(x.columns)))
+    if slow is not None:
+        parts.append(_asof(out, slow[slow["symbol"] == symbol] if "symbol" in slow else slow, at_utc))
+    if spread_pct is not None:
+        sp = spread_pct[spread_pct["symbol"] == symbol] if "symbol" in spread_pct else spread_pct
+        parts.append(_asof(out, sp, at_utc).rename(columns={"pctl": "spread_pctl"}))
+    return pd.concat(parts, axis=1) if len(parts) > 1 else out
@@ -0,0 +1,78 @@
+# MT5 <-> Python feature parity check.
+# - MT5 side: the EA's InpFeatureDumpFile CSV (symbol,open_time,f0..f63; one row per bar it scored).
+# - Python side: ml_pipeline.feature_builder.build_features over the same symbol's bar history.
+# - Rows are aligned on open_time; the first `warmup` Python bars are skipped because EMA/ADX
+#   values depend on where each side's history starts.
+# - f14 (live spread vs the bar's recorded spread) and c0-based slots (f0, f1, f18, f19: the EA
+#   reads the first tick, not the bar open) can legitimately drift; widen `atol` or `ignore` them.
+# Requires: pandas, numpy
+from __future__ import annotations
+import argparse, json, sys
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+if str(SRC_DIR) not in sys.path:  # allow `python src/ml_pipeline/feature_parity.py ...`
+    sys.path.insert(0, str(SRC_DIR))
+from data.news_index import NewsIndex
+from ml_pipeline.feature_builder import COLUMNS, build_features
+
+@dataclass
+class ParityReport:
+    rows_compared: int = 0
+    rows_mismatched: int = 0
+    max_abs_diff: Dict[str, float] = field(default_factory=dict)
+    mismatches: Dict[str, int] = field(default_factory=dict)     # per feature, only where > 0
+    first_mismatch: Optional[Dict[str, float]] = None              # {"open_time", "feature", "mt5", "python"}
+
+    @property
+    def ok(self) -> bool:
+        return self.rows_compared > 0 and self.rows_mismatched == 0
+
+def load_mt5_dump(path, symbol: Optional[str] = None) -> pd.DataFrame:
+    df = pd.read_csv(path)
+    if symbol is not None and "symbol" in df: df = df[df["symbol"] == symbol]
+    return df.drop_duplicates("open_time", keep="last").set_index("open_time")[COLUMNS]
+
+def check_parity(py: pd.DataFrame, mt5: pd.DataFrame, atol: float = 1e-6, rtol: float = 1e-6,
+                 warmup: int = 300, ignore: Sequence[str] = ()) -> ParityReport:
+    """Both frames indexed by open_time with columns f0..f63."""
+    cols = [c for c in COLUMNS if c not in set(ignore)]
+    common = py.index[warmup:].intersection(mt5.index)
+    rep = ParityReport(rows_compared=len(common))
+    if not len(common): return rep
+    a = py.loc[common, cols].to_numpy(dtype=np.float64)
+    b = mt5.loc[common, cols].to_numpy(dtype=np.float64)
+    diff = np.abs(a - b)
+    bad = ~np.isclose(a, b, atol=atol, rtol=rtol)
+    rep.rows_mismatched = int(bad.any(axis=1).sum())
+    rep.max_abs_diff = {c: float(d) for c, d in zip(cols, diff.max(axis=0))}
+    rep.mismatches = {c: int(k) for c, k in zip(cols, bad.sum(axis=0)) if k}
+    if rep.rows_mismatched:
+        i, j = np.argwhere(bad)[0]
+        rep.first_mismatch = {"open_time": int(common[i]), "feature": cols[j], "mt5": float(b[i, j]), "python": float(a[i, j])}
+    return rep
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Compare EA-dumped feature vectors with the Python feature builder")
+    ap.add_argument("bars", help="CSV with time (server epoch s),open,high,low,close[,spread], oldest first")
+    ap.add_argument("dump", help="EA InpFeatureDumpFile CSV")
+    ap.add_argument("--symbol", required=True)
+    ap.add_argument("--point", type=float, default=0.0)
+    ap.add_argument("--calendar", default=None, help="calendar CSV (EA or data/news layout)")
+    ap.add_argument("--server-utc-offset", type=int, default=0, help="seconds, server time - UTC")
+    ap.add_argument("--atol", type=float, default=1e-6)
+    ap.add_argument("--rtol", type=float, default=1e-6)
+    ap.add_argument("--warmup", type=int, default=300)
+    ap.add_argument("--ignore", default="", help="comma-separated features, e.g. f14")
+    a = ap.parse_args()
+    cal = NewsIndex.from_csv(a.calendar) if a.calendar else None
+    py = build_features(pd.read_csv(a.bars), a.symbol, a.point, cal, a.server_utc_offset)
+    r = check_parity(py, load_mt5_dump(a.dump, a.symbol), a.atol, a.rtol, a.warmup,
+                     [s for s in a.ignore.split(",") if s])
+    print(json.dumps(asdict(r), indent=2))
+    sys.exit(0 if r.ok else 1)
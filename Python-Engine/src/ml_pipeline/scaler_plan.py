@@ -0,0 +1,82 @@
+# Compiled form of scaler.json for a given feature order.
+# - mean / inv_std are contiguous float32 arrays (categorical & unseen features: 0 / 1),
+#   so scaling a (n,) vector or a (B, n) batch is a single fused NumPy expression.
+# - feature_map requests are gathered with a precompiled getter over the feature order.
+# - save_npz / load_npz persist the compiled arrays (model_bundle's contract cache).
+from __future__ import annotations
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Any, Callable, Dict, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+@dataclass(frozen=True)
+class ScalerPlan:
+    order: Tuple[str, ...]
+    index: Dict[str, int]          # name -> column
+    mean: np.ndarray               # (n,) float32
+    inv_std: np.ndarray            # (n,) float32
+    categorical: np.ndarray        # (n,) bool
+    missing: Tuple[str, ...]       # features in `order` absent from scaler.json (left unscaled)
+    _getter: Callable[[Mapping[str, float]], Any]
+
+    @classmethod
+    def compile(cls, order: Sequence[str], scaler_cfg: Dict[str, Any]) -> "ScalerPlan":
+        n = len(order)
+        mean = np.zeros(n, dtype=np.float32)
+        inv_std = np.ones(n, dtype=np.float32)
+        categorical = np.zeros(n, dtype=bool)
+        missing: List[str] = []
+        feats = scaler_cfg.get("features", {})
+        for i, feat in enumerate(order):
+            meta = feats.get(feat, None)
+            if not meta:  # unseen: leave as is
+                missing.append(feat)
+                continue
+            if str(meta.get("type", "")).lower() == "category":
+                categorical[i] = True
+                continue
+            mean[i] = float(meta.get("mean", 0.0))
+            inv_std[i] = 1.0 / (float(meta.get("std", 1.0)) or 1.0)
+        return cls.from_arrays(order, mean, inv_std, categorical, missing)
+
+    @classmethod
+    def from_arrays(cls, order: Sequence[str], mean: np.ndarray, inv_std: np.ndarray,
+                    categorical: np.ndarray, missing: Sequence[str] = ()) -> "ScalerPlan":
+        order = tuple(str(f) for f in order)
+        mean = np.ascontiguousarray(mean, dtype=np.float32)
+        inv_std = np.ascontiguousarray(inv_std, dtype=np.float32)
+        categorical = np.ascontiguousarray(categorical, dtype=bool)
+        for a in (mean, inv_std, categorical): a.setflags(write=False)
+        getter = itemgetter(*order) if len(order) > 1 else (lambda m, _k=order[0]: (m[_k],))
+        return cls(order, {f: i for i, f in enumerate(order)}, mean, inv_std,
+                   categorical, tuple(str(f) for f in missing), getter)
+
+    # ---- precompiled contract cache (skips YAML/JSON parsing on warm starts) ----
+    def save_npz(self, path) -> None:
+        np.savez(path, order=np.array(self.order), mean=self.mean, inv_std=self.inv_std,
+                 categorical=self.categorical, missing=np.array(self.missing, dtype=str))
+
+    @classmethod
+    def load_npz(cls, path) -> "ScalerPlan":
+        with np.load(path, allow_pickle=False) as z:
+            return cls.from_arrays(z["order"].tolist(), z["mean"], z["inv_std"], z["categorical"], z["missing"].tolist())
+
+    @property
+    def n_features(self) -> int:
+        return len(self.order)
+
+    def scale(self, X: np.ndarray) -> np.ndarray:
+        out = np.subtract(X, self.mean, dtype=np.float32)
+        out *= self.inv_std
+        return out
+
+    def vector_from_map(self, feature_map: Mapping[str, float]) -> np.ndarray:
+        """Ordered float32 vector from a name->value map; KeyError names the first missing feature."""
+        try:
+            return np.asarray(self._getter(feature_map), dtype=np.float32)
+        except KeyError:
+            for name in self.order:
+                if name not in feature_map:
+                    raise KeyError(name) from None
+            raise
@@ -1,19 +1,62 @@
-import json, os, tempfile, shutil
-from typing import Dict
+import hashlib, json, os, tempfile, shutil
+from typing import Dict, Optional
 
 class ScalerVersionManager:
-    def __init__(self, path="Python-Engine/configs/scaler.json", registry="ML_Models/registry"):
-        self.path = path; self.registry = registry
+    """
+    Publishes scaler.json (and optionally model_id.txt and the ONNX model) atomically; the
+    inference server's bundle watcher picks up the change and hot-swaps. rollback() restores
+    the previous set. With model_file, every update backs up and registers the model it
+    deploys (registry/model_<id>.onnx), and rollback() refuses to restore an older scaler when
+    the model on disk is not the one the last update deployed.
+    """
+    def __init__(self, path="Python-Engine/configs/scaler.json", registry="ML_Models/registry",
+                 model_id_file: Optional[str] = None, model_file: Optional[str] = None):
+        self.path = path; self.registry = registry; self.model_id_file = model_id_file
+        self.model_file = model_file
         os.makedirs(registry, exist_ok=True)
 
-    def update_atomic(self, new_scaler: Dict, model_id: str):
-        tmp_fd, tmp_path = tempfile.mkstemp(prefix="scaler_", suffix=".json")
-        with os.fdopen(tmp_fd, 'w') as f: json.dump(new_scaler, f)
-        backup = f"{self.path}.bak"
-        if os.path.exists(self.path): shutil.copy2(self.path, backup)
-        os.replace(tmp_path, self.path)  # atomic on POSIX
+    @staticmethod
+    def _write_atomic(path: str, text: str):
+        # temp file in the target dir so os.replace never crosses filesystems
+        tmp_fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(os.path.abspath(path)))
+        with os.fdopen(tmp_fd, 'w') as f: f.write(text)
+        backup = f"{path}.bak"
+        if os.path.exists(path): shutil.copy2(path, backup)
+        os.replace(tmp_path, path)  # atomic on POSIX
+
+    @staticmethod
+    def _install_atomic(path: str, src: str):
+        # binary counterpart of _write_atomic (the ONNX model)
+        tmp_fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(os.path.abspath(path)))
+        os.close(tmp_fd)
+        shutil.copyfile(src, tmp_path)
+        if os.path.exists(path): shutil.copy2(path, f"{path}.bak")
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _sha256(path: str) -> Optional[str]:
+        if not os.path.exists(path): return None
+        with open(path, "rb") as f: return hashlib.sha256(f.read()).hexdigest()
+
+    def update_atomic(self, new_scaler: Dict, model_id: str, model_src: Optional[str] = None):
+        """model_src: new ONNX to deploy to model_file (default: keep the current one, still versioned)."""
+        if self.model_file and (model_src or os.path.exists(self.model_file)):
+            self._install_atomic(self.model_file, model_src or self.model_file)
+            shutil.copy2(self.model_file, f"{self.registry}/model_{model_id}.onnx")
+        self._write_atomic(self.path, json.dumps(new_scaler))
         shutil.copy2(self.path, f"{self.registry}/scaler_{model_id}.json")
+        if self.model_id_file:
+            self._write_atomic(self.model_id_file, model_id)
 
     def rollback(self):
-        bak = f"{self.path}.bak"
-        if os.path.exists(bak): os.replace(bak, self.path)
\ No newline at end of file
+        if self.model_file:
+            if not os.path.exists(f"{self.model_file}.bak"):
+                raise RuntimeError(f"no previous model backed up for {self.model_file}; refusing a scaler-only rollback")
+            if self.model_id_file and os.path.exists(self.model_id_file):
+                with open(self.model_id_file) as f: cur_id = f.read().strip()
+                if self._sha256(self.model_file) != self._sha256(f"{self.registry}/model_{cur_id}.onnx"):
+                    raise RuntimeError(f"{self.model_file} is not the model deployed as {cur_id}; refusing rollback")
+        for p in (self.path, self.model_id_file, self.model_file):
+            if not p: continue
+            bak = f"{p}.bak"
+            if os.path.exists(bak): os.replace(bak, p)
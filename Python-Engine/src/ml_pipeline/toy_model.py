@@ -0,0 +1,34 @@
+# Offline model bundle for tests and benchmarks: features.yaml + scaler.json + a logistic
+# meta_labeler.onnx (MatMul -> Sigmoid, dynamic batch dim) [+ model_id.txt].
+# Requires: numpy, onnx, pyyaml
+from __future__ import annotations
+import json
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+def write_toy_bundle(root: Path, n_features: int = 8, weight_scale: float = 1.0,
+                     model_id: Optional[str] = None) -> Dict[str, Any]:
+    """Layout: <root>/configs/{features.yaml, scaler.json}, <root>/ML_Models/{meta_labeler.onnx, model_id.txt}.
+    Feature f01 is categorical (unscaled); the rest have mean 0.5 / std 2.0."""
+    import onnx, yaml
+    from onnx import helper, numpy_helper, TensorProto
+
+    root = Path(root)
+    configs, models = root / "configs", root / "ML_Models"
+    configs.mkdir(parents=True, exist_ok=True); models.mkdir(parents=True, exist_ok=True)
+    names = [f"f{i:02d}" for i in range(n_features)]
+    (configs / "features.yaml").write_text(yaml.safe_dump({"meta_features": [{"name": n} for n in names]}))
+    scaler = {"features": {n: ({"type": "category"} if i == 1 else {"mean": 0.5, "std": 2.0})
+                           for i, n in enumerate(names)}}
+    (configs / "scaler.json").write_text(json.dumps(scaler))
+    W = numpy_helper.from_array((weight_scale * np.linspace(-1, 1, n_features)).astype(np.float32).reshape(-1, 1), "W")
+    graph = helper.make_graph(
+        [helper.make_node("MatMul", ["X", "W"], ["z"]), helper.make_node("Sigmoid", ["z"], ["p"])], "meta",
+        [helper.make_tensor_value_info("X", TensorProto.FLOAT, ["N", n_features])],
+        [helper.make_tensor_value_info("p", TensorProto.FLOAT, ["N", 1])], [W])
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)]); model.ir_version = 8
+    onnx.save(model, (models / "meta_labeler.onnx").as_posix())
+    if model_id is not None: (models / "model_id.txt").write_text(model_id)
+    return {"configs": configs, "models": models, "names": names, "scaler": scaler}
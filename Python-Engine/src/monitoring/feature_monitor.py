@@ -1,29 +1,154 @@
 # Production drift detector with PSI + alerts map.
+# - Baseline bins are deterministic and compiled once per features_version: equal-probability
+#   edges from training quantiles when the stats carry them, else from Normal(mean, std).
+# - Live data is binned for all features in one vectorized pass over the shortest (rows, features)
+#   suffix that holds each column's last `window` non-null values.
+# - Streaming mode (update()) keeps per-feature bin counts over the last `window` rows.
+# - Live data is a DataFrame or a {column: array} mapping, e.g. FeatureStore.read(...).columns
+#   (memory-mapped float32 slices, no DataFrame assembly).
 import numpy as np, pandas as pd
-from typing import Dict
+from dataclasses import dataclass
+from statistics import NormalDist
+from typing import Dict, List, Mapping, Optional, Sequence, Tuple
+
+MIN_ROWS = 100
+
+@dataclass(frozen=True)
+class DriftBaseline:
+    columns: Tuple[str, ...]
+    inner_edges: np.ndarray     # (F, bins-1) ascending
+    expected: np.ndarray        # (F, bins) proportions
+
+    @property
+    def bins(self) -> int:
+        return self.expected.shape[1]
+
+    @staticmethod
+    def compile(baseline_stats: Dict[str, Dict[str, float]], bins: int = 10) -> "DriftBaseline":
+        """
+        stats per column: {"mean", "std"} and optionally "quantiles" = the bins-1 training
+        quantiles at k/bins (k = 1..bins-1, inverted-CDF definition), which take precedence over
+        the Normal fit, plus optionally "proportions" = the training share of each resulting bin
+        (exact for discrete features; without it tied quantiles are read as point masses).
+        """
+        cols = tuple(baseline_stats)
+        edges = np.empty((len(cols), bins - 1)); exp = np.full((len(cols), bins), 1.0 / bins)
+        for i, c in enumerate(cols):
+            st = baseline_stats[c]
+            q = st.get("quantiles")
+            if q is not None and len(q) == bins - 1:
+                edges[i] = np.sort(np.asarray(q, dtype=np.float64))
+                if st.get("proportions") is not None:
+                    exp[i] = np.asarray(st["proportions"], dtype=np.float64) / np.sum(st["proportions"])
+                    continue
+                # repeated quantiles (discrete features): a run of edges tied at v starting at
+                # edge j1 (the (j1+1)/bins quantile) means a point mass at v, so P(X < v) = j1/bins
+                # rather than (j1+1)/bins; values == v land in the bin above the run, the bins
+                # inside it (and bin 0 when edges[0] is tied) stay empty
+                e = edges[i]
+                lo, hi = np.searchsorted(e, e, side="left"), np.searchsorted(e, e, side="right")
+                below = np.where(hi - lo > 1, lo, np.arange(1, bins)) / bins     # P(X < edge)
+                exp[i] = np.diff(np.r_[0.0, below, 1.0])
+            else:
+                nd = NormalDist(float(st.get("mean", 0.0)), max(1e-6, float(st.get("std", 1.0))))
+                edges[i] = [nd.inv_cdf(k / bins) for k in range(1, bins)]
+        return DriftBaseline(cols, edges, exp)
+
+    def bin_index(self, X: np.ndarray) -> np.ndarray:
+        """(rows, F) values -> (rows, F) int8 bin ids; -1 for NaN."""
+        X = np.asarray(X, dtype=np.float64)
+        idx = (X[:, :, None] >= self.inner_edges[None, :, :]).sum(axis=2, dtype=np.int8)
+        idx[np.isnan(X)] = -1
+        return idx
+
+    def counts(self, idx: np.ndarray) -> np.ndarray:
+        """(rows, F) bin ids -> (F, bins) counts, ignoring -1."""
+        F = idx.shape[1]
+        flat = (idx.astype(np.int64) + np.arange(F) * self.bins)[idx >= 0]
+        return np.bincount(flat, minlength=F * self.bins).reshape(F, self.bins)
+
+    def psi(self, counts: np.ndarray) -> np.ndarray:
+        """(F, bins) counts -> (F,) PSI; NaN where a column has fewer than MIN_ROWS values."""
+        n = counts.sum(axis=1, keepdims=True)
+        a = counts / (n + 1e-12); e = self.expected
+        out = np.sum((a - e) * np.log((a + 1e-12) / (e + 1e-12)), axis=1)
+        out[n[:, 0] < MIN_ROWS] = np.nan
+        return out
+
+_BASELINES: Dict[Tuple[str, int], DriftBaseline] = {}
+
+def baseline_for(features_version: Optional[str], baseline_stats, bins: int = 10) -> DriftBaseline:
+    """Compiled baseline, cached per features_version (None = no caching)."""
+    if features_version is None: return DriftBaseline.compile(baseline_stats, bins)
+    key = (features_version, bins)
+    if key not in _BASELINES: _BASELINES[key] = DriftBaseline.compile(baseline_stats, bins)
+    return _BASELINES[key]
 
 class FeatureDriftDetector:
-    def __init__(self, baseline_stats: Dict[str, Dict[str, float]], psi_warn=0.1, psi_crit=0.25):
+    def __init__(self, baseline_stats: Dict[str, Dict[str, float]], psi_warn=0.1, psi_crit=0.25,
+                 features_version: Optional[str] = None, bins: int = 10, window: int = 8192):
         self.baseline = baseline_stats
         self.psi_warn = psi_warn
         self.psi_crit = psi_crit
+        self.window = window
+        self.plan = baseline_for(features_version, baseline_stats, bins)
+        # streaming state: ring of bin ids + running counts
+        self._ring = np.full((window, len(self.plan.columns)), -1, dtype=np.int8)
+        self._pos = 0
+        self._counts = np.zeros((len(self.plan.columns), self.plan.bins), dtype=np.int64)
 
-    @staticmethod
-    def _psi(expected: np.ndarray, actual: np.ndarray, bins: int = 10) -> float:
-        e_hist, b = np.histogram(expected, bins=bins)
-        a_hist, _ = np.histogram(actual, bins=b)
-        e = e_hist / (e_hist.sum() + 1e-12)
-        a = a_hist / (a_hist.sum() + 1e-12)
-        return float(np.sum((a - e) * np.log((a + 1e-12) / (e + 1e-12))))
-
-    def check(self, live: pd.DataFrame) -> Dict[str, str]:
-        alerts: Dict[str,str] = {}
-        for col, stats in self.baseline.items():
-            if col not in live.columns: continue
-            e = np.random.normal(stats.get("mean",0.0), max(1e-6, stats.get("std",1.0)), size=8192)
-            a = live[col].dropna().values[-8192:]
-            if a.size < 100: continue
-            score = self._psi(e, a)
-            if score > self.psi_crit: alerts[col] = "CRITICAL"
-            elif score > self.psi_warn: alerts[col] = "WARNING"
-        return alerts
\ No newline at end of file
+    def _matrix(self, live) -> Tuple[np.ndarray, List[bool]]:
+        if isinstance(live, pd.DataFrame):
+            col = lambda c: pd.to_numeric(live[c], errors="coerce").to_numpy(dtype=np.float64)
+            names, n = live.columns, len(live)
+        else:
+            col = lambda c: np.asarray(live[c], dtype=np.float64)
+            names, n = live, (len(next(iter(live.values()))) if len(live) else 0)
+        present = [c in names for c in self.plan.columns]
+        X = np.full((n, len(present)), np.nan)
+        for j, c in enumerate(self.plan.columns):
+            if present[j]: X[:, j] = col(c)
+        return X, present
+
+    def _alerts(self, scores: np.ndarray, present: Sequence[bool]) -> Dict[str, str]:
+        alerts: Dict[str, str] = {}
+        for c, s, ok in zip(self.plan.columns, scores, present):
+            if not ok or not s == s: continue
+            if s > self.psi_crit: alerts[c] = "CRITICAL"
+            elif s > self.psi_warn: alerts[c] = "WARNING"
+        return alerts
+
+    def psi_scores(self, live: "pd.DataFrame | Mapping[str, np.ndarray]") -> Dict[str, float]:
+        """PSI per baseline column over its last `window` non-null live values."""
+        return dict(zip(self.plan.columns, self._batch_psi(self._matrix(live)[0]).tolist()))
+
+    def _batch_psi(self, X: np.ndarray) -> np.ndarray:
+        tail = X[-self.window:]
+        if np.isnan(tail).any():   # sparse columns: shortest suffix holding every column's window
+            from_end = np.cumsum(~np.isnan(X[::-1]), axis=0)          # non-null values in the last r+1 rows
+            need = np.minimum(from_end[-1], self.window)
+            k = int((from_end < need).sum(axis=0).max()) + 1
+            tail = np.where(from_end[k - 1::-1] <= self.window, X[-k:], np.nan)
+        return self.plan.psi(self.plan.counts(self.plan.bin_index(tail)))
+
+    def check(self, live: "pd.DataFrame | Mapping[str, np.ndarray]") -> Dict[str, str]:
+        X, present = self._matrix(live)
+        return self._alerts(self._batch_psi(X), present)
+
+    # ---------- streaming ----------
+    def update(self, rows) -> None:
+        """Append rows ((n, F) in baseline column order, a DataFrame or a column mapping) to the sliding window."""
+        X = self._matrix(rows)[0] if isinstance(rows, (pd.DataFrame, Mapping)) else np.atleast_2d(np.asarray(rows, dtype=np.float64))
+        idx = self.plan.bin_index(X[-self.window:])
+        n = idx.shape[0]
+        slots = (self._pos + np.arange(n)) % self.window
+        self._counts -= self.plan.counts(self._ring[slots])
+        self._ring[slots] = idx
+        self._counts += self.plan.counts(idx)
+        self._pos = (self._pos + n) % self.window
+
+    def window_scores(self) -> Dict[str, float]:
+        return dict(zip(self.plan.columns, self.plan.psi(self._counts).tolist()))
+
+    def window_alerts(self) -> Dict[str, str]:
+        return self._alerts(self.plan.psi(self._counts), [True] * len(self.plan.columns))
@@ -1,18 +1,107 @@
-import time, os, shutil, requests
+# Health probes. The module functions keep their signatures; HealthChecker is the cheap path:
+# - inference ping over one pooled keep-alive requests.Session (no TCP/HTTP setup per probe),
+# - data freshness from a FileWatcher table (inotify / polling fallback) instead of a stat()
+#   per path per probe; the publisher manifest is parsed when it changes, not on every probe.
+import time, os, json, shutil, threading, requests
+from requests.adapters import HTTPAdapter
 
-def ping_inference_server(url="http://127.0.0.1:8081/health", timeout=0.5) -> bool:
+from execution.file_watcher import FileWatcher
+
+_LOCAL = threading.local()   # sessions die with their thread (no table keyed by reusable thread ids)
+
+def http_session(pool: int = 4) -> requests.Session:
+    """Per-thread keep-alive session (requests.Session is not safe to share across threads)."""
+    sessions = getattr(_LOCAL, "sessions", None)
+    if sessions is None: sessions = _LOCAL.sessions = {}
+    s = sessions.get(pool)
+    if s is None:
+        s = sessions[pool] = requests.Session()
+        s.trust_env = False   # no proxy / netrc lookups per request
+        s.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool, max_retries=0))
+    return s
+
+def ping_inference_server(url="http://127.0.0.1:8081/health", timeout=0.5, session=None) -> bool:
     try:
-        r = requests.get(url, timeout=timeout)
+        r = (session or http_session()).get(url, timeout=timeout)
         return r.status_code == 200
     except Exception:
         return False
 
-def check_data_staleness(paths, max_age_sec=120):
+def _manifest_fresh(files, paths, max_age_sec, now):
+    for p in paths:
+        entry = files.get(os.path.basename(p))
+        if entry is None or now - float(entry.get("checked_epoch", 0)) > max_age_sec: return False
+    return True
+
+def _read_manifest_files(manifest):
+    try:
+        with open(manifest) as f: return json.load(f).get("files", {})
+    except (OSError, ValueError):
+        return None
+
+def check_data_staleness(paths, max_age_sec=120, manifest=None):
+    """
+    With `manifest` (Files/manifest.json written by FilePublisher) freshness is the last
+    publish check per file from one read, so unchanged-but-republished files are not stale.
+    """
     now = time.time()
+    if manifest is not None:
+        files = _read_manifest_files(manifest)
+        return files is not None and _manifest_fresh(files, paths, max_age_sec, now)
     for p in paths:
         if not os.path.exists(p): return False
         if now - os.path.getmtime(p) > max_age_sec: return False
     return True
 
 def check_disk_space(path="/", min_gb=5.0):
-    return shutil.disk_usage(path).free/1e9 > min_gb
\ No newline at end of file
+    return shutil.disk_usage(path).free/1e9 > min_gb
+
+class HealthChecker:
+    """
+    One object per probe loop: sweep() -> {"inference", "data", "disk", "ok"}.
+    The watcher is shared when given (e.g. the snapshot agent's), else started here.
+    """
+    def __init__(self, url="http://127.0.0.1:8081/health", paths=(), max_age_sec=120, manifest=None,
+                 watcher=None, timeout=0.5, disk_path="/", min_gb=5.0, disk_every_s=10.0):
+        self.url, self.timeout, self.max_age_sec = url, timeout, max_age_sec
+        self.paths = [os.fspath(p) for p in paths]
+        self.manifest = os.fspath(manifest) if manifest is not None else None
+        self.disk_path, self.min_gb, self.disk_every_s = disk_path, min_gb, disk_every_s
+        self._own_watcher = watcher is None
+        self.watcher = watcher if watcher is not None else FileWatcher()
+        self._manifest_files = None
+        if self.manifest is not None:
+            self._load_manifest()
+            self.watcher.watch([self.manifest], self._load_manifest)
+        else:
+            self.watcher.watch(self.paths)
+        if self._own_watcher: self.watcher.start()
+        self._disk = (0.0, True)   # (checked monotonic, ok)
+
+    def _load_manifest(self):
+        self._manifest_files = _read_manifest_files(self.manifest)
+
+    def ping(self) -> bool:
+        return ping_inference_server(self.url, self.timeout)
+
+    def data_fresh(self, now=None) -> bool:
+        now = time.time() if now is None else now
+        if self.manifest is not None:
+            files = self._manifest_files
+            return files is not None and _manifest_fresh(files, self.paths, self.max_age_sec, now)
+        return all(self.watcher.age(p, now) <= self.max_age_sec for p in self.paths)
+
+    def disk_ok(self) -> bool:
+        # free space moves slowly; statvfs at most every disk_every_s
+        t, ok = self._disk
+        if time.monotonic() - t >= self.disk_every_s:
+            ok = check_disk_space(self.disk_path, self.min_gb); self._disk = (time.monotonic(), ok)
+        return ok
+
+    def sweep(self) -> dict:
+        out = {"inference": self.ping(), "data": self.data_fresh(), "disk": self.disk_ok()}
+        out["ok"] = all(out.values())
+        return out
+
+    def close(self):
+        if self._own_watcher: self.watcher.stop()
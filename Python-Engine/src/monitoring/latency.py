@@ -0,0 +1,117 @@
+# Low-overhead latency histograms (HDR-style log-linear buckets) + Prometheus text export.
+# - Values are integer microseconds; bucket width is <= 1/64 of the value (SUB_BITS = 7),
+#   exact below 128 us. record() is one bit_length + a list increment under a lock.
+# - Histograms are cumulative since start (like Prometheus summaries); snapshot() gives
+#   count/mean/max and p50/p90/p99/p999 for JSON status files.
+from __future__ import annotations
+import threading, time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+SUB_BITS = 7
+_SUB = 1 << SUB_BITS
+_HALF = _SUB >> 1
+MAX_US = (1 << 36) - 1       # ~19 h; larger values land in the top bucket
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+
+def bucket_index(v: int) -> int:
+    if v < _SUB: return v if v > 0 else 0
+    shift = v.bit_length() - SUB_BITS
+    return _SUB + (shift - 1) * _HALF + ((v >> shift) - _HALF)
+
+def bucket_upper(i: int) -> int:
+    """Highest value that maps to bucket i."""
+    if i < _SUB: return i
+    shift, m = divmod(i - _SUB, _HALF)
+    shift += 1
+    return ((m + _HALF + 1) << shift) - 1
+
+_N_BUCKETS = bucket_index(MAX_US) + 1
+
+class LatencyHistogram:
+    def __init__(self):
+        self._counts: List[int] = [0] * _N_BUCKETS
+        self._lock = threading.Lock()
+        self.count = 0; self.sum_us = 0; self.max_us = 0
+
+    def record(self, us) -> None:
+        v = int(us)
+        v = 0 if v < 0 else (MAX_US if v > MAX_US else v)
+        i = bucket_index(v)
+        with self._lock:
+            self._counts[i] += 1
+            self.count += 1; self.sum_us += v
+            if v > self.max_us: self.max_us = v
+
+    def quantiles(self, qs=QUANTILES) -> Dict[float, int]:
+        with self._lock:
+            counts = np.array(self._counts, dtype=np.int64); n = self.count; mx = self.max_us
+        if n == 0: return {q: 0 for q in qs}
+        cum = np.cumsum(counts)
+        # rank ceil(q*n) as in HdrHistogram, reported as the bucket's highest equivalent value
+        idx = np.searchsorted(cum, [max(1, int(np.ceil(q * n))) for q in qs])
+        return {q: min(bucket_upper(int(i)), mx) for q, i in zip(qs, idx)}
+
+    def snapshot(self) -> Dict[str, float]:
+        q = self.quantiles()
+        return {"count": self.count, "mean_us": round(self.sum_us / self.count, 1) if self.count else 0.0,
+                "max_us": self.max_us, "p50_us": q[0.5], "p90_us": q[0.9], "p99_us": q[0.99], "p999_us": q[0.999]}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+class LatencyRegistry:
+    """Named histograms with Prometheus-style labels, e.g. hist("infer_stage_latency_us", stage="scale")."""
+    def __init__(self):
+        self._h: Dict[Tuple[str, LabelKey], LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def hist(self, name: str, **labels: str) -> LatencyHistogram:
+        key = (name, tuple(sorted(labels.items())))
+        h = self._h.get(key)
+        if h is None:
+            with self._lock:
+                h = self._h.setdefault(key, LatencyHistogram())
+        return h
+
+    @contextmanager
+    def time(self, name: str, **labels: str) -> Iterator[None]:
+        t0 = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.hist(name, **labels).record((time.perf_counter_ns() - t0) // 1000)
+
+    def snapshot(self, name: Optional[str] = None) -> Dict[str, Dict[str, float]]:
+        """{"name{k=v,...}": snapshot} (labels only in the key when `name` is None)."""
+        out = {}
+        for (n, labels), h in list(self._h.items()):
+            if name is not None and n != name: continue
+            lab = ",".join(f"{k}={v}" for k, v in labels)
+            key = lab if name is not None else (f"{n}{{{lab}}}" if lab else n)
+            out[key] = h.snapshot()
+        return out
+
+    def render_prometheus(self) -> str:
+        lines: List[str] = []
+        by_name: Dict[str, List[Tuple[LabelKey, LatencyHistogram]]] = {}
+        for (n, labels), h in list(self._h.items()):
+            by_name.setdefault(n, []).append((labels, h))
+        for n in sorted(by_name):
+            series = sorted(by_name[n], key=lambda x: x[0])
+            lines.append(f"# TYPE {n} summary")
+            for labels, h in series:
+                base = ",".join(f'{k}="{v}"' for k, v in labels)
+                for q, v in h.quantiles().items():
+                    lines.append(f'{n}{{{base}{"," if base else ""}quantile="{q}"}} {v}')
+                lab = f"{{{base}}}" if base else ""
+                lines.append(f"{n}_sum{lab} {h.sum_us}")
+                lines.append(f"{n}_count{lab} {h.count}")
+            lines.append(f"# TYPE {n}_max gauge")
+            for labels, h in series:
+                base = ",".join(f'{k}="{v}"' for k, v in labels)
+                lines.append(f"{n}_max{{{base}}} {h.max_us}" if base else f"{n}_max {h.max_us}")
+        return "\n".join(lines) + "\n"
+
+LATENCY = LatencyRegistry()  # process-wide default
@@ -1,28 +1,140 @@
-from collections import deque
+from bisect import bisect_right
+from typing import Dict, Optional, Tuple
 import numpy as np
 
+class _Fenwick:
+    """Prefix counts over [0, n) buckets."""
+    def __init__(self, n: int):
+        self.n = n; self.t = [0] * (n + 1)
+
+    def add(self, i: int, d: int) -> None:
+        i += 1
+        while i <= self.n:
+            self.t[i] += d; i += i & -i
+
+    def prefix(self, i: int) -> int:
+        """Count in buckets [0, i)."""
+        s = 0
+        while i > 0:
+            s += self.t[i]; i -= i & -i
+        return s
+
 class ModelDecayMonitor:
     """
     Tracks live calibration & performance drift; triggers retrain when thresholds violated.
+    Sliding-window state is kept incrementally, so update() is O(log resolution) and reading
+    auc/ece costs O(10):
+    - AUC (Mann-Whitney, strict p_pos > p_neg): per-class Fenwick trees over probabilities
+      quantized to `auc_resolution` buckets and a running count of concordant pairs.
+      Pairs falling in the same bucket count as ties.
+    - ECE: per-bin running sums over the same 10 bins as np.digitize(p, linspace(0,1,11))-1
+      (p == 1.0 or outside [0, 1) is in no bin but still counts toward the window size).
     """
-    def __init__(self, window=2000, auc_floor=0.55, ece_ceiling=0.08):
-        self.y_true = deque(maxlen=window)
-        self.y_prob = deque(maxlen=window)
+    MIN_SAMPLES = 200
+    RESYNC_EVERY = 100_000  # re-derive the float ECE sums from the window to bound drift
+    _EDGES = np.linspace(0, 1, 11).tolist()
+
+    def __init__(self, window=2000, auc_floor=0.55, ece_ceiling=0.08, auc_resolution: int = 1 << 16):
+        self.window = window
         self.auc_floor = auc_floor
         self.ece_ceiling = ece_ceiling
+        self.res = auc_resolution
+        self._y = np.zeros(window, dtype=np.int8)
+        self._p = np.zeros(window, dtype=np.float64)
+        self._pos = 0; self.n = 0
+        self._trees = (_Fenwick(auc_resolution), _Fenwick(auc_resolution))  # (neg, pos)
+        self._class_n = [0, 0]
+        self._pairs = 0                                # concordant (pos > neg) pairs in window
+        self._bin_n = np.zeros(10, dtype=np.int64)
+        self._bin_p = np.zeros(10); self._bin_y = np.zeros(10)
+        self._since_sync = 0
+
+    def _bucket(self, p: float) -> int:
+        return min(max(int(p * self.res), 0), self.res - 1)
+
+    @classmethod
+    def _bin(cls, p: float) -> int:
+        b = bisect_right(cls._EDGES, p) - 1
+        return b if 0 <= b < 10 else -1
+
+    def _apply(self, y: int, p: float, sign: int) -> None:
+        k = self._bucket(p)
+        neg, pos = self._trees
+        if y == 1: self._pairs += sign * neg.prefix(k)
+        else: self._pairs += sign * (self._class_n[1] - pos.prefix(k + 1))
+        self._trees[y].add(k, sign); self._class_n[y] += sign
+        b = self._bin(p)
+        if b >= 0:
+            self._bin_n[b] += sign; self._bin_p[b] += sign * p; self._bin_y[b] += sign * y
 
     def update(self, y_true: int, y_prob: float):
-        self.y_true.append(int(y_true)); self.y_prob.append(float(y_prob))
+        y = 1 if int(y_true) else 0; p = float(y_prob)
+        if self.n == self.window:
+            self._apply(int(self._y[self._pos]), float(self._p[self._pos]), -1)
+        else:
+            self.n += 1
+        # add after removal so the evicted sample never pairs with the new one
+        self._apply(y, p, +1)
+        self._y[self._pos] = y; self._p[self._pos] = p
+        self._pos = (self._pos + 1) % self.window
+        self._since_sync += 1
+        if self._since_sync >= self.RESYNC_EVERY: self._resync_bins()
+
+    def update_many(self, y_true, y_prob) -> None:
+        """Batch replay, e.g. y_prob = FeatureStore.read(..., columns=["p_win"])["p_win"] joined to outcomes;
+        only the last `window` pairs can survive, so earlier ones are skipped."""
+        y = np.asarray(y_true)[-self.window:]; p = np.asarray(y_prob, dtype=np.float64)[-self.window:]
+        for yi, pi in zip(y.tolist(), p.tolist()): self.update(yi, pi)
+
+    def _resync_bins(self) -> None:
+        y = self._y[:self.n] if self.n < self.window else self._y
+        p = self._p[:self.n] if self.n < self.window else self._p
+        idx = np.digitize(p, self._EDGES) - 1
+        sel = (idx >= 0) & (idx < 10)
+        self._bin_n = np.bincount(idx[sel], minlength=10).astype(np.int64)
+        self._bin_p = np.bincount(idx[sel], weights=p[sel], minlength=10)
+        self._bin_y = np.bincount(idx[sel], weights=y[sel].astype(np.float64), minlength=10)
+        self._since_sync = 0
+
+    @property
+    def auc(self) -> float:
+        return self._pairs / (self._class_n[1] * self._class_n[0] + 1e-9)
+
+    @property
+    def ece(self) -> float:
+        # sum_b |mean_p - mean_y| * n_b / n  ==  sum_b |sum_p - sum_y| / n
+        if self.n == 0: return 0.0
+        return float(np.abs(self._bin_p - self._bin_y)[self._bin_n > 0].sum() / self.n)
+
+    def metrics(self) -> Dict[str, float]:
+        return {"n": self.n, "auc": self.auc, "ece": self.ece, "retrain": self.should_retrain()}
 
     def should_retrain(self) -> bool:
-        if len(self.y_true) < 200: return False
-        y = np.array(self.y_true); p = np.array(self.y_prob)
-        # Tiny AUC proxy (Mann–Whitney U)
-        auc = (np.sum(p[y==1][:,None] > p[y==0][None,:]) / (np.sum(y==1)*np.sum(y==0)+1e-9))
-        # ECE (naive)
-        bins = np.linspace(0,1,11); idx = np.digitize(p, bins)-1
-        ece = 0.0
-        for b in range(10):
-            sel = (idx==b);
-            if sel.any(): ece += abs(p[sel].mean() - y[sel].mean()) * (sel.mean())
-        return (auc < self.auc_floor) or (ece > self.ece_ceiling)
\ No newline at end of file
+        if self.n < self.MIN_SAMPLES: return False
+        return (self.auc < self.auc_floor) or (self.ece > self.ece_ceiling)
+
+class DecayRegistry:
+    """One ModelDecayMonitor per (symbol, model_id), created on first update."""
+    def __init__(self, **monitor_kwargs):
+        self.monitor_kwargs = monitor_kwargs
+        self.monitors: Dict[Tuple[str, str], ModelDecayMonitor] = {}
+
+    def get(self, symbol: str, model_id: str) -> ModelDecayMonitor:
+        key = (symbol, model_id)
+        m = self.monitors.get(key)
+        if m is None: m = self.monitors[key] = ModelDecayMonitor(**self.monitor_kwargs)
+        return m
+
+    def update(self, symbol: str, model_id: str, y_true: int, y_prob: float) -> ModelDecayMonitor:
+        m = self.get(symbol, model_id); m.update(y_true, y_prob)
+        return m
+
+    def update_many(self, symbol: str, model_id: str, y_true, y_prob) -> ModelDecayMonitor:
+        m = self.get(symbol, model_id); m.update_many(y_true, y_prob)
+        return m
+
+    def metrics(self, symbol: Optional[str] = None) -> Dict[Tuple[str, str], Dict[str, float]]:
+        return {k: m.metrics() for k, m in self.monitors.items() if symbol is None or k[0] == symbol}
+
+    def needs_retrain(self):
+        return [k for k, m in self.monitors.items() if m.should_retrain()]
@@ -0,0 +1,35 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+# src/ is the import root (execution.*, monitoring.*, ml_pipeline.*, data.*)
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+def write_model_fixture(root: Path, n_features: int = 8, weight_scale: float = 1.0) -> dict:
+    """features.yaml + scaler.json + logistic-regression meta_labeler.onnx with a dynamic batch dim."""
+    pytest.importorskip("onnx")
+    from ml_pipeline.toy_model import write_toy_bundle
+    return write_toy_bundle(root, n_features, weight_scale)
+
+def make_ticks(n: int = 6000, seed: int = 3):
+    """Bid/ask ticks from Fri 18:00 UTC across the weekend close, Sunday reopen and a NY DST switch,
+    with 25 spikes and 10 crossed quotes."""
+    import numpy as np, pandas as pd
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2025-03-07 18:00", periods=n, freq="37s", tz="UTC")
+    mid = 1.08 * np.exp(np.cumsum(rng.normal(0, 2e-5, n)))
+    mid[rng.choice(n, 25, replace=False)] *= 1.01                # spikes
+    spread = np.full(n, 1e-4); spread[rng.choice(n, 10, replace=False)] = -1e-4  # crossed quotes
+    return pd.DataFrame({"bid": mid - spread / 2, "ask": mid + spread / 2}, index=idx)
+
+@pytest.fixture(autouse=True)
+def _infer_cache_in_tmp(tmp_path, monkeypatch):
+    # the server's contract/ORT cache defaults to Python-Engine/.cache; tests never write there
+    monkeypatch.setenv("INFER_CACHE_DIR", str(tmp_path / "infer_cache"))
+
+@pytest.fixture
+def model_fixture(tmp_path):
+    return write_model_fixture(tmp_path)
@@ -0,0 +1,50 @@
+# Offline stand-in for the MetaTrader5 package: deterministic bars on a settable clock.
+import sys, types
+import numpy as np
+
+_DT = np.dtype([("time", "<i8"), ("open", "<f8"), ("high", "<f8"), ("low", "<f8"), ("close", "<f8"),
+                ("tick_volume", "<u8"), ("spread", "<i4"), ("real_volume", "<u8")])
+
+class FakeMT5(types.ModuleType):
+    TIMEFRAME_M1, TIMEFRAME_M5, TIMEFRAME_H1 = 1, 5, 0x4001
+
+    def __init__(self, now_s: int = 1_735_603_200, digits: int = 5):
+        super().__init__("MetaTrader5")
+        self.now_s = now_s; self.digits = digits
+        self.calls = []          # (symbol, timeframe, pos, count)
+        self.fail = set()        # symbols whose fetch returns None
+        self.delay = {}          # symbol -> seconds to sleep inside copy_rates_from_pos
+
+    def initialize(self): return True
+    def last_error(self): return (-1, "fake error")
+
+    @staticmethod
+    def _tf_s(tf): return tf * 60 if tf < 0x4000 else (tf & 0xFF) * 3600
+
+    def copy_rates_from_pos(self, symbol, timeframe, pos, count):
+        self.calls.append((symbol, timeframe, pos, count))
+        if symbol in self.delay:
+            import time; time.sleep(self.delay[symbol])
+        if symbol in self.fail: return None
+        tfs = self._tf_s(timeframe)
+        cur = self.now_s // tfs                       # index of the forming bar
+        idx = np.arange(cur - pos - count + 1, cur - pos + 1, dtype=np.int64)
+        t = idx * tfs
+        seed = sum(map(ord, symbol))
+        out = np.zeros(idx.size, dtype=_DT)
+        out["time"] = t
+        out["close"] = 1.0 + 0.01 * np.sin((idx + seed) / 97.0)
+        out["open"] = out["close"] - 1e-4; out["high"] = out["close"] + 2e-4; out["low"] = out["close"] - 3e-4
+        out["spread"] = ((idx * 7919 + seed) % 23) + 2
+        out["tick_volume"] = 10
+        return out
+
+    def symbol_info(self, symbol):
+        cur = self.copy_rates_from_pos(symbol, self.TIMEFRAME_M1, 0, 1)
+        self.calls.pop()
+        return types.SimpleNamespace(point=10.0 ** -self.digits, digits=self.digits, spread=int(cur["spread"][0]))
+
+def install(**kw) -> FakeMT5:
+    fake = FakeMT5(**kw)
+    sys.modules["MetaTrader5"] = fake
+    return fake
@@ -0,0 +1,57 @@
+import numpy as np, pandas as pd, pytest
+
+from execution.broker_adapter import BrokerAdapter, SWAP_METHODS, pip_size
+
+MAPPING = {"symbols": {"EURUSD.r": "EURUSD", "XAUUSD.m": "XAUUSD"},
+           "digits": {"XAUUSD": 2, "US500": 1}, "contract_size": {"XAUUSD": 100.0, "US500": 1.0},
+           "swap_method": {"XAUUSD": "currency_deposit"}, "pip_value": {"US500": 1.0}}
+
+def test_spec_table_matches_ea_pip_logic():
+    b = BrokerAdapter(MAPPING, symbols=["GBPJPY"])
+    # EA PipValue(): 3/5 digits -> 10 points
+    assert pip_size([5, 3, 2, 4]).tolist() == pytest.approx([1e-4, 1e-2, 1e-2, 1e-4])
+    assert b.pip_value("EURUSD.r") == pytest.approx(1e-4) and b.pip_value("GBPJPY") == pytest.approx(0.01)
+    assert b.pip_value("USDJPY") == pytest.approx(0.01)           # unmapped: appended with defaults
+    assert b.pip_value("XAUUSD.m") == pytest.approx(0.01) and b.pip_value("US500") == 1.0
+    assert b.contract_size("XAUUSD") == 100.0 and b.contract_size("EURUSD") == 100000.0
+    assert b.swap_method("XAUUSD") == "currency_deposit" and b.swap_method("EURUSD") == "points"
+    assert b.normalize_symbol("EURUSD.r") == "EURUSD" and b.symbol_id("EURUSD.r") == b.symbol_id("EURUSD")
+    ids_before = dict(b.specs.ids)
+    b.symbol_id("NZDCAD")
+    assert {k: b.specs.ids[k] for k in ids_before} == ids_before    # ids stay stable as the table grows
+    with pytest.raises(ValueError):
+        BrokerAdapter({"swap_method": {"EURUSD": "weekly"}})
+    assert SWAP_METHODS[1] == "points"
+
+def test_batch_conversions_match_scalar_loop():
+    b = BrokerAdapter(MAPPING)
+    rng = np.random.default_rng(0)
+    syms = rng.choice(["EURUSD.r", "USDJPY", "XAUUSD.m", "GBPUSD"], 1000)
+    pts = rng.integers(0, 50, 1000)
+    loop = [p * 10.0 ** -(2 if s.startswith("XAU") else (3 if "JPY" in s else 5)) / b.pip_value(s) for s, p in zip(syms, pts)]
+    assert np.allclose(b.points_to_pips(pts, syms), loop)
+    assert np.allclose(b.points_to_pips(pts, b.symbol_ids(syms)), loop)
+
+    rates = {"JPY": 1 / 150.0}
+    pnl = b.pnl_account([0.0010, 0.50, 2.0], [1.0, 2.0, 0.5], ["EURUSD", "USDJPY", "XAUUSD"], rates)
+    assert pnl.tolist() == pytest.approx([100.0, 2 * 0.5 * 100000 / 150.0, 100.0])
+    assert np.isnan(b.pnl_account([1.0], [1.0], ["EURGBP"]))[0]     # GBP rate unknown
+    assert b.pip_value_account([1.0], ["EURUSD"]).tolist() == pytest.approx([10.0])
+
+def test_annotate_trades_orders_and_ticks():
+    b = BrokerAdapter(MAPPING)
+    trades = pd.DataFrame({"symbol": ["EURUSD.r", "USDJPY", "EURUSD"], "order_type": ["BUY", "SELL", "SELL_LIMIT"],
+                           "price_open": [1.1000, 150.00, 1.1000], "price_close": [1.1025, 149.50, 1.0990],
+                           "volume": [1.0, 0.5, 2.0]})
+    t = b.annotate(trades, rates={"JPY": 1 / 150.0})
+    assert t["pnl_pips"].tolist() == pytest.approx([25.0, 50.0, 10.0])
+    assert t["pnl_account"].tolist() == pytest.approx([250.0, 0.5 * 0.5 * 100000 / 150.0, 200.0])
+
+    orders = pd.DataFrame({"symbol": ["EURUSD", "USDJPY"], "order_type": [0, 1],   # MT5 ORDER_TYPE_BUY / SELL
+                           "intended_price": [1.1000, 150.000], "fill_price": [1.10003, 149.990]})
+    assert b.annotate(orders)["slippage_pips"].tolist() == pytest.approx([0.3, 1.0])
+
+    ticks = pd.DataFrame({"symbol": ["EURUSD", "XAUUSD"], "bid": [1.10000, 2400.10], "ask": [1.10012, 2400.45]})
+    assert b.annotate(ticks)["spread_pips"].tolist() == pytest.approx([1.2, 35.0])
+    bars = pd.DataFrame({"symbol": ["EURUSD", "USDJPY"], "spread": [12, 15]})
+    assert b.annotate(bars)["spread_pips"].tolist() == pytest.approx([1.2, 1.5])
@@ -0,0 +1,37 @@
+import time, pandas as pd
+from concurrent.futures import ThreadPoolExecutor
+
+import fake_mt5
+from execution.concurrent_fetch import ConcurrentFetcher
+
+def test_deadline_keeps_last_good_and_skips_hung_key():
+    f = ConcurrentFetcher(ThreadPoolExecutor(4))
+    assert f.run({"a": lambda: 1.0, "b": lambda: 2.0}, time.monotonic() + 1) == {"a": 1.0, "b": 2.0}
+    def boom(): raise RuntimeError("x")
+    t0 = time.monotonic()
+    out = f.run({"a": boom, "b": lambda: time.sleep(0.5) or 3.0}, time.monotonic() + 0.05)
+    assert time.monotonic() - t0 < 0.3
+    assert out == {"a": 1.0, "b": 2.0}                       # last good
+    assert f.stats["a"].failed == 1 and f.stats["b"].timed_out == 1
+    f.run({"b": lambda: 4.0}, time.monotonic() + 0.05)        # still hung: not resubmitted
+    assert "still running" in f.stats["b"].last_error
+    time.sleep(0.5)
+    assert f.stats["b"].last_ms >= 450                        # late fetch latency still recorded
+    assert f.run({"b": lambda: 4.0}, time.monotonic() + 1) == {"b": 4.0}
+
+def test_cross_snapshot_published_by_deadline(tmp_path, monkeypatch):
+    fake = fake_mt5.install()
+    from execution import mt5_snapshot_agent as agent
+    monkeypatch.setattr(agent, "mt5", fake)
+    monkeypatch.setattr(agent, "FILES_DIR", tmp_path)
+    first = agent.write_cross_snapshot()
+    assert all(v != 0.0 for v in first.values())
+
+    fake.delay["XAUUSD"] = 0.6; fake.fail.add("US500")
+    t0 = time.monotonic()
+    out = agent.write_cross_snapshot(deadline=time.monotonic() + 0.2)
+    assert time.monotonic() - t0 < 0.5
+    assert out["gold_ret_60m"] == first["gold_ret_60m"] and out["spx_ret_60m"] == first["spx_ret_60m"]
+    assert pd.read_csv(tmp_path / "cross_snapshot.csv").shape == (1, 5)
+    stats = agent.fetch_stats()["cross"]
+    assert stats["US500"].failed >= 1 and stats["XAUUSD"].timed_out >= 1 and stats["DXY"].last_ms > 0
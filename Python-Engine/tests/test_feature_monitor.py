@@ -0,0 +1,69 @@
+import numpy as np, pandas as pd, pytest
+
+from monitoring.feature_monitor import DriftBaseline, FeatureDriftDetector, baseline_for
+
+STATS = {"a": {"mean": 0.0, "std": 1.0}, "b": {"mean": 5.0, "std": 2.0},
+         "c": {"mean": 0.0, "std": 1.0, "quantiles": [0, 0, 0, 0, 0, 0, 1, 1, 1],
+               "proportions": [0, 0, 0, 0, 0, 0, 0.6, 0, 0, 0.4]}}
+
+def _live(rng, n, shift_b=0.0):
+    return pd.DataFrame({"a": rng.normal(0, 1, n), "b": rng.normal(5 + shift_b, 2, n),
+                         "c": (rng.random(n) < 0.4).astype(float)})
+
+def test_deterministic_and_matches_per_column_histogram():
+    rng = np.random.default_rng(1)
+    live = _live(rng, 20_000, shift_b=1.5)
+    live.loc[::7, "a"] = np.nan
+    det = FeatureDriftDetector(STATS)
+    assert det.check(live) == det.check(live) == {"b": "CRITICAL"}
+    plan = det.plan
+    for j, col in enumerate(plan.columns[:2]):
+        a = live[col].dropna().to_numpy()[-8192:]
+        expect = np.histogram(a, bins=np.r_[-np.inf, plan.inner_edges[j], np.inf])[0]
+        X = np.full((a.size, 3), np.nan); X[:, j] = a
+        assert plan.counts(plan.bin_index(X))[j].tolist() == expect.tolist()
+    assert det.psi_scores(live)["c"] < 0.01   # discrete column matching its quantiles
+
+def test_batch_psi_bins_only_each_columns_window(monkeypatch):
+    rng = np.random.default_rng(4)
+    live = _live(rng, 50_000, shift_b=0.5)
+    live.loc[live.index % 5 != 0, "a"] = np.nan    # sparse: its last 1000 values span the last 5000 rows
+    live.loc[:, "c"] = np.nan
+    det = FeatureDriftDetector(STATS, window=1000)
+    plan, rows, bin_index = det.plan, [], DriftBaseline.bin_index
+    monkeypatch.setattr(DriftBaseline, "bin_index", lambda self, X: rows.append(len(X)) or bin_index(self, X))
+    scores = det.psi_scores(live)
+    counts = np.zeros((3, plan.bins), dtype=np.int64)
+    for j, col in enumerate(plan.columns):
+        a = live[col].dropna().to_numpy()[-1000:]
+        counts[j] = np.histogram(a, bins=np.r_[-np.inf, plan.inner_edges[j], np.inf])[0]
+    np.testing.assert_allclose([scores[c] for c in plan.columns[:2]], plan.psi(counts)[:2])
+    assert np.isnan(scores["c"]) and rows == [5000]
+    det.psi_scores(live.assign(a=1.0, c=1.0))        # dense data: exactly `window` rows
+    assert rows[-1] == 1000
+
+def test_tied_quantiles_without_proportions_match_discrete_data():
+    c = np.random.default_rng(3).permutation(np.r_[np.zeros(6000), np.ones(4000)])[:, None]
+    q = np.quantile(c, np.arange(1, 10) / 10, method="inverted_cdf")
+    assert q.tolist() == STATS["c"]["quantiles"]
+    plan = DriftBaseline.compile({"c": {"quantiles": q}})
+    e = plan.expected[0]
+    assert e.sum() == pytest.approx(1.0) and e[[0, 1, 2, 3, 4, 5, 7, 8]].sum() == 0   # bins live values never reach
+    assert e[6] == pytest.approx(0.6) and e[9] == pytest.approx(0.4)
+    assert plan.psi(plan.counts(plan.bin_index(c)))[0] < 0.01
+    np.testing.assert_allclose(DriftBaseline.compile({"x": {"quantiles": [1, 2, 3, 4, 5, 6, 7, 8, 9]}}).expected, 0.1)
+
+def test_baseline_cached_per_features_version():
+    assert baseline_for("fv1", STATS) is baseline_for("fv1", {"x": {}})
+    assert baseline_for("fv2", STATS) is not baseline_for("fv1", STATS)
+
+def test_streaming_window_matches_batch():
+    rng = np.random.default_rng(2)
+    det = FeatureDriftDetector(STATS, window=1000)
+    live = _live(rng, 2500, shift_b=1.0)
+    for lo in range(0, 2500, 333):
+        det.update(live.iloc[lo:lo + 333])
+    assert det.window_scores() == pytest.approx(det.psi_scores(live.iloc[-1000:]))
+    assert det.window_alerts() == det.check(live.iloc[-1000:]) != {}
+    det.update(live[list(det.plan.columns)].to_numpy()[:50])
+    assert det.window_scores() != pytest.approx(det.psi_scores(live.iloc[-1000:]))
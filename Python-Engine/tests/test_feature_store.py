@@ -0,0 +1,106 @@
+import importlib, sys
+import numpy as np, pandas as pd, pytest
+
+from data.feature_store import FeatureStore, FeatureStoreWriter, TIME_FILE, parse_correlation_id, parse_open_time
+
+T0 = 1735603200          # 2024-12-31 00:00 UTC
+COLS = [f"f{i}" for i in range(64)]
+
+def _rows(n, start=T0, step=900, seed=0):
+    return start + step * np.arange(n, dtype=np.int64), np.random.default_rng(seed).normal(size=(n, 64)).astype(np.float32)
+
+def test_append_partitions_and_memmap_reads(tmp_path):
+    st = FeatureStore(tmp_path)
+    st.create("fv1", COLS + ["p_win"])
+    t, X = _rows(300)                                   # ~3.1 days of M15
+    assert st.append("fv1", "EURUSD", t, {**{c: X[:, j] for j, c in enumerate(COLS)}}) == 300
+    parts = st.partitions("fv1", "EURUSD")
+    assert [p.path.name for p in parts] == ["2024-12-31", "2025-01-01", "2025-01-02", "2025-01-03"]
+    assert sum(p.rows for p in parts) == 300
+
+    one = st.read("fv1", "EURUSD", T0 + 86400, T0 + 2 * 86400 - 1, columns=["f3", "p_win"])
+    assert isinstance(one["f3"], np.memmap) and len(one) == 96          # a single day: zero-copy
+    assert np.array_equal(one["f3"], X[96:192, 3]) and np.isnan(one["p_win"]).all()
+    blk = st.read("fv1", "EURUSD", "2024-12-31T06:00:00", T0 + 2 * 86400 + 3600)
+    sel = (t >= T0 + 6 * 3600) & (t <= T0 + 2 * 86400 + 3600)
+    assert np.array_equal(blk.times, t[sel]) and np.array_equal(blk.matrix(COLS), X[sel])
+    assert list(blk.frame().columns) == COLS + ["p_win"] and st.versions() == ["fv1"] and st.symbols("fv1") == ["EURUSD"]
+
+    # replays / retries are skipped, newer rows appended
+    assert st.append("fv1", "EURUSD", t[-10:], np.c_[X[-10:], np.zeros(10)]) == 0
+    t2, X2 = _rows(5, start=int(t[-1]) + 900, seed=1)
+    assert st.append("fv1", "EURUSD", t2, np.c_[X2, np.full(5, 0.6)]) == 5
+    assert st.read("fv1", "EURUSD", int(t2[0]))["p_win"].tolist() == pytest.approx([0.6] * 5)
+
+    with pytest.raises(ValueError):
+        st.create("fv1", COLS)
+    with pytest.raises(KeyError):
+        st.append("fv2", "EURUSD", t, X)
+
+def test_torn_append_is_ignored_then_repaired(tmp_path):
+    st = FeatureStore(tmp_path); st.create("fv", ["a", "b"])
+    st.append("fv", "GBPUSD", [T0, T0 + 60], {"a": [1, 2], "b": [3, 4]})
+    part = st.partitions("fv", "GBPUSD")[0].path
+    with open(part / "a.f4", "ab") as f: f.write(np.float32(9).tobytes())     # crash after one column
+    with open(part / TIME_FILE, "ab") as f: f.write(b"\x01\x02")               # ... and half a timestamp
+    assert st.read("fv", "GBPUSD")["a"].tolist() == [1, 2]
+    assert st.append("fv", "GBPUSD", [T0 + 120], {"a": [5], "b": [6]}) == 1
+    blk = st.read("fv", "GBPUSD")
+    assert blk.times.tolist() == [T0, T0 + 60, T0 + 120] and blk["a"].tolist() == [1, 2, 5] and blk["b"].tolist() == [3, 4, 6]
+
+def test_writer_monitors_and_builder_frame(tmp_path):
+    from monitoring.feature_monitor import FeatureDriftDetector
+    from monitoring.model_decay import ModelDecayMonitor
+
+    assert parse_correlation_id("EURUSD-1735603200") == ("EURUSD", T0) and parse_correlation_id("x") == (None, None)
+    assert parse_open_time("2024-12-31 00:00:00") == T0 == parse_open_time(str(T0))
+    st = FeatureStore(tmp_path)
+    w = FeatureStoreWriter(st, flush_s=0.01)
+    t, X = _rows(200)
+    for i in range(200):
+        assert w.add("fvw", COLS, "USDJPY", int(t[i]), X[i], {"p_win": 0.5 + i / 1000})
+    assert not w.add("fvw", COLS, None, None, X[0])
+    w.close()
+    assert w.stats()["written"] == 200 and w.stats()["skipped"] == 1 and w.stats()["errors"] == 0
+    blk = st.read("fvw", "USDJPY")
+    assert st.schema("fvw") == tuple(COLS) + ("p_win",) and np.array_equal(blk.matrix(COLS), X)
+
+    det = FeatureDriftDetector({c: {"mean": 0.0, "std": 1.0} for c in COLS[:8]}, bins=10)
+    assert det.psi_scores(blk.columns) == det.psi_scores(blk.frame())
+    det.update(blk.columns); assert not det.window_alerts()
+
+    y = (np.random.default_rng(5).random(200) < blk["p_win"]).astype(int)
+    a, b = ModelDecayMonitor(window=150), ModelDecayMonitor(window=150)
+    a.update_many(y, blk["p_win"])
+    for yi, pi in zip(y, blk["p_win"]): b.update(int(yi), float(pi))
+    assert a.metrics() == b.metrics()
+
+    df = pd.DataFrame(X[:10], columns=COLS, index=pd.Index(t[:10], name="open_time"))
+    assert st.append_frame("fvb", "EURUSD", df) == 10
+    assert np.array_equal(st.read("fvb", "EURUSD").matrix(), X[:10])
+
+def test_server_appends_scored_vectors(model_fixture, tmp_path, monkeypatch):
+    TestClient = pytest.importorskip("fastapi.testclient").TestClient
+    monkeypatch.setenv("INFER_CONFIGS_DIR", str(model_fixture["configs"]))
+    monkeypatch.setenv("INFER_MODELS_DIR", str(model_fixture["models"]))
+    monkeypatch.setenv("INFER_BIN_PORT", "0"); monkeypatch.setenv("INFER_WATCH_SEC", "0")
+    monkeypatch.setenv("FEATURE_STORE_DIR", str(tmp_path / "fs")); monkeypatch.setenv("INFER_BATCH_WINDOW_MS", "2")
+    sys.modules.pop("execution.inference_server", None)
+    srv = importlib.import_module("execution.inference_server")
+    try:
+        with TestClient(srv.app) as c:
+            n = srv.BUNDLES.current.n_features; fv = srv.BUNDLES.current.features_version
+            assert c.post("/infer", json={"correlation_id": f"EURUSD-{T0}", "features": [0.1] * n}).status_code == 200
+            assert c.post("/infer/batch", json={"requests": [
+                {"correlation_id": "a", "symbol": "EURUSD", "open_time": str(T0 + 900), "features": [0.2] * n},
+                {"correlation_id": "no-context", "features": [0.3] * n}]}).status_code == 200
+            srv.FEATURE_LOG.flush()
+            assert c.get("/version").json()["feature_store"]["skipped"] == 1
+            batcher = srv.BATCHER
+        assert srv.FEATURE_LOG is None and srv.BATCHER is None and not batcher._thread.is_alive()
+    finally:
+        sys.modules.pop("execution.inference_server", None)
+    blk = FeatureStore(tmp_path / "fs").read(fv, "EURUSD")
+    assert blk.times.tolist() == [T0, T0 + 900]
+    assert blk[model_fixture["names"][0]].tolist() == pytest.approx([0.1, 0.2])
+    assert ((blk["p_win"] > 0) & (blk["p_win"] < 1)).all()
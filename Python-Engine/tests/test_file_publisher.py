@@ -0,0 +1,66 @@
+import json, multiprocessing, os, time
+
+from execution.file_publisher import FilePublisher, read_manifest
+from monitoring.health_checks import check_data_staleness
+
+def test_unchanged_content_is_not_rewritten(tmp_path):
+    pub = FilePublisher(tmp_path)
+    assert pub.publish_text("a.csv", "x,y\n1,2\n") is True
+    st = os.stat(tmp_path / "a.csv")
+    m1 = read_manifest(tmp_path)["files"]["a.csv"]
+    time.sleep(0.01)
+    assert pub.publish_text("a.csv", "x,y\n1,2\n") is False
+    st2 = os.stat(tmp_path / "a.csv")
+    assert (st2.st_ino, st2.st_mtime_ns) == (st.st_ino, st.st_mtime_ns)
+    m2 = read_manifest(tmp_path)["files"]["a.csv"]
+    assert m2["seq"] == m1["seq"] == 1 and m2["checked_epoch"] > m1["checked_epoch"]
+
+    assert pub.publish_text("a.csv", "x,y\n1,3\n") is True
+    m3 = read_manifest(tmp_path)
+    assert m3["files"]["a.csv"]["seq"] == 2 and m3["files"]["a.csv"]["sha256"] != m1["sha256"]
+    assert (tmp_path / "a.csv").read_text() == "x,y\n1,3\n"
+    assert [p.name for p in tmp_path.iterdir() if p.name.startswith(".")] == []  # no temp leftovers
+
+def test_manifest_survives_restart_and_external_edits(tmp_path):
+    FilePublisher(tmp_path).publish_json("s.json", {"a": 1})
+    pub = FilePublisher(tmp_path)
+    assert pub.publish_json("s.json", {"a": 1}) is False
+    (tmp_path / "s.json").write_text('{"a": 2}')          # edited by hand
+    assert pub.publish_json("s.json", {"a": 1}) is True
+    assert json.loads((tmp_path / "s.json").read_text()) == {"a": 1}
+
+def test_staleness_from_manifest(tmp_path):
+    pub = FilePublisher(tmp_path)
+    pub.publish_text("a.csv", "1"); pub.publish_text("b.csv", "2")
+    paths = [tmp_path / "a.csv", tmp_path / "b.csv"]
+    man = tmp_path / "manifest.json"
+    assert check_data_staleness(paths, 60, manifest=man)
+    os.utime(paths[0], (0, 0))                               # old mtime, but republished recently
+    assert check_data_staleness(paths, 60, manifest=man) and not check_data_staleness(paths, 60)
+    assert not check_data_staleness(paths + [tmp_path / "c.csv"], 60, manifest=man)
+    m = json.loads(man.read_text()); m["files"]["b.csv"]["checked_epoch"] -= 120
+    man.write_text(json.dumps(m))
+    assert not check_data_staleness(paths, 60, manifest=man)
+
+def test_publishers_in_other_processes_keep_each_others_entries(tmp_path):
+    # two instances = two processes' caches (snapshot agent + DataSynchronizer)
+    agent, sync = FilePublisher(tmp_path), FilePublisher(tmp_path)
+    agent.publish_text("cross_snapshot.csv", "1")
+    sync.publish_json("sync_status.json", {"a": 1})
+    agent.publish_text("spread_percentiles.csv", "2")
+    sync.publish_json("sync_status.json", {"a": 2})
+    m = read_manifest(tmp_path)
+    assert set(m["files"]) == {"cross_snapshot.csv", "spread_percentiles.csv", "sync_status.json"}
+    assert m["seq"] == 4 and m["files"]["sync_status.json"]["seq"] == 2
+    ctx = multiprocessing.get_context("spawn")
+    procs = [ctx.Process(target=_publish_many, args=(str(tmp_path), f"p{i}.csv")) for i in range(3)]
+    for p in procs: p.start()
+    _publish_many(str(tmp_path), "main.csv")
+    for p in procs: p.join(60)
+    m = read_manifest(tmp_path)
+    assert {f"p{i}.csv" for i in range(3)} | {"main.csv", "cross_snapshot.csv"} <= set(m["files"])
+    assert m["seq"] == 4 + 4 * 20 and m["files"]["p0.csv"]["seq"] == 20
+
+def _publish_many(d, name):
+    pub = FilePublisher(d)
+    for i in range(20): pub.publish_text(name, str(i))
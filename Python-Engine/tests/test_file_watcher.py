@@ -0,0 +1,133 @@
+import gc, os, shutil, sys, threading, time, weakref
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd, pytest
+
+import fake_mt5
+from execution.file_publisher import FilePublisher, _write_atomic
+from execution.file_watcher import FileWatcher
+from monitoring.health_checks import HealthChecker, http_session, ping_inference_server
+
+BACKENDS = ["poll"] + (["inotify"] if sys.platform.startswith("linux") else [])
+
+def _wait(cond, timeout=3.0):
+    deadline = time.monotonic() + timeout
+    while not cond() and time.monotonic() < deadline: time.sleep(0.005)
+    return cond()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_changes_fire_debounced_callbacks_and_update_table(tmp_path, backend):
+    a, b, late = tmp_path / "a.csv", tmp_path / "b.csv", tmp_path / "sub" / "c.csv"
+    a.write_text("1"); b.write_text("1")
+    w = FileWatcher(poll_s=0.02, rescan_s=0.05, backend=backend)
+    hits = {"ab": 0, "late": 0}
+    w.watch([a, b], lambda: hits.__setitem__("ab", hits["ab"] + 1), debounce_s=0.1)
+    w.watch([late], lambda: hits.__setitem__("late", hits["late"] + 1))
+    assert w.backend == backend and w.state(a).exists and w.age(late) == float("inf")
+    w.start()
+    try:
+        _write_atomic(a, b"22"); b.write_text("333")            # one deploy touching both files
+        assert _wait(lambda: hits["ab"] == 1)
+        time.sleep(0.15)
+        assert hits["ab"] == 1 and w.state(a).size == 2 and w.state(b).size == 3
+        assert w.age(a) < 5
+
+        os.unlink(b)
+        assert _wait(lambda: not w.state(b).exists) and _wait(lambda: hits["ab"] == 2)
+        late.parent.mkdir(); late.write_text("x")              # dir created after watch()
+        assert _wait(lambda: hits["late"] == 1) and w.state(late).exists
+    finally:
+        w.stop()
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify")
+def test_inotify_propagates_without_polling(tmp_path):
+    p = tmp_path / "slow.csv"; p.write_text("x")
+    seen = threading.Event()
+    w = FileWatcher(poll_s=60, rescan_s=60, backend="inotify")
+    w.watch([p], seen.set)
+    w.start()
+    try:
+        time.sleep(0.05)
+        t0 = time.monotonic(); _write_atomic(p, b"y")
+        assert seen.wait(1.0) and time.monotonic() - t0 < 0.2 and w.events > 0
+    finally:
+        w.stop()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_concurrent_watch_while_dirs_come_and_go(tmp_path, backend):
+    w = FileWatcher(poll_s=0.01, rescan_s=0.01, backend=backend).start()
+    try:
+        def add(i):
+            d = tmp_path / f"d{i}"; d.mkdir()
+            for j in range(5):
+                w.watch([d / f"f{j}.csv"])
+                if j == 2: shutil.rmtree(d); d.mkdir()          # IN_IGNORED on the watcher thread
+        ts = [threading.Thread(target=add, args=(i,)) for i in range(8)]
+        for t in ts: t.start()
+        for t in ts: t.join()
+        time.sleep(0.05)
+        with w._dir_lock:
+            assert {d: wd for wd, d in w._by_wd.items() if w._dirs.get(d) == wd} == w._dirs
+        (tmp_path / "d3" / "f4.csv").write_text("x")
+        assert _wait(lambda: w.state(tmp_path / "d3" / "f4.csv").exists)
+    finally:
+        w.stop()
+
+def test_http_session_is_per_thread_and_dies_with_it():
+    main = http_session()
+    assert http_session() is main and http_session(8) is not main
+    box = []
+    t = threading.Thread(target=lambda: box.append(weakref.ref(http_session()))); t.start(); t.join()
+    gc.collect()
+    assert box[0]() is None
+
+class _Health(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive
+    connections = 0
+    def setup(self):
+        type(self).connections += 1; super().setup()
+    def do_GET(self):
+        self.send_response(200); self.send_header("Content-Length", "2"); self.end_headers(); self.wfile.write(b"ok")
+    def log_message(self, *a): pass
+
+def test_health_sweep_pooled_and_table_backed(tmp_path):
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), _Health)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    pub = FilePublisher(tmp_path)
+    pub.publish_text("a.csv", "1"); pub.publish_text("b.csv", "2")
+    w = FileWatcher(poll_s=0.02, rescan_s=0.05)
+    hc = HealthChecker(f"http://127.0.0.1:{srv.server_port}/health", [tmp_path / "a.csv", tmp_path / "b.csv"],
+                       max_age_sec=60, manifest=tmp_path / "manifest.json", watcher=w.start())
+    try:
+        assert hc.sweep() == {"inference": True, "data": True, "disk": hc.disk_ok(), "ok": hc.disk_ok()}
+        for _ in range(20): hc.ping()
+        assert _Health.connections == 1                          # one keep-alive connection
+        t0 = time.perf_counter()
+        for _ in range(100): hc.data_fresh()
+        assert (time.perf_counter() - t0) / 100 < 1e-3
+        assert not hc.data_fresh(now=time.time() + 120)
+        pub.publish_text("c.csv", "3")
+        hc.paths.append(os.fspath(tmp_path / "c.csv"))
+        assert _wait(lambda: hc.data_fresh())                     # manifest re-read on change
+        assert not ping_inference_server("http://127.0.0.1:1/health", 0.2)
+    finally:
+        hc.close(); w.stop(); srv.shutdown(); srv.server_close()
+
+def test_snapshot_agent_syncs_sources_on_change(tmp_path, monkeypatch):
+    fake_mt5.install()
+    from execution import mt5_snapshot_agent as agent
+    data, files = tmp_path / "data", tmp_path / "Files"
+    (data / "slow").mkdir(parents=True); (data / "news").mkdir()
+    monkeypatch.setattr(agent, "DATA_DIR", data); monkeypatch.setattr(agent, "FILES_DIR", files)
+    monkeypatch.setattr(agent, "WATCH_DEBOUNCE_S", 0.0)
+    monkeypatch.setattr(agent, "_NEWS", {"key": None, "index": None, "csv": None, "table": None})
+    w = agent.start_source_watcher(FileWatcher(poll_s=0.02, rescan_s=0.05))
+    try:
+        pd.DataFrame({"k": ["a"], "v": [1.0]}).to_csv(data / "slow" / "slow_factors_latest.csv", index=False)
+        assert _wait(lambda: (files / "slow_factors.csv").exists())
+        pd.DataFrame({"utc_ts": [int(time.time()) + 600], "currency": ["USD"], "impact": ["High"],
+                      "title": ["NFP"]}).to_csv(data / "news" / "calendar.csv", index=False)
+        assert _wait(lambda: (files / "news_index.bin").exists() and (files / "calendar.csv").exists())
+        assert pd.read_csv(files / "calendar.csv").shape[0] == 1
+    finally:
+        w.stop()
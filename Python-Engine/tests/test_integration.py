@@ -1,22 +1,161 @@
 import time, numpy as np, pandas as pd
 
+def _mt5_reference(bars, t, symbol, events):
+    """Bar-by-bar transcription of the MT5 indicator sources + FeatureExtractor.Build for bar t."""
+    o, h, l, c = (bars[k].to_numpy(float) for k in ("open", "high", "low", "close"))
+    N = t  # the EA sees closed bars 0..t-1 plus the forming bar t
+    def ema(x, n):
+        a = 2.0 / (n + 1); y = [x[0]]
+        for v in x[1:]: y.append(v * a + y[-1] * (1 - a))
+        return y
+    tr = [0.0] + [max(h[i], c[i - 1]) - min(l[i], c[i - 1]) for i in range(1, N)]
+    atr = [sum(tr[i - 13:i + 1]) / 14 if i >= 14 else 0.0 for i in range(N)]
+    i1 = N - 1
+    mid = sum(c[i1 - 19:i1 + 1]) / 20
+    sd = (sum((c[j] - mid) ** 2 for j in range(i1 - 19, i1 + 1)) / 20) ** 0.5
+    up, lo = mid + 2 * sd, mid - 2 * sd
+    e20, e50, e200 = (ema(c[:N], n)[-1] for n in (20, 50, 200))
+    pos = neg = 0.0
+    for i in range(1, N):
+        d = c[i] - c[i - 1]; p_, n_ = max(d, 0.0), max(-d, 0.0)
+        if i <= 14: pos += p_ / 14; neg += n_ / 14
+        else: pos = (pos * 13 + p_) / 14; neg = (neg * 13 + n_) / 14
+    rsi = 100 - 100 / (1 + pos / neg) if neg else (100.0 if pos else 50.0)
+    pdi = ndi = adx = 0.0; a = 2.0 / 15
+    for i in range(1, N):
+        tp_, tn_ = max(h[i] - h[i - 1], 0.0), max(l[i - 1] - l[i], 0.0)
+        if tp_ > tn_: tn_ = 0.0
+        elif tp_ < tn_: tp_ = 0.0
+        else: tp_ = tn_ = 0.0
+        r = max(abs(h[i] - l[i]), abs(h[i] - c[i - 1]), abs(l[i] - c[i - 1]))
+        pd_, nd_ = (100 * tp_ / r, 100 * tn_ / r) if r else (0.0, 0.0)
+        pdi = pd_ * a + pdi * (1 - a); ndi = nd_ * a + ndi * (1 - a)
+        dx = 100 * abs((pdi - ndi) / (pdi + ndi)) if pdi + ndi else 0.0
+        adx = dx * a + adx * (1 - a)
+    tp = (h + l + c) / 3; sp = tp[i1 - 13:i1 + 1].mean()
+    dd = sum(abs(tp[j] - sp) for j in range(i1 - 13, i1 + 1)) * 0.015 / 14
+    cci = (tp[i1] - sp) / dd if dd else 0.0
+    main = [f - s for f, s in zip(ema(c[:N], 12), ema(c[:N], 26))]
+    sig = sum(main[-9:]) / 9
+    def k_at(i):
+        sl = sh = 0.0
+        for j in range(i - 2, i + 1):
+            ll, hh = l[j - 4:j + 1].min(), h[j - 4:j + 1].max()
+            sl += c[j] - ll; sh += hh - ll
+        return 100.0 if sh == 0 else sl / sh * 100
+    k = k_at(i1); dk = sum(k_at(i) for i in range(i1 - 2, i1 + 1)) / 3
+    c0, c1, c5 = o[t], c[t - 1], c[t - 5]
+    f = [0.0] * 64
+    f[0], f[1] = c0 / c1 - 1, c0 / c5 - 1
+    f[2] = atr[i1]; f[4] = max(0.0, up - lo); f[3] = f[4] / f[2]
+    f[5] = 1.0 if e50 > e200 else (-1.0 if e50 < e200 else 0.0)
+    f[6], f[7], f[8], f[9], f[10], f[12], f[13] = adx, rsi, cci, main[-1], sig, k, dk
+    f[14] = bars["spread"].iloc[t] * 1e-5
+    ts = int(bars["time"].iloc[t]); hr = (ts % 86400) // 3600
+    f[15] = hr; f[16] = pd.Timestamp(ts, unit="s").isoweekday() % 7; f[17] = 0 if hr < 7 else (1 if hr < 13 else 2)
+    f[18] = (c0 - mid) / max(1e-8, (up - lo) * 0.5); f[19] = c0 / e20 - 1
+    f[20], f[22], f[23] = 0, 1, 0
+    f[21] = min([9999.0] + [(e - ts) / 60 for e in events if e >= ts])
+    win = [v for v in atr[max(0, N - 60):N] if v > 0]
+    f[24] = atr[i1] / (sum(win) / len(win))
+    return f
+
 def test_feature_parity_mt5_python():
     """
     Given a known bar (H1), MT5 FeatureExtractor and Python feature builder
     must emit IDENTICAL vectors (within tolerance).
     """
-    # TODO: load sample from both producers, align by open_time, compare elementwise
+    from ml_pipeline.feature_builder import COLUMNS, build_features
+    from ml_pipeline.feature_parity import check_parity
+
+    rng = np.random.default_rng(3)
+    n = 400
+    close = 1.10 + np.cumsum(rng.normal(0, 8e-4, n))
+    open_ = np.concatenate(([close[0]], close[:-1])) + rng.normal(0, 1e-4, n)
+    high = np.maximum(open_, close) + rng.uniform(0, 6e-4, n)
+    low = np.minimum(open_, close) - rng.uniform(0, 6e-4, n)
+    high[50] = high[49]; low[50] = low[49]   # exercise the tie branches (equal +DM/-DM)
+    t0 = 1735603200 - 300 * 3600
+    bars = pd.DataFrame({"time": t0 + 3600 * np.arange(n), "open": open_, "high": high, "low": low,
+                         "close": close, "spread": rng.integers(5, 20, n)})
+    cal = pd.DataFrame({"utc_ts": [1735603200, 1735606800, 1735610400, t0 + 3600 * 350 + 900],
+                        "impact": ["HIGH", "MEDIUM", "HIGH", "high"], "currency": ["USD", "EUR", "GBP", "ALL"],
+                        "title": ["NFP", "ECB", "BoE", "x"]})
+    py = build_features(bars, "EURUSD", point=1e-5, calendar=cal,
+                        cross=pd.DataFrame([{"dxy_ret_60m": 0.001, "spx_ret_60m": np.nan}]))
+    assert list(py.columns[:64]) == COLUMNS and {"dxy_ret_60m", "spx_ret_60m"} <= set(py.columns)
+    assert (py["spx_ret_60m"] == 0.0).all()
+    assert (py.iloc[:, 25:64] == 0).all().all() and (py["f11"] == 0).all()
+
+    events = [t0 + 3600 * 350 + 900]          # only ALL applies to EUR (USD/GBP/MEDIUM don't)
+    rows = [260, 300, 349, 350, 351, 399]
+    ref = pd.DataFrame([_mt5_reference(bars, t, "EURUSD", events) for t in rows], columns=COLUMNS,
+                       index=py.index[rows])
+    rep = check_parity(py[COLUMNS], ref, atol=1e-9, rtol=1e-9, warmup=0)
+    assert rep.ok and rep.rows_compared == len(rows), rep
+    assert py["f21"].iloc[350] == 15.0 and py["f21"].iloc[351] == 9999.0
+
+    ref.iloc[2, 7] += 1e-3                    # the checker must catch a drifted RSI
+    bad = check_parity(py[COLUMNS], ref, atol=1e-6, warmup=0)
+    assert not bad.ok and bad.mismatches == {"f7": 1} and bad.first_mismatch["feature"] == "f7"
+    assert check_parity(py[COLUMNS], ref, atol=1e-6, warmup=0, ignore=["f7"]).ok
 
-def test_prediction_round_trip():
+def test_prediction_round_trip(model_fixture):
     """
-    Simulate MT5 -> ZeroMQ -> Python -> MT5 with latency & timeout.
+    Simulate MT5 -> binary socket -> Python -> MT5 with latency & timeout.
     Assert correlation_id comes back, size multiplier within [0, 1.5].
     """
-    # TODO: mock ZeroMQ server with 50-150ms jitter
+    import random, socket, pytest
+    pytest.importorskip("onnxruntime")
+    from execution.binary_transport import BinaryInferenceServer, BinaryInferenceClient
+    from execution.model_bundle import BundleManager, BundlePaths
+
+    fx = model_fixture
+    bundle = BundleManager(BundlePaths(fx["configs"] / "features.yaml", fx["configs"] / "scaler.json",
+                                       fx["models"] / "meta_labeler.onnx", fx["models"] / "model_id.txt")).current
+    rng = random.Random(7)
+    def score(corr, vec):
+        if vec.shape[0] != bundle.n_features:
+            raise ValueError(f"Feature length {vec.shape[0]} != expected {bundle.n_features}")
+        time.sleep(rng.uniform(0.05, 0.15))  # 50-150ms jitter
+        return float(bundle.predict(bundle.plan.scale(vec).reshape(1, -1))[0]), bundle.model_id, bundle.features_version
+
+    srv = BinaryInferenceServer("127.0.0.1", 0, score).start()
+    try:
+        with BinaryInferenceClient(port=srv.port, timeout=1.0) as cl:
+            for i in range(5):
+                corr = f"EURUSD-{1735603200 + 900 * i}"
+                r = cl.predict(corr, np.random.default_rng(i).normal(size=bundle.n_features))
+                assert r.ok and r.correlation_id == corr and r.model_id == bundle.model_id
+                # EA sizing: rr = TP/SL = 30/15, prob_mult clamped to [0.5, 1.5]
+                edge = r.p_win - (1.0 - r.p_win) / 2.0
+                prob_mult = max(0.50, min(1.50, 0.25 + 0.5 * edge / 0.10))
+                assert 0.0 <= prob_mult <= 1.5
+            bad = cl.predict("short", [1.0, 2.0])
+            assert not bad.ok and "Feature length" in bad.message
+        with BinaryInferenceClient(port=srv.port, timeout=0.01) as cl, pytest.raises(socket.timeout):
+            cl.predict("slow", np.zeros(bundle.n_features))
+    finally:
+        srv.stop()
 
 def test_concurrent_multi_symbol():
     """
     10 symbols issuing inference within 50ms windows.
     Ensure no deadlocks; service remains responsive < 500ms p99.
     """
-    # TODO
\ No newline at end of file
+    import pytest
+    pytest.importorskip("onnxruntime"); pytest.importorskip("fastapi"); pytest.importorskip("onnx")
+    from execution.load_test import BenchConfig, compare, run_benchmark
+
+    cfg = BenchConfig(drivers=("inproc", "loopback"), transports=("json", "binary"), requests=200, concurrency=10,
+                      jitter_ms=50.0, warmup=20, n_features=8, batch_size=4)
+    t0 = time.monotonic()
+    rep = run_benchmark(cfg)
+    assert time.monotonic() - t0 < 60
+    assert {(r["driver"], r["transport"]) for r in rep["results"]} == {("inproc", "json"), ("loopback", "json"), ("loopback", "binary")}
+    for r in rep["results"]:
+        for kind, v in r["kinds"].items():
+            assert v["errors"] == 0 and v["requests"] > 0, (r["driver"], r["transport"], kind)
+            assert v["latency_us"]["p99_us"] < 500_000
+    assert rep["server_stages_us"]["path=/infer,stage=ort"]["count"] > 0
+    assert compare(rep, rep) == []
\ No newline at end of file
@@ -0,0 +1,64 @@
+import importlib, json, sys
+import numpy as np, pytest
+
+from monitoring.latency import LatencyHistogram, LatencyRegistry, bucket_index, bucket_upper
+
+def test_buckets_cover_values_with_bounded_error():
+    for v in [0, 1, 127, 128, 129, 255, 256, 1000, 123_456, 10**9]:
+        i = bucket_index(v)
+        assert bucket_upper(i - 1) < v <= bucket_upper(i) if i else v == 0
+        assert bucket_upper(i) - v <= max(1, v // 64)
+
+def test_quantiles_match_numpy_within_bucket_error():
+    rng = np.random.default_rng(0)
+    xs = rng.lognormal(5, 1.2, 50_000).astype(int)
+    h = LatencyHistogram()
+    for x in xs: h.record(x)
+    q = h.quantiles()
+    for p in (0.5, 0.99, 0.999):
+        ref = np.quantile(xs, p, method="inverted_cdf")
+        assert ref <= q[p] <= ref * (1 + 1 / 64) + 1
+    assert h.count == xs.size and h.max_us == xs.max() and q[0.999] <= h.max_us
+
+def test_prometheus_render_and_sync_status(tmp_path, monkeypatch):
+    reg = LatencyRegistry()
+    with reg.time("infer_stage_latency_us", path="/infer", stage="ort"): pass
+    text = reg.render_prometheus()
+    assert '# TYPE infer_stage_latency_us summary' in text
+    assert 'infer_stage_latency_us{path="/infer",stage="ort",quantile="0.999"}' in text
+    assert 'infer_stage_latency_us_count{path="/infer",stage="ort"} 1' in text
+
+    from execution import data_synchronizer as ds
+    (tmp_path / "f.yaml").write_text("a"); (tmp_path / "s.json").write_text("{}")
+    monkeypatch.setattr(ds, "FEATURES_YAML", tmp_path / "f.yaml"); monkeypatch.setattr(ds, "SCALER_JSON", tmp_path / "s.json")
+    sync = ds.DataSynchronizer(tmp_path / "sync_status.json", latency=reg)
+    now = sync.utcnow_ms()
+    for d in (5, 7, 9, 400): sync.record_quote_delay(now - d)
+    sync.write_status()
+    st = json.loads((tmp_path / "sync_status.json").read_text())
+    qd = st["delay_distributions"]["broker_quote"]
+    assert qd["count"] == 4 and qd["max_us"] >= 400_000 and qd["p50_us"] < 20_000
+    assert st["broker_quote_delay_ms"] >= 400                  # last sample kept for compatibility
+    assert 'sync_delay_us_count{stage="broker_quote"} 4' in reg.render_prometheus()
+
+def test_metrics_endpoint(model_fixture, monkeypatch):
+    TestClient = pytest.importorskip("fastapi.testclient").TestClient
+    monkeypatch.setenv("INFER_CONFIGS_DIR", str(model_fixture["configs"]))
+    monkeypatch.setenv("INFER_MODELS_DIR", str(model_fixture["models"]))
+    monkeypatch.setenv("INFER_BIN_PORT", "0"); monkeypatch.setenv("INFER_WATCH_SEC", "0")
+    sys.modules.pop("execution.inference_server", None)
+    srv = importlib.import_module("execution.inference_server")
+    stages = ("parse", "build", "scale", "ort", "serialize", "total")
+    before = {st: srv.LATENCY.hist(srv.STAGE_METRIC, path="/infer", stage=st).count for st in stages}
+    try:
+        with TestClient(srv.app) as c:
+            n = srv.BUNDLES.current.n_features
+            for _ in range(3):
+                assert c.post("/infer", json={"correlation_id": "x", "features": [0.1] * n}).status_code == 200
+            assert c.post("/infer/batch", json={"requests": [{"correlation_id": "y", "features": [0.1] * n}]}).status_code == 200
+            text = c.get("/metrics").text
+    finally:
+        sys.modules.pop("execution.inference_server", None)
+    for st in stages:
+        assert f'infer_stage_latency_us_count{{path="/infer",stage="{st}"}} {before[st] + 3}' in text
+    assert 'infer_stage_latency_us_count{path="/infer/batch",stage="ort"}' in text
@@ -0,0 +1,50 @@
+import threading, numpy as np, pytest
+from concurrent.futures import ThreadPoolExecutor
+
+from execution.micro_batcher import MicroBatcher
+
+def test_concurrent_rows_coalesce_and_fan_out():
+    calls = []
+    def run(X, key):
+        calls.append(X.shape[0])
+        return X[:, 0] * 2.0
+    mb = MicroBatcher(run, window_s=0.02, max_batch=64)
+    try:
+        with ThreadPoolExecutor(16) as ex:
+            out = list(ex.map(lambda i: mb.score(np.array([i, 0.0], dtype=np.float32)), range(32)))
+    finally:
+        mb.close()
+    assert out == [2.0 * i for i in range(32)]
+    assert sum(calls) == 32 and len(calls) < 32
+
+def test_max_batch_caps_run_size():
+    sizes = []
+    gate = threading.Event()
+    def run(X, key):
+        gate.wait(1.0); sizes.append(X.shape[0]); return np.zeros(X.shape[0])
+    mb = MicroBatcher(run, window_s=0.05, max_batch=4)
+    futs = [mb.submit(np.zeros(3, dtype=np.float32)) for _ in range(10)]
+    gate.set()
+    for f in futs: f.result(2.0)
+    mb.close()
+    assert max(sizes) <= 4 and sum(sizes) == 10
+
+def test_model_error_propagates_to_every_caller():
+    def run(X, key): raise ValueError("boom")
+    mb = MicroBatcher(run, window_s=0.01)
+    futs = [mb.submit(np.zeros(2, dtype=np.float32)) for _ in range(3)]
+    for f in futs:
+        with pytest.raises(ValueError):
+            f.result(2.0)
+    mb.close()
+
+def test_rows_for_different_keys_run_separately():
+    seen = []
+    def run(X, key):
+        seen.append((key, X.shape[0])); return X[:, 0] + key
+    mb = MicroBatcher(run, window_s=0.05)
+    futs = [mb.submit(np.array([i], dtype=np.float32), key=i % 2 * 100) for i in range(6)]
+    out = [f.result(2.0) for f in futs]
+    mb.close()
+    assert out == [0.0, 101.0, 2.0, 103.0, 4.0, 105.0]
+    assert sorted(k for k, _ in seen) == [0, 100]
@@ -0,0 +1,145 @@
+import json, os, time, numpy as np, pytest
+
+pytest.importorskip("onnxruntime")
+from conftest import write_model_fixture
+from execution.model_bundle import BundleManager, BundlePaths, ContractError
+from ml_pipeline.scaler_versioning import ScalerVersionManager
+
+def _paths(fx):
+    return BundlePaths(fx["configs"] / "features.yaml", fx["configs"] / "scaler.json",
+                       fx["models"] / "meta_labeler.onnx", fx["models"] / "model_id.txt")
+
+def test_reload_swaps_and_pinned_bundle_keeps_serving(model_fixture):
+    mgr = BundleManager(_paths(model_fixture))
+    old = mgr.current
+    X = np.tile(np.linspace(0, 0.3, old.n_features, dtype=np.float32), (3, 1))
+    p_old = old.predict(X)
+
+    write_model_fixture(model_fixture["configs"].parent, weight_scale=3.0)
+    (model_fixture["models"] / "model_id.txt").write_text("m2")
+    new = mgr.reload()
+    assert mgr.current is new and new.model_id == "m2"
+    assert not np.allclose(new.predict(X), p_old)
+    np.testing.assert_allclose(old.predict(X), p_old)  # in-flight holders unaffected
+
+def test_contract_violation_keeps_current_bundle(model_fixture):
+    mgr = BundleManager(_paths(model_fixture))
+    before = mgr.current
+    scaler = dict(model_fixture["scaler"]); feats = dict(scaler["features"]); feats.pop("f03")
+    (model_fixture["configs"] / "scaler.json").write_text(json.dumps({"features": feats}))
+    with pytest.raises(ContractError, match="f03"):
+        mgr.reload()
+    assert mgr.current is before and "f03" in mgr.last_error
+
+def test_watcher_picks_up_scaler_publish_and_rollback(model_fixture):
+    paths = _paths(model_fixture)
+    mgr = BundleManager(paths)
+    v0 = mgr.current.features_version
+    svm = ScalerVersionManager(path=str(paths.scaler_json), registry=str(model_fixture["models"] / "registry"),
+                               model_id_file=str(paths.model_id_file))
+    svm.update_atomic({"features": {**model_fixture["scaler"]["features"], "f00": {"mean": 1.0, "std": 3.0}}}, "m7")
+    mgr.start_watcher(0.02)
+    try:
+        deadline = time.time() + 3.0
+        while mgr.current.model_id != "m7" and time.time() < deadline: time.sleep(0.02)
+        assert mgr.current.model_id == "m7" and mgr.current.features_version != v0
+        svm.rollback(); mgr.reload()
+        assert mgr.current.features_version == v0
+    finally:
+        mgr.stop_watcher()
+
+def test_rollback_restores_the_model_with_the_scaler(model_fixture, tmp_path):
+    paths = _paths(model_fixture)
+    paths.model_id_file.write_text("m0")
+    mgr = BundleManager(paths)
+    X = np.tile(np.linspace(0, 0.3, mgr.current.n_features, dtype=np.float32), (2, 1))
+    p0 = mgr.current.predict(X)
+    new = write_model_fixture(tmp_path / "new", weight_scale=3.0)
+    svm = ScalerVersionManager(path=str(paths.scaler_json), registry=str(model_fixture["models"] / "registry"),
+                               model_id_file=str(paths.model_id_file), model_file=str(paths.model_onnx))
+    svm.update_atomic(model_fixture["scaler"], "m8", model_src=str(new["models"] / "meta_labeler.onnx"))
+    assert mgr.reload().model_id == "m8" and not np.allclose(mgr.current.predict(X), p0)
+    svm.rollback()
+    assert mgr.reload().model_id == "m0"
+    np.testing.assert_allclose(mgr.current.predict(X), p0, rtol=1e-6)
+    with pytest.raises(RuntimeError, match="no previous model"):
+        svm.rollback()
+
+    svm.update_atomic(model_fixture["scaler"], "m9")
+    paths.model_onnx.write_bytes((new["models"] / "meta_labeler.onnx").read_bytes())   # deployed by hand
+    with pytest.raises(RuntimeError, match="not the model deployed as m9"):
+        svm.rollback()
+    assert paths.model_id_file.read_text() == "m9"
+
+def test_lazy_manager_and_contract_cache(model_fixture, tmp_path, monkeypatch):
+    from execution import model_bundle
+    paths, cache = _paths(model_fixture), tmp_path / "contracts"
+    mgr = BundleManager(paths, lazy=True, contract_cache_dir=cache)
+    assert not mgr.loaded and not list(tmp_path.glob("contracts/*"))
+    b = mgr.current
+    assert mgr.loaded and (cache / f"contract_{b.features_version}.npz").exists()
+
+    def no_yaml(path): raise AssertionError("features.yaml parsed on a warm start")
+    monkeypatch.setattr(model_bundle, "_load_features_spec", no_yaml)
+    warm = BundleManager(paths, contract_cache_dir=cache).current
+    assert warm.feature_order == b.feature_order and warm.plan.missing == b.plan.missing
+    np.testing.assert_array_equal(warm.plan.inv_std, b.plan.inv_std)
+    np.testing.assert_array_equal(warm.plan.categorical, b.plan.categorical)
+    # a changed scaler.json is a new features_version: parsed again
+    (model_fixture["configs"] / "scaler.json").write_text(json.dumps(model_fixture["scaler"]) + " ")
+    with pytest.raises(AssertionError, match="warm start"):
+        BundleManager(paths, contract_cache_dir=cache)
+
+def test_session_options_and_optimized_model_cache(model_fixture, tmp_path):
+    from execution.model_bundle import SessionConfig
+    cfg = SessionConfig(intra_op_threads=1, inter_op_threads=1, opt_level="extended", optimized_cache_dir=tmp_path / "ort")
+    X = np.tile(np.linspace(0, 0.3, 8, dtype=np.float32), (2, 1))
+    first = BundleManager(_paths(model_fixture), session=cfg).current
+    cached = list((tmp_path / "ort").glob("meta_labeler.*.extended.*.onnx"))
+    assert len(cached) == 1 and first.session.get_session_options().intra_op_num_threads == 1
+    second = BundleManager(_paths(model_fixture), session=cfg).current  # loads the serialized graph
+    np.testing.assert_allclose(second.predict(X), first.predict(X), rtol=1e-6)
+    cached[0].write_bytes(b"garbage")                                      # corrupt entry is rebuilt
+    third = BundleManager(_paths(model_fixture), session=cfg).current
+    np.testing.assert_allclose(third.predict(X), first.predict(X), rtol=1e-6)
+
+def test_server_import_touches_no_model_files(tmp_path, monkeypatch):
+    import importlib, subprocess, sys, threading
+    monkeypatch.setenv("INFER_CONFIGS_DIR", str(tmp_path / "missing"))
+    monkeypatch.setenv("INFER_MODELS_DIR", str(tmp_path / "missing"))
+    monkeypatch.setenv("PRED_LOG_URL", f"sqlite:///{tmp_path / 'log.db'}")
+    monkeypatch.setenv("PRED_LOG_SPILL", str(tmp_path / "spill.jsonl"))
+    sys.modules.pop("execution.inference_server", None)
+    try:
+        threads = set(threading.enumerate())
+        srv = importlib.import_module("execution.inference_server")
+        assert srv.BATCHER is None and srv.PRED_LOG is None and set(threading.enumerate()) == threads
+        assert not (tmp_path / "log.db").exists() and "app" not in vars(srv)
+        assert not srv.BUNDLES.loaded and srv.app.title and srv.app is srv.app
+        with pytest.raises(FileNotFoundError):
+            srv.BUNDLES.current
+    finally:
+        sys.modules.pop("execution.inference_server", None)
+    code = "import sys; import execution.inference_server; print('pandas' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, timeout=120,
+                         env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)})
+    assert out.stdout.strip() == "False", out.stderr
+
+def test_infer_batch_rejects_oversized_request(model_fixture, monkeypatch):
+    import importlib, sys
+    TestClient = pytest.importorskip("fastapi.testclient").TestClient
+    monkeypatch.setenv("INFER_CONFIGS_DIR", str(model_fixture["configs"]))
+    monkeypatch.setenv("INFER_MODELS_DIR", str(model_fixture["models"]))
+    monkeypatch.setenv("INFER_WATCH_SEC", "0"); monkeypatch.setenv("INFER_BATCH_REQUEST_MAX", "4")
+    sys.modules.pop("execution.inference_server", None)
+    srv = importlib.import_module("execution.inference_server")
+    try:
+        with TestClient(srv.app) as c:
+            n = srv.BUNDLES.current.n_features
+            big = {"requests": [{"correlation_id": f"z{i}", "features": [0.1] * n} for i in range(5)]}
+            assert c.post("/infer/batch", json=big).status_code == 413
+            big["requests"].pop()                                      # exactly INFER_BATCH_REQUEST_MAX is accepted
+            r = c.post("/infer/batch", json=big).json()
+    finally:
+        sys.modules.pop("execution.inference_server", None)
+    assert [x["correlation_id"] for x in r["results"]] == ["z0", "z1", "z2", "z3"] and all(x["ok"] for x in r["results"])
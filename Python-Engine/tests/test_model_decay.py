@@ -0,0 +1,36 @@
+import numpy as np, pytest
+
+from monitoring.model_decay import DecayRegistry, ModelDecayMonitor
+
+def _reference(y, p):
+    # the original full-window computation
+    auc = np.sum(p[y==1][:,None] > p[y==0][None,:]) / (np.sum(y==1)*np.sum(y==0)+1e-9)
+    idx = np.digitize(p, np.linspace(0,1,11)) - 1
+    ece = sum(abs(p[idx==b].mean() - y[idx==b].mean()) * (idx==b).mean() for b in range(10) if (idx==b).any())
+    return auc, ece
+
+@pytest.mark.parametrize("resync", [False, True])
+def test_sliding_window_matches_full_recompute(monkeypatch, resync):
+    if resync: monkeypatch.setattr(ModelDecayMonitor, "RESYNC_EVERY", 97)
+    rng = np.random.default_rng(3)
+    y = rng.integers(0, 2, 1500)
+    p = np.clip(0.5 + 0.2 * (y - 0.5) + rng.normal(0, 0.2, y.size), 0, 1).round(3)  # ties, 0.0 and 1.0
+    m = ModelDecayMonitor(window=400)
+    for i in range(y.size):
+        m.update(y[i], p[i])
+        if i % 137 == 0 or i == y.size - 1:
+            auc, ece = _reference(y[max(0, i-399):i+1], p[max(0, i-399):i+1])
+            assert m.auc == pytest.approx(auc, abs=1e-9) and m.ece == pytest.approx(ece, abs=1e-9)
+
+def test_registry_and_retrain_flag():
+    reg = DecayRegistry(window=500)
+    rng = np.random.default_rng(0)
+    for _ in range(300):
+        y = int(rng.integers(0, 2))
+        reg.update("EURUSD", "m1", y, 0.8 if y else 0.2)       # perfect ranking, ece 0.2
+        reg.update("GBPUSD", "m1", y, rng.random())           # no skill
+    assert reg.get("EURUSD", "m1").auc == pytest.approx(1.0)
+    assert reg.get("GBPUSD", "m1").auc == pytest.approx(0.5, abs=0.1)
+    assert set(reg.needs_retrain()) == {("EURUSD", "m1"), ("GBPUSD", "m1")}
+    assert reg.metrics("EURUSD")[("EURUSD", "m1")]["ece"] == pytest.approx(0.2)
+    assert not ModelDecayMonitor().should_retrain()
@@ -0,0 +1,65 @@
+import numpy as np, pandas as pd
+
+from data.news_index import HIGH, MEDIUM, NO_NEWS_MIN, NewsIndex, NewsTable
+
+T0 = 1735603200
+
+def _calendar(n=300, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({"utc_ts": T0 + 60 * rng.integers(0, 3 * 24 * 60, n),
+                         "impact": rng.choice(["HIGH", "Medium", "low", "high impact"], n),
+                         "currency": rng.choice(["USD", "EUR", "GBP", "JPY", "ALL"], n, p=[.3, .3, .2, .15, .05]),
+                         "title": "x"})
+
+def _scan_minutes(cal, symbol, now):
+    # MinutesToNextHighCSV
+    best = NO_NEWS_MIN
+    for ts, imp, ccy in zip(cal.utc_ts, cal.impact, cal.currency):
+        if ts >= now and "HIGH" in imp.upper() and ccy in (symbol[:3], "ALL"):
+            best = min(best, (ts - now) / 60.0)
+    return best
+
+def _scan_blackout(cal, symbol, now, min_level, before, after):
+    # CNewsCalendar.ScanBlackout
+    lvl = lambda s: 2 if "HIGH" in s.upper() else (1 if "MED" in s.upper() else 0)
+    for ts, imp, ccy in zip(cal.utc_ts, cal.impact, cal.currency):
+        if lvl(imp) >= min_level and ccy in (symbol[:3], symbol[-3:], "ALL") and ts - before * 60 <= now <= ts + after * 60:
+            return True
+    return False
+
+def test_layouts_and_queries_match_csv_scan():
+    cal = _calendar()
+    idx = NewsIndex.from_frame(cal)
+    assert len(idx) == len(cal) and idx.currencies == ("EUR", "GBP", "JPY", "USD")
+    assert np.all(np.diff(idx.ts) >= 0)
+    # data/news layout (importance 1..3) builds the same index
+    iso = pd.DataFrame({"event_time_iso": pd.to_datetime(cal.utc_ts, unit="s", utc=True).dt.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                        "currency": cal.currency, "event_name": cal.title,
+                        "importance": cal.impact.map(lambda s: 3 if "HIGH" in s.upper() else (2 if "MED" in s.upper() else 1))})
+    assert NewsIndex.from_frame(iso).digest == idx.digest
+    assert NewsIndex.from_frame(idx.to_frame()).digest == idx.digest
+
+    now = T0 - 3600 + np.random.default_rng(1).integers(0, 3 * 86400 + 7200, 400)
+    for sym in ("EURUSD", "USDJPY", "XAUUSD"):
+        mins = idx.minutes_to_next(sym, now)
+        assert np.allclose(mins, [_scan_minutes(cal, sym, t) for t in now])
+        for lvl in (HIGH, MEDIUM):
+            blk = idx.blackout(sym, now, lvl, 45, 30)
+            assert blk.tolist() == [_scan_blackout(cal, sym, t, lvl, 45, 30) for t in now]
+
+def test_exported_minute_table_answers_like_the_index():
+    cal = _calendar(seed=2)
+    idx = NewsIndex.from_frame(cal)
+    start = T0 + 1800 + 17                          # anchored down to the minute
+    tab = NewsTable(idx.export_table(start, hours=24))
+    assert tab.start_utc == T0 + 1800 and tab.minutes == 24 * 60 and tab.currencies[-1] == "ALL"
+    assert tab.covers(T0 + 3600) and not tab.covers(T0) and not tab.covers(T0 + 1800 + 86400)
+
+    now = tab.start_utc + np.random.default_rng(3).integers(0, 24 * 3600 - 60, 500)
+    now[:3] = cal.utc_ts.iloc[:3]                   # exactly on events
+    now[3:6] = cal.utc_ts.iloc[:3] + 1              # just after them
+    now = now[[tab.covers(int(t)) for t in now]]
+    for sym in ("EURUSD", "GBPJPY", "XAUUSD"):
+        assert [tab.minutes_to_next(sym, int(t)) for t in now] == idx.minutes_to_next(sym, now).tolist()
+        for lvl in (HIGH, MEDIUM):
+            assert [tab.blackout(sym, int(t), lvl, 45, 45) for t in now] == idx.blackout(sym, now, lvl, 45, 45).tolist()
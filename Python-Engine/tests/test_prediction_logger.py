@@ -0,0 +1,121 @@
+import sqlite3, threading, time
+import numpy as np
+
+from execution.prediction_logger import PredictionLogger, SqliteSink, decode_features, open_logger
+
+def _rows(db, sql):
+    with sqlite3.connect(db) as c: return c.execute(sql).fetchall()
+
+def test_bulk_write_and_compact_features(tmp_path):
+    db = tmp_path / "log.db"
+    log = open_logger(f"sqlite:///{db}", tmp_path / "spill.jsonl", batch_size=50, flush_s=10)
+    vec = np.linspace(-1, 1, 8, dtype=np.float32)
+    t0 = time.perf_counter()
+    for i in range(120):
+        assert log.log_prediction(f"c{i}", 0.5, "m1", features=vec, symbol="EURUSD", tf="M15")
+    assert (time.perf_counter() - t0) / 120 < 1e-3                  # producer never waits on the DB
+    log.log_order("c0", 123, "EURUSD", "BUY", 1.1, 1.1001, 0, "filled")
+    assert log.flush()
+    assert _rows(db, "SELECT COUNT(*) FROM predictions") == [(120,)]
+    assert _rows(db, "SELECT model_id FROM models") == [("m1",)]
+    blob, = _rows(db, "SELECT feature_vector FROM predictions LIMIT 1")[0]
+    assert len(blob) == 32 and np.array_equal(decode_features(blob), vec)
+    assert _rows(db, "SELECT mt5_ticket, status FROM orders") == [(123, "filled")]
+    assert log.stats()["written"] == 122 and log.stats()["flushes"] < 10
+    log.close()
+
+def test_drops_when_full_and_spills_until_db_returns(tmp_path):
+    db = tmp_path / "log.db"
+    state = {"up": False}
+    class Flaky(SqliteSink):
+        def _insert(self, table, rows):
+            if not state["up"]: raise sqlite3.OperationalError("db down")
+            super()._insert(table, rows)
+    entered, gate = threading.Event(), threading.Event()
+    def make_sink():
+        entered.set(); gate.wait(5)                               # writer stalls on connect
+        return Flaky(db)
+    log = PredictionLogger(make_sink, tmp_path / "spill.jsonl", max_queue=5, batch_size=100, flush_s=0.01, retry_s=0.0)
+    log.log_order("s0", 0, "EURUSD", "BUY", 1.0)
+    assert entered.wait(5)
+    ok = [log.log_order(f"s{i}", i, "EURUSD", "BUY", 1.0) for i in range(1, 9)]
+    assert ok == [True] * 5 + [False] * 3 and log.stats()["dropped"] == 3
+    gate.set()
+    assert log.flush()
+    assert log.stats()["spilled"] == 6 and log.stats()["spill_bytes"] > 0
+    state["up"] = True
+    log.log_prediction("p1", 0.7, "m1", features=[1.0, 2.0])
+    assert log.flush()
+    assert log.stats()["replayed"] == 6 and log.stats()["spill_bytes"] == 0
+    # spilled rows land first, in order
+    assert [r[0] for r in _rows(db, "SELECT signal_id FROM orders ORDER BY id")] == [f"s{i}" for i in range(6)]
+    assert _rows(db, "SELECT signal_id FROM predictions") == [("p1",)]
+    log.close()
+
+def test_bad_rows_dead_lettered_and_models_row_written_by_writer(tmp_path):
+    db = tmp_path / "log.db"
+    class Strict(SqliteSink):
+        def __init__(self, path):
+            super().__init__(path); self.conn.execute("PRAGMA foreign_keys = ON")
+        def _insert(self, table, rows):
+            if any(r[0] == "bad" for r in rows): raise sqlite3.IntegrityError("CHECK constraint failed")
+            super()._insert(table, rows)
+    log = PredictionLogger(lambda: Strict(db), tmp_path / "spill.jsonl", batch_size=100, flush_s=10)
+    log._put("predictions", ("p0", "EURUSD", "M15", None, None, 0.5, "m2", "2025-01-01 00:00:00"))  # log_model lost
+    for sid in ("p1", "bad", "p2"): log.log_prediction(sid, 0.6, "m2")
+    assert log.flush()
+    log.log_prediction("p3", 0.7, "m2"); assert log.flush()
+    assert [r[0] for r in _rows(db, "SELECT signal_id FROM predictions ORDER BY id")] == ["p0", "p1", "p2", "p3"]
+    assert _rows(db, "SELECT model_id FROM models") == [("m2",)]
+    st = log.stats()
+    assert st["dead_lettered"] == 1 and st["spilled"] == 0 and st["spill_bytes"] == 0
+    dead = (tmp_path / "spill.dead.jsonl").read_text().splitlines()
+    assert len(dead) == 1 and '"bad"' in dead[0] and "IntegrityError" in dead[0]
+    log.close()
+
+def test_spill_is_capped_and_log_model_not_marked_when_dropped(tmp_path):
+    gate = threading.Event()
+    def down():
+        gate.wait(5); raise sqlite3.OperationalError("db down")
+    log = PredictionLogger(down, tmp_path / "spill.jsonl", max_queue=2, batch_size=100, flush_s=0.01,
+                           retry_s=60, max_spill_bytes=300)
+    log.log_order("s0", 0, "EURUSD", "BUY", 1.0); time.sleep(0.05)     # writer stalls on connect
+    log.log_order("s1", 1, "EURUSD", "BUY", 1.0); log.log_order("s2", 2, "EURUSD", "BUY", 1.0)
+    assert not log.log_model("m9") and "m9" not in log._models_seen
+    gate.set(); assert log.flush()
+    for i in range(20):
+        log.log_order(f"t{i}", i, "EURUSD", "BUY", 1.0); assert log.flush()
+    st = log.stats()
+    assert 0 < st["spill_bytes"] <= 300 and st["spilled"] + st["spill_dropped"] == 23
+    log.close()
+
+class _RejectingSink(SqliteSink):
+    """IntegrityError for rows whose signal_id is "bad"; an outage on "down" once `outage` is set."""
+    outage = False
+    def _insert(self, table, rows):
+        if any(r[0] == "bad" for r in rows): raise sqlite3.IntegrityError("FOREIGN KEY constraint failed")
+        if type(self).outage and any(r[0] == "down" for r in rows): raise sqlite3.OperationalError("db down")
+        super()._insert(table, rows)
+
+def test_rejected_order_rolls_back_the_batch_and_rows_are_written_once(tmp_path):
+    db = tmp_path / "log.db"
+    log = PredictionLogger(lambda: _RejectingSink(db), tmp_path / "spill.jsonl", batch_size=100, flush_s=10, retry_s=0)
+    log.log_model("m1")
+    for sid in ("p1", "p2"): log.log_prediction(sid, 0.6, "m1")
+    log.log_order("ok1", 1, "EURUSD", "BUY", 1.0); log.log_order("bad", 2, "EURUSD", "BUY", 1.0)
+    assert log.flush()
+    assert _rows(db, "SELECT signal_id FROM predictions ORDER BY id") == [("p1",), ("p2",)]
+    assert _rows(db, "SELECT signal_id FROM orders") == [("ok1",)] and _rows(db, "SELECT model_id FROM models") == [("m1",)]
+    assert log.stats()["dead_lettered"] == 1
+
+    # outage while isolating a bad row: only the rows not written yet are spilled and replayed
+    _RejectingSink.outage = True
+    try:
+        for sid in ("p3", "bad", "down", "p4"): log.log_prediction(sid, 0.6, "m1")
+        assert log.flush()
+    finally:
+        _RejectingSink.outage = False
+    log.log_prediction("p5", 0.6, "m1"); assert log.flush()
+    assert [r[0] for r in _rows(db, "SELECT signal_id FROM predictions ORDER BY id")] == ["p1", "p2", "p3", "down", "p4", "p5"]
+    assert log.stats()["dead_lettered"] == 2 and log.stats()["spill_bytes"] == 0
+    log.close()
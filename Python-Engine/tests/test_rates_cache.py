@@ -0,0 +1,63 @@
+import threading, time
+
+import numpy as np, pandas as pd
+
+import fake_mt5
+from execution.rates_cache import IncrementalRates, RatesStore
+
+def _brute_pctl(fake, sym, window):
+    r = fake.copy_rates_from_pos(sym, fake.TIMEFRAME_M1, 1, window); fake.calls.pop()
+    cur = fake.symbol_info(sym).spread
+    return float((r["spread"] <= cur).mean() * 100.0)
+
+def test_incremental_sync_fetches_only_new_bars(tmp_path):
+    fake = fake_mt5.FakeMT5()
+    cache = IncrementalRates(fake, RatesStore(tmp_path), fake.TIMEFRAME_M1, window_bars=5000)
+    assert cache.sync("EURUSD", now_s=fake.now_s) == 5000
+    fake.now_s += 30 * 60
+    assert cache.sync("EURUSD", now_s=fake.now_s) == 30
+    assert fake.calls[-1][3] <= 33  # asked for ~30 bars, not the whole window
+
+    stored = RatesStore(tmp_path).load("EURUSD", fake.TIMEFRAME_M1)
+    assert stored.size == 5030 and np.all(np.diff(stored["time"]) == 60)
+    assert abs(cache.spread_percentile("EURUSD", fake.symbol_info("EURUSD").spread) - _brute_pctl(fake, "EURUSD", 5000)) < 1e-9
+
+def test_histogram_survives_restart_and_window_slides(tmp_path):
+    fake = fake_mt5.FakeMT5()
+    IncrementalRates(fake, RatesStore(tmp_path), fake.TIMEFRAME_M1, window_bars=2000).sync("GBPUSD", now_s=fake.now_s)
+    fake.now_s += 3 * 3600
+    cache = IncrementalRates(fake, RatesStore(tmp_path), fake.TIMEFRAME_M1, window_bars=2000)  # new process
+    assert cache.sync("GBPUSD", now_s=fake.now_s) == 180
+    for _ in range(5):
+        fake.now_s += 45 * 60
+        cache.sync("GBPUSD", now_s=fake.now_s)
+        assert cache.hist["GBPUSD"].total == 2000
+        assert abs(cache.spread_percentile("GBPUSD", fake.symbol_info("GBPUSD").spread) - _brute_pctl(fake, "GBPUSD", 2000)) < 1e-9
+
+def test_agent_writes_percentiles_from_cache(tmp_path, monkeypatch):
+    fake = fake_mt5.install()
+    from execution import mt5_snapshot_agent as agent
+    monkeypatch.setattr(agent, "mt5", fake)
+    monkeypatch.setattr(agent, "FILES_DIR", tmp_path)
+    monkeypatch.setattr(agent, "RATES_CACHE_DIR", tmp_path / "cache")
+    monkeypatch.setattr(agent, "_SPREAD_CACHE", {})
+    monkeypatch.setattr(agent.time, "time", lambda: fake.now_s)
+    agent.write_spread_percentiles(lookback_days=1)
+    out = pd.read_csv(tmp_path / "spread_percentiles.csv")
+    assert list(out["symbol"]) == agent.MAPPING["FX"] and out["pctl"].between(0, 100).all()
+    fake.calls.clear(); fake.now_s += 1800
+    agent.write_spread_percentiles(lookback_days=1)
+    assert all(c[3] <= 33 for c in fake.calls), fake.calls
+
+def test_spread_job_runs_in_background_without_pile_up(monkeypatch):
+    fake_mt5.install()
+    from execution import mt5_snapshot_agent as agent
+    gate, calls = threading.Event(), []
+    monkeypatch.setattr(agent, "_SPREAD_RUN", {"future": None})
+    monkeypatch.setattr(agent, "write_spread_percentiles", lambda lookback_days: (calls.append(lookback_days), gate.wait(5)))
+    t0 = time.monotonic()
+    f = agent.submit_spread_percentiles(7)
+    assert f is not None and time.monotonic() - t0 < 0.5          # the caller does not wait
+    assert agent.submit_spread_percentiles(7) is None              # still running: skipped
+    gate.set(); f.result(5)
+    assert agent.submit_spread_percentiles(7).result(5) and calls == [7, 7]
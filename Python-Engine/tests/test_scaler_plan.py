@@ -0,0 +1,36 @@
+import numpy as np, pytest
+
+from ml_pipeline.scaler_plan import ScalerPlan
+
+ORDER = ["ret_1", "session", "atr", "unseen"]
+CFG = {"features": {
+    "ret_1": {"mean": 0.001, "std": 0.02},
+    "session": {"type": "Category"},
+    "atr": {"mean": 0.0012, "std": 0.0},   # zero std falls back to 1.0
+}}
+
+def _reference(vec, order, cfg):
+    # the original per-feature loop from inference_server
+    out = vec.astype(np.float32).copy()
+    for i, feat in enumerate(order):
+        meta = cfg["features"].get(feat)
+        if not meta or str(meta.get("type", "")).lower() == "category": continue
+        out[..., i] = (out[..., i] - float(meta.get("mean", 0.0))) / (float(meta.get("std", 1.0)) or 1.0)
+    return out
+
+def test_plan_matches_reference_loop_for_vector_and_batch():
+    plan = ScalerPlan.compile(ORDER, CFG)
+    X = np.random.default_rng(0).normal(size=(16, 4)).astype(np.float32)
+    np.testing.assert_allclose(plan.scale(X), _reference(X, ORDER, CFG), rtol=1e-6)
+    np.testing.assert_allclose(plan.scale(X[3]), _reference(X[3], ORDER, CFG), rtol=1e-6)
+    assert plan.scale(X).dtype == np.float32
+    assert plan.missing == ("unseen",)
+    assert plan.categorical.tolist() == [False, True, False, False]
+
+def test_vector_from_map_orders_and_reports_missing():
+    plan = ScalerPlan.compile(ORDER, CFG)
+    fm = {"unseen": 4.0, "atr": 3.0, "ret_1": 1.0, "session": 2.0, "extra": 9.0}
+    assert plan.vector_from_map(fm).tolist() == [1.0, 2.0, 3.0, 4.0]
+    del fm["atr"]
+    with pytest.raises(KeyError, match="atr"):
+        plan.vector_from_map(fm)
@@ -0,0 +1,43 @@
+import numpy as np, pandas as pd, pytest
+
+from conftest import make_ticks
+from data.tick_backfill import backfill_clean
+from data.tick_processor import TickCleaner, tag_rollover
+
+def _in_memory(df):
+    return tag_rollover(TickCleaner().detect_and_fix(df))
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_chunked_backfill_matches_in_memory(tmp_path, fmt):
+    if fmt == "parquet": pytest.importorskip("pyarrow")
+    df = make_ticks(n=12000, seed=11)
+    src = tmp_path / f"ticks.{fmt}"
+    frame = df.rename_axis("time").reset_index()
+    frame.to_csv(src, index=False) if fmt == "csv" else frame.to_parquet(src, index=False)
+    dst = tmp_path / f"clean.{fmt}"
+
+    rep = backfill_clean(src, dst, chunksize=1700, trace_memory=True)
+    out = pd.read_csv(dst, index_col=0) if fmt == "csv" else pd.read_parquet(dst)
+    expected = _in_memory(df)
+
+    assert rep.rows_in == len(df) and rep.rows_out == len(expected) and rep.chunks == 8
+    assert rep.peak_rss_mb > 0 and rep.peak_traced_mb is not None
+    np.testing.assert_array_equal(pd.to_datetime(out.index, utc=True).as_unit("ns").asi8,
+                                  expected.index.as_unit("ns").asi8)
+    np.testing.assert_allclose(out[["bid", "ask"]].to_numpy(), expected[["bid", "ask"]].to_numpy())
+    np.testing.assert_array_equal(out["rollover_flag"].to_numpy(), expected["rollover_flag"].to_numpy())
+    if fmt == "parquet":
+        assert out["z"].dtype == np.float32
+
+def test_empty_source_writes_parquet_with_output_schema(tmp_path):
+    pytest.importorskip("pyarrow")
+    src = tmp_path / "ticks.parquet"
+    make_ticks(n=500, seed=5).iloc[:0].rename_axis("time").reset_index().to_parquet(src, index=False)
+    dst = tmp_path / "clean.parquet"
+
+    rep = backfill_clean(src, dst)
+    out = pd.read_parquet(dst)
+
+    assert rep.rows_in == 0 and rep.rows_out == 0 and out.empty
+    assert out.index.name == "time" and str(out.index.tz) == "UTC"
+    assert out.dtypes.to_dict() == {"bid": np.float64, "ask": np.float64, "z": np.float32, "rollover_flag": np.int8}
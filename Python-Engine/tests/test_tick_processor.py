@@ -0,0 +1,51 @@
+import numpy as np, pandas as pd, pytest
+
+from conftest import make_ticks
+from data.tick_processor import TickCleaner, tag_rollover
+
+def _reference(df):
+    # original batch implementation (per-call dayofweek / hour)
+    df = df[(df["ask"]>0) & (df["bid"]>0) & (df["ask"]>df["bid"])]
+    r = np.log((df["ask"]+df["bid"])/2.0).diff()
+    z = (r - r.rolling(1000, min_periods=100).mean()) / (r.rolling(1000, min_periods=100).std() + 1e-12)
+    df = df[(z.abs()<8) | z.isna()]
+    idx = df.index
+    return df[(idx.dayofweek<=4) | ((idx.dayofweek==6) & (idx.hour>=21))]
+
+def test_batch_matches_reference():
+    df = make_ticks()
+    out = TickCleaner().detect_and_fix(df)
+    pd.testing.assert_frame_equal(out, _reference(df))
+    assert len(out) < len(df)
+
+@pytest.mark.parametrize("chunk", [64, 999, 2500])
+def test_streaming_chunks_match_batch(chunk):
+    df = make_ticks()
+    s = TickCleaner().stream()
+    parts = [s.process(df.iloc[i:i+chunk]) for i in range(0, len(df), chunk)]
+    out = pd.concat(parts)
+    pd.testing.assert_frame_equal(out.drop(columns="z"), TickCleaner().detect_and_fix(df))
+
+def test_push_matches_batch_and_z():
+    df = make_ticks()
+    s = TickCleaner().stream()
+    got = [s.push(ts, b, a) for ts, b, a in zip(df.index, df["bid"], df["ask"])]
+    kept = [g for g in got if g is not None]
+    batch = TickCleaner().stream().process(df)
+    assert [g[0] for g in kept] == list(batch.index.as_unit("ns").asi8)
+    np.testing.assert_allclose([g[3] for g in kept], batch["z"].to_numpy(), rtol=1e-6, equal_nan=True)
+
+def test_mixed_push_and_chunk_state_carries():
+    df = make_ticks()
+    s = TickCleaner().stream()
+    a = [s.push(ts, b, k) for ts, b, k in zip(df.index[:1500], df["bid"][:1500], df["ask"][:1500])]
+    rest = s.process(df.iloc[1500:])
+    n_kept = sum(x is not None for x in a) + len(rest)
+    assert n_kept == len(TickCleaner().detect_and_fix(df))
+
+def test_tag_rollover_matches_tz_convert():
+    idx = pd.date_range("2025-03-01", "2025-11-10", freq="7min", tz="UTC")
+    df = pd.DataFrame({"bid": 1.0, "ask": 1.0001}, index=idx)
+    local = idx.tz_convert("America/New_York")
+    expected = ((local.hour==17) & (local.minute<30)).astype("int8")
+    np.testing.assert_array_equal(tag_rollover(df)["rollover_flag"].to_numpy(), np.asarray(expected))
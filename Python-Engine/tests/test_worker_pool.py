@@ -0,0 +1,112 @@
+import json, time, numpy as np, pytest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+pytest.importorskip("onnxruntime")
+from conftest import write_model_fixture
+from execution.model_bundle import BundlePaths, ContractError, load_bundle
+from execution.server_config import ServerConfig
+from execution.worker_pool import CURRENT, SharedBundleClient, WorkerPool, attach_version, cpu_sets, read_current
+
+def _paths(fx):
+    return BundlePaths(fx["configs"] / "features.yaml", fx["configs"] / "scaler.json",
+                       fx["models"] / "meta_labeler.onnx", fx["models"] / "model_id.txt")
+
+def _X(n, seed=0):
+    return np.random.default_rng(seed).normal(size=(5, n)).astype(np.float32)
+
+def test_shared_version_matches_private_bundle(model_fixture, tmp_path):
+    paths = _paths(model_fixture)
+    pool = WorkerPool(paths, tmp_path / "shared", workers=0, share_min_bytes=0)
+    try:
+        v = pool.publish()
+        assert read_current(tmp_path / "shared") == v and len(v.initializers) == 1
+        assert (tmp_path / "shared" / v.weights_file).stat().st_size == 4 * len(model_fixture["names"])
+        b, att = attach_version(tmp_path / "shared", v, pool.session_config)
+        ref = load_bundle(paths)
+        X = _X(ref.n_features)
+        np.testing.assert_allclose(b.predict(b.plan.scale(X)), ref.predict(ref.plan.scale(X)), rtol=1e-6)
+        # scaler arrays are views on the shared block, weights on the read-only mapping
+        assert not b.plan.mean.flags.owndata and not att.arrays[0].flags.writeable
+        assert np.array_equal(b.plan.inv_std, ref.plan.inv_std) and b.plan.categorical.tolist() == ref.plan.categorical.tolist()
+        del b; assert att.release()
+    finally:
+        pool.stop()
+    assert not (tmp_path / "shared" / CURRENT).exists()
+    again = WorkerPool(paths, tmp_path / "shared", workers=0, share_min_bytes=0)
+    try: assert again.publish().seq == v.seq + 1          # seqs survive a clean stop
+    finally: again.stop()
+
+def test_workers_follow_publish_rollback_and_reload_requests(model_fixture, tmp_path):
+    paths, shared = _paths(model_fixture), tmp_path / "shared"
+    pool = WorkerPool(paths, shared, workers=0, share_min_bytes=0)
+    acks = []
+    try:
+        v1 = pool.publish()
+        w = SharedBundleClient(shared); w.on_swap = acks.append
+        w.start_watcher(0.02); pool.watch(0.02)
+        assert w.current.model_id == "meta_labeler" and acks == [v1.seq]
+        X = _X(w.current.n_features); p1 = w.current.predict(X)
+
+        write_model_fixture(model_fixture["configs"].parent, weight_scale=3.0)
+        (model_fixture["models"] / "model_id.txt").write_text("m2")
+        deadline = time.time() + 5
+        while w.current.model_id != "m2" and time.time() < deadline: time.sleep(0.01)
+        assert w.current.model_id == "m2" and not np.allclose(w.current.predict(X), p1)
+        assert acks == [v1.seq, v1.seq + 1] and pool.previous == v1.seq
+
+        pool.rollback()
+        deadline = time.time() + 5
+        while w.version.seq != v1.seq and time.time() < deadline: time.sleep(0.01)
+        np.testing.assert_allclose(w.current.predict(X), p1)
+
+        # /admin/reload path: the runner rebuilds from the sources, or refuses
+        assert w.reload().model_id == "m2" and w.version.seq == v1.seq + 2
+        # concurrent /admin/reload on several workers: every request gets its own answer
+        others = [SharedBundleClient(shared, request_timeout_s=20) for _ in range(4)]
+        with ThreadPoolExecutor(4) as ex:
+            got = list(ex.map(lambda c: c.reload().model_id, others))
+        assert got == ["m2"] * 4 and not list(shared.glob("reload.*.*"))
+        scaler = dict(model_fixture["scaler"]); feats = dict(scaler["features"]); feats.pop("f03")
+        (model_fixture["configs"] / "scaler.json").write_text(json.dumps({"features": feats}))
+        with pytest.raises(ContractError, match="f03"):
+            w.reload()
+        assert w.current.model_id == "m2" and "f03" in pool.last_error
+        assert len(pool.versions) == 2          # current + previous only
+    finally:
+        w.stop_watcher(); pool.stop()
+
+def test_server_config_from_env():
+    cfg = ServerConfig.from_env({"INFER_WORKER_INDEX": "2", "PRED_LOG_SPILL": "/x/spill.jsonl", "FEATURE_STORE_DIR": "/fs",
+                                 "INFER_CONFIGS_DIR": "/c", "INFER_ORT_CACHE_DIR": ""})
+    assert cfg.pred_log_spill.name == "spill.w2.jsonl" and Path(cfg.feature_store_dir) == Path("/fs/worker-2")
+    assert cfg.paths.scaler_json == Path("/c/scaler.json") and cfg.session.optimized_cache_dir is None
+    default = ServerConfig.from_env({})
+    assert default.worker_index == -1 and default.bin_port == 0 and default.batch_window_ms == 0
+
+def test_cpu_sets():
+    assert cpu_sets(3, 2, cpus=[0, 1, 2, 3]) == [[0, 1], [2, 3], [0, 1]]
+    assert cpu_sets(2, 1, cpus=[4, 6]) == [[4], [6]]
+
+def test_spawned_workers_serve_one_version(model_fixture, tmp_path):
+    requests = pytest.importorskip("requests")
+    pytest.importorskip("uvicorn")
+    pool = WorkerPool(_paths(model_fixture), tmp_path / "shared", workers=2, share_min_bytes=0,
+                      env={"INFER_BIN_PORT": "0", "INFER_BATCH_WINDOW_MS": "0", "INFER_CACHE_DIR": str(tmp_path / "cache")})
+    try:
+        pool.start("127.0.0.1", 0, watch_s=0)
+        assert pool.wait_acks(timeout=60), pool.status()
+        url = f"http://127.0.0.1:{pool.port}"
+        n = len(model_fixture["names"])
+        r = requests.post(f"{url}/infer", json={"correlation_id": "c1", "features": [0.1] * n}, timeout=10).json()
+        assert r["ok"] and r["model_id"] == "meta_labeler"
+        info = requests.get(f"{url}/version", timeout=10).json()["worker"]
+        assert info["seq"] == pool.current.seq and info["pid"] in {p.pid for p in pool.procs}
+
+        (model_fixture["models"] / "model_id.txt").write_text("m9")
+        pool.publish()
+        assert pool.wait_acks(timeout=30), pool.status()
+        assert {requests.get(f"{url}/health", timeout=10).json()["model_id"] for _ in range(6)} == {"m9"}
+    finally:
+        pool.stop()
+    assert all(not p.is_alive() for p in pool.procs)
@@ -5,15 +5,19 @@ ROOT = Path(__file__).resolve().parents[1]
 spec_path = ROOT / "configs" / "features.yaml"
 scaler_path = ROOT / "configs" / "scaler.json"
 
+sys.path.insert(0, str(ROOT / "Python-Engine" / "src"))
+from ml_pipeline.scaler_plan import ScalerPlan
+
 def verify_all_connections():
     spec = yaml.safe_load(spec_path.read_text())
     scaler = json.loads(scaler_path.read_text())
     names = [x["name"] for x in spec["meta_features"]]
-    missing = [n for n in names if n not in scaler["features"]]
-    if missing:
-        print("ERROR: scaler.json missing features:", missing)
+    # same compiled plan the inference server scales with
+    plan = ScalerPlan.compile(names, scaler)
+    if plan.missing:
+        print("ERROR: scaler.json missing features:", list(plan.missing))
         sys.exit(1)
-    print("OK: features.yaml ↔ scaler.json align.")
+    print(f"OK: features.yaml ↔ scaler.json align ({plan.n_features} features, {int(plan.categorical.sum())} categorical).")
 
 if __name__ == "__main__":
-    verify_all_connections()
\ No newline at end of file
+    verify_all_connections()